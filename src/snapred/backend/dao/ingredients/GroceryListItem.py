@@ -72,6 +72,10 @@ class GroceryListItem(BaseModel):
     # this is faster and uses less memory, if you know you only need one copy
     keepItClean: bool = True
 
+    # if set to True, cached neutron data is leased rather than copied:
+    #   the cached workspace itself is returned, and must not be modified
+    readOnly: bool = False
+
     # name the property the workspace will be used for
     propertyName: Optional[str] = None
 
@@ -0,0 +1,19 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class StateIdsResponse(BaseModel):
+    """
+
+    The state ids resolved for a list of run numbers.
+    Runs whose state could not be determined are listed in 'errors' rather than failing the whole request.
+
+    """
+
+    # <run number>: <state id>, for each run that was resolved
+    stateIds: Dict[str, str]
+    # <run number>: <error message>, for each run that could not be resolved
+    errors: Dict[str, str] = {}
+    # elapsed time in seconds
+    duration: float = 0.0
@@ -52,6 +52,12 @@ class DataExportService:
     def checkWritePermissions(self, path: Path) -> bool:
         return self.dataService.checkWritePermissions(path)
 
+    def exportPixelGroup(self, stateId: str, useLiteMode: bool, key: str, pixelGroup: PixelGroup):
+        """
+        Cache a `PixelGroup` under the state root: this is a no-op for an uninitialized state.
+        """
+        self.dataService.writePixelGroup(stateId, useLiteMode, key, pixelGroup)
+
     ##### CALIBRATION METHODS #####
 
     @validate_call
@@ -112,6 +118,12 @@ class DataExportService:
         """
         self.dataService.writeNormalizationState(normalization)
 
+    def exportFocussedNormalization(self, runId: str, useLiteMode: bool, version: int, key: str, name: str):
+        """
+        Cache a focussed normalization with its normalization version: this is a no-op if the version does not exist.
+        """
+        self.dataService.writeFocussedNormalization(runId, useLiteMode, version, key, name)
+
     ##### REDUCTION METHODS #####
 
     def exportReductionRecord(self, record: ReductionRecord):
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import validate_call
 
@@ -16,6 +16,7 @@ from snapred.backend.dao.RunConfig import RunConfig
 from snapred.backend.dao.StateConfig import StateConfig
 from snapred.backend.data.GroceryService import GroceryService
 from snapred.backend.data.LocalDataService import LocalDataService
+from snapred.backend.data.ReducedSpectraReader import ReducedSpectra
 from snapred.meta.decorators.Singleton import Singleton
 from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceName
 
@@ -54,6 +55,9 @@ class DataFactoryService:
     def constructStateId(self, runId: str):
         return self.lookupService.generateStateId(runId)
 
+    def constructStateIds(self, runIds: List[str]):
+        return self.lookupService.generateStateIds(runIds)
+
     def stateExists(self, runId: str):
         return self.lookupService.stateExists(runId)
 
@@ -75,6 +79,9 @@ class DataFactoryService:
     def getDefaultInstrumentState(self, runId: str):
         return self.lookupService.generateInstrumentStateFromRoot(runId)
 
+    def getCachedPixelGroup(self, stateId: str, useLiteMode: bool, key: str):
+        return self.lookupService.readPixelGroup(stateId, useLiteMode, key)
+
     ##### CALIBRATION METHODS #####
 
     def calibrationExists(self, runId: str, useLiteMode: bool):
@@ -172,6 +179,12 @@ class DataFactoryService:
     def getThisOrLatestNormalizationVersion(self, runId: str, useLiteMode: bool, version: Optional[int] = None):
         return self.lookupService.normalizationIndexer(runId, useLiteMode).thisOrLatestApplicableVersion(runId, version)
 
+    def getFocussedNormalization(self, runId: str, useLiteMode: bool, version: int, key: str, name: str) -> bool:
+        """
+        Load a cached focussed normalization into the named workspace: returns False if there is none.
+        """
+        return self.lookupService.readFocussedNormalization(runId, useLiteMode, version, key, name)
+
     ##### REDUCTION METHODS #####
 
     @validate_call
@@ -205,6 +218,18 @@ class DataFactoryService:
     def getReductionData(self, runId: str, useLiteMode: bool, version: int) -> ReductionRecord:
         return self.lookupService.readReductionData(runId, useLiteMode, version)
 
+    @validate_call
+    def getReducedSpectra(
+        self,
+        runId: str,
+        useLiteMode: bool,
+        timestamp: float,
+        groupings: Optional[List[str]] = None,
+        spectra: Optional[List[int]] = None,
+        xRange: Optional[Tuple[float, float]] = None,
+    ) -> Dict[str, ReducedSpectra]:
+        return self.lookupService.readReducedSpectra(runId, useLiteMode, timestamp, groupings, spectra, xRange)
+
     @validate_call
     def getCompatibleReductionMasks(self, runNumber: str, useLiteMode: bool) -> List[WorkspaceName]:
         # Assemble a list of masks, both resident and otherwise, that are compatible with the current reduction
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import h5py
+
+from snapred.backend.dao.state.DetectorState import DetectorState
+from snapred.backend.log.logger import snapredLogger
+
+logger = snapredLogger.getLogger(__name__)
+
+
+"""
+    Support for reading the `DetectorState` of a run without repeatedly opening its NeXus file:
+
+    * `PVFileHandlePool` keeps a bounded number of run NeXus files open for reading.
+    Only the HDF5 superblock is read when a file is opened, and only the requested PV-log datasets
+    are read from it afterwards.  A handle is reopened if its file has been modified since it was opened;
+
+    * `DetectorStateCache` is a persistent run-file -> `DetectorState` table, stored as JSON lines.
+    Each entry is keyed by the NeXus file path, and is only valid while that file's modification time and size
+    are unchanged.  Entries are appended: the last entry for any path supersedes any earlier ones.
+    When the table is loaded, any superseded or invalid entries are removed, so that it remains bounded
+    by the number of run files.
+"""
+
+
+# the identity of a file's contents: (modification time in ns, size in bytes)
+FileSignature = Tuple[int, int]
+
+
+def fileSignature(path: Path) -> Optional[FileSignature]:
+    try:
+        stat_ = os.stat(path)
+    except OSError:
+        return None
+    return stat_.st_mtime_ns, stat_.st_size
+
+
+class PVFileHandlePool:
+    def __init__(self, maxSize: int):
+        if maxSize < 1:
+            raise ValueError(f"PV-file handle pool size must be at least one, not {maxSize}")
+        self.maxSize = maxSize
+        self._handles: OrderedDict[str, Tuple[h5py.File, FileSignature]] = OrderedDict()
+
+        # Hold `lock` while reading from a handle:
+        #   otherwise, another thread may close it when it is evicted.
+        self.lock = threading.RLock()
+
+    def get(self, path: Path) -> h5py.File:
+        """
+        Get an open read-only handle to the file at `path`,
+        opening it, and closing the least-recently used handle if the pool is full, as required.
+        """
+        key = str(path)
+        signature = fileSignature(path)
+        if signature is None:
+            raise FileNotFoundError(f"PVFile '{path}' does not exist")
+
+        with self.lock:
+            entry = self._handles.pop(key, None)
+            if entry is not None:
+                handle, signature_ = entry
+                if signature_ == signature and handle.id.valid:
+                    self._handles[key] = entry
+                    return handle
+                # the file has changed since it was opened
+                self._close(handle)
+
+            handle = h5py.File(path, "r")
+            self._handles[key] = (handle, signature)
+            while len(self._handles) > self.maxSize:
+                _, (evicted, _) = self._handles.popitem(last=False)
+                self._close(evicted)
+            return handle
+
+    def close(self):
+        with self.lock:
+            while self._handles:
+                _, (handle, _) = self._handles.popitem(last=False)
+                self._close(handle)
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __contains__(self, path: Path) -> bool:
+        return str(path) in self._handles
+
+    @staticmethod
+    def _close(handle: h5py.File):
+        try:
+            handle.close()
+        except Exception as e:  # noqa: BLE001
+            logger.debug(f"while closing PV file: {e}")
+
+
+class DetectorStateCache:
+    def __init__(self, filePath: Path):
+        self.filePath = Path(filePath)
+        self._entries: Optional[Dict[str, Tuple[FileSignature, DetectorState]]] = None
+        self._lock = threading.RLock()
+
+    def lookup(self, path: Path) -> Optional[DetectorState]:
+        """
+        Get the cached `DetectorState` for the NeXus file at `path`:
+        returns `None` if there is no entry, or if the file has changed since its entry was written.
+        """
+        signature = fileSignature(path)
+        if signature is None:
+            return None
+        with self._lock:
+            entry = self._load().get(str(path))
+        if entry is None or entry[0] != signature:
+            return None
+        return entry[1].model_copy(deep=True)
+
+    def store(self, path: Path, detectorState: DetectorState):
+        signature = fileSignature(path)
+        if signature is None:
+            return
+        line = self._line(str(path), signature, detectorState)
+        with self._lock:
+            self._load()[str(path)] = (signature, detectorState.model_copy(deep=True))
+            try:
+                self.filePath.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.filePath, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                # the in-memory entry is still usable
+                logger.warning(f"Unable to write detector-state cache '{self.filePath}': {e}")
+
+    def clear(self):
+        """
+        Forget the cached entries (the cache file is reread on the next lookup).
+        """
+        with self._lock:
+            self._entries = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    @staticmethod
+    def _line(path: str, signature: FileSignature, detectorState: DetectorState) -> str:
+        return json.dumps(
+            {
+                "path": path,
+                "mtime": signature[0],
+                "size": signature[1],
+                "detectorState": detectorState.model_dump(),
+            }
+        )
+
+    def _compact(self, entries: Dict[str, Tuple[FileSignature, DetectorState]]):
+        # rewrite only the latest entry for each path: write, then rename, so that a reader never sees a partial file
+        tmpPath = self.filePath.with_name(f".{self.filePath.name}.{os.getpid()}")
+        try:
+            with open(tmpPath, "w") as f:
+                for path, (signature, detectorState) in entries.items():
+                    f.write(self._line(path, signature, detectorState) + "\n")
+            os.replace(tmpPath, self.filePath)
+        except OSError as e:
+            logger.warning(f"Unable to compact detector-state cache '{self.filePath}': {e}")
+            tmpPath.unlink(missing_ok=True)
+
+    def _load(self) -> Dict[str, Tuple[FileSignature, DetectorState]]:
+        if self._entries is not None:
+            return self._entries
+
+        entries = {}
+        lineCount = 0
+        if self.filePath.exists():
+            with open(self.filePath, "r") as f:
+                for lineNumber, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    lineCount += 1
+                    try:
+                        entry = json.loads(line)
+                        entries[entry["path"]] = (
+                            (int(entry["mtime"]), int(entry["size"])),
+                            DetectorState.model_validate(entry["detectorState"]),
+                        )
+                    except (ValueError, TypeError, KeyError) as e:
+                        # e.g. a partially-written line: the run will simply be read again from its file
+                        logger.warning(f"Skipping invalid entry at line {lineNumber} of '{self.filePath}': {e}")
+        if lineCount > len(entries):
+            self._compact(entries)
+        self._entries = entries
+        return self._entries
@@ -1,6 +1,7 @@
 # ruff: noqa: F811
 import json
 import os
+from collections import OrderedDict
 from collections.abc import Iterable
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -70,6 +71,17 @@ class GroceryService:
         self._loadedGroupings: Dict[Tuple[str, str, bool], str] = {}
         self._loadedInstruments: Dict[Tuple[str, bool], str] = {}
 
+        # Access order of the cached workspaces, least-recently used first:
+        #   maps (<cache name>, <cache key>) to the workspace name.
+        self._cacheAccessOrder: OrderedDict[Tuple[str, Tuple[Any, ...]], WorkspaceName] = OrderedDict()
+        self._cacheStats: Dict[str, int] = self._emptyCacheStatistics()
+
+        # Counts of the read leases on raw neutron-data workspaces: see `leaseNeutronData`
+        self._neutronLeases: Dict[WorkspaceName, int] = {}
+
+        # Counts of the leases protecting any other workspaces from eviction: see `leaseWorkspaces`
+        self._workspaceLeases: Dict[WorkspaceName, int] = {}
+
         self.grocer = FetchGroceriesRecipe()
         self.mantidSnapper = MantidSnapper(None, "Utensils")
 
@@ -100,6 +112,9 @@ class GroceryService:
         """
         for loadedRun in self._loadedRuns.copy():
             self._updateNeutronCacheFromADS(*loadedRun)
+        for workspace in list(self._neutronLeases):
+            if not self.workspaceDoesExist(workspace):
+                del self._neutronLeases[workspace]
 
     def rebuildGroupingCache(self):
         """
@@ -132,6 +147,128 @@ class GroceryService:
 
         return list(cachedWorkspaces)
 
+    ## CACHE BUDGET METHODS
+    """
+    The cached workspaces are retained in the ADS until they are evicted, least-recently-used first,
+    whenever their total memory exceeds the budget set by "groceryservice.cache.memoryBudget".
+    """
+
+    @staticmethod
+    def _emptyCacheStatistics() -> Dict[str, int]:
+        return {"hits": 0, "misses": 0, "evictions": 0, "evictedBytes": 0}
+
+    def _cacheMap(self, cacheName: str) -> Dict[Tuple[Any, ...], Any]:
+        return {
+            "run": self._loadedRuns,
+            "grouping": self._loadedGroupings,
+            "instrument": self._loadedInstruments,
+        }[cacheName]
+
+    def _touchCache(
+        self, cacheName: str, key: Tuple[Any, ...], workspace: WorkspaceName, hit: bool, count: bool = True
+    ):
+        """
+        Record an access to a cached workspace, marking it as most-recently used.
+
+        :param cacheName: one of "run", "grouping", or "instrument"
+        :type cacheName: str
+        :param key: the key of the workspace in its cache map
+        :type key: Tuple[Any, ...]
+        :param workspace: the name of the cached workspace
+        :type workspace: WorkspaceName
+        :param hit: whether the workspace was already cached
+        :type hit: bool
+        :param count: whether to count the access in the cache statistics: only one access is counted per fetch
+        :type count: bool
+        """
+        if count:
+            self._cacheStats["hits" if hit else "misses"] += 1
+        entry = (cacheName, key)
+        self._cacheAccessOrder[entry] = workspace
+        self._cacheAccessOrder.move_to_end(entry)
+
+    def _workspaceMemorySize(self, name: WorkspaceName) -> int:
+        if not self.workspaceDoesExist(name):
+            return 0
+        ws = mtd[name]
+        if ws.isGroup():
+            return sum(self._workspaceMemorySize(member) for member in ws.getNames())
+        return ws.getMemorySize()
+
+    def _hasLiveCopies(self, runNumber: str, useLiteMode: bool) -> bool:
+        if self._createRawNeutronWorkspaceName(runNumber, useLiteMode) in self._neutronLeases:
+            return True
+        numCopies = self._loadedRuns.get(self._key(runNumber, useLiteMode)) or 0
+        return any(
+            self.workspaceDoesExist(self._createCopyNeutronWorkspaceName(runNumber, useLiteMode, n))
+            for n in range(1, numCopies + 1)
+        )
+
+    def _isEvictable(self, cacheName: str, key: Tuple[Any, ...], workspace: WorkspaceName) -> bool:
+        if workspace in self._workspaceLeases:
+            return False
+        if cacheName == "run":
+            return not self._hasLiveCopies(*key)
+        return True
+
+    def _enforceCacheBudget(self, exclude: Optional[List[WorkspaceName]] = None):
+        """
+        Evict least-recently-used cached workspaces until the cache fits within its memory budget.
+        Raw neutron data having live copies, leased workspaces, and any excluded workspaces, are never evicted.
+
+        :param exclude: workspaces to retain, regardless of the budget
+        :type exclude: Optional[List[WorkspaceName]]
+        """
+        exclude = exclude or []
+        budget = int(Config["groceryservice.cache.memoryBudget"] * 1024**3)
+        if budget <= 0:
+            return
+
+        # forget any entries which are no longer cached
+        for entry, workspace in list(self._cacheAccessOrder.items()):
+            if self._cacheMap(entry[0]).get(entry[1]) is None or not self.workspaceDoesExist(workspace):
+                del self._cacheAccessOrder[entry]
+
+        cachedWorkspaces = set(self._cacheAccessOrder.values())
+        totalSize = sum(self._workspaceMemorySize(ws) for ws in cachedWorkspaces)
+        for (cacheName, key), workspace in list(self._cacheAccessOrder.items()):
+            if totalSize <= budget:
+                break
+            if workspace in exclude or not self._isEvictable(cacheName, key, workspace):
+                continue
+            del self._cacheMap(cacheName)[key]
+            del self._cacheAccessOrder[(cacheName, key)]
+            self._cacheStats["evictions"] += 1
+            # an instrument donor may also be a cached raw neutron-data workspace
+            if workspace not in self._cacheAccessOrder.values():
+                size = self._workspaceMemorySize(workspace)
+                self.deleteWorkspaceUnconditional(workspace)
+                self._cacheStats["evictedBytes"] += size
+                totalSize -= size
+                logger.debug(f"Evicted cached workspace {workspace} ({size} bytes)")
+
+        if totalSize > budget:
+            logger.warning(
+                f"Cached workspaces occupy {totalSize} bytes, exceeding the budget of {budget} bytes: "
+                "the remaining entries are in use."
+            )
+
+    def getCacheStatistics(self) -> Dict[str, int]:
+        """
+        :return: the cache counters, together with the number and the total size in bytes of the cached workspaces
+        :rtype: Dict[str, int]
+        """
+        cachedWorkspaces = self.getCachedWorkspaces()
+        return {
+            **self._cacheStats,
+            "cachedWorkspaces": len(cachedWorkspaces),
+            "cachedBytes": sum(self._workspaceMemorySize(ws) for ws in cachedWorkspaces),
+            "budgetBytes": int(Config["groceryservice.cache.memoryBudget"] * 1024**3),
+        }
+
+    def resetCacheStatistics(self):
+        self._cacheStats = self._emptyCacheStatistics()
+
     def _updateNeutronCacheFromADS(self, runNumber: str, useLiteMode: bool):
         """
         If the workspace has been loaded, but is not represented in the cache
@@ -568,6 +705,10 @@ class GroceryService:
                     detectorState: DetectorState = self._getDetectorState(runNumber)
                     self.updateInstrumentParameters(wsName, detectorState)
             self._loadedInstruments[key] = wsName
+            self._touchCache("instrument", key, wsName, hit=False)
+            self._enforceCacheBudget(exclude=[wsName])
+        else:
+            self._touchCache("instrument", key, wsName, hit=True)
         return wsName
 
     def updateInstrumentParameters(self, wsName: WorkspaceName, detectorState: DetectorState):
@@ -752,7 +893,9 @@ class GroceryService:
 
         # check if a raw workspace exists, and clone it if so
         if self._loadedRuns.get(self._key(runNumber, useLiteMode)) is not None:
-            self.getCloneOfWorkspace(self._createRawNeutronWorkspaceName(runNumber, useLiteMode), workspaceName)
+            rawWorkspaceName = self._createRawNeutronWorkspaceName(runNumber, useLiteMode)
+            self._touchCache("run", self._key(runNumber, useLiteMode), rawWorkspaceName, hit=True)
+            self.getCloneOfWorkspace(rawWorkspaceName, workspaceName)
             data = {
                 "result": True,
                 "loader": "cached",
@@ -783,6 +926,114 @@ class GroceryService:
             - "loader": the loader that was used by the algorithm, use it next time
             - "workspace": the name of the workspace created in the ADS
 
+        :rtype: Dict[str, Any]
+        """
+        data = self._loadRawNeutronData(runNumber, useLiteMode, loader)
+        rawWorkspaceName = data["workspace"]
+        key = self._key(runNumber, useLiteMode)
+
+        # create a copy of the raw data for use
+        workspaceName = self._createCopyNeutronWorkspaceName(runNumber, useLiteMode, self._loadedRuns[key] + 1)
+        data["result"] = self.getCloneOfWorkspace(rawWorkspaceName, workspaceName) is not None
+        data["workspace"] = workspaceName
+        self._loadedRuns[key] += 1
+
+        return data
+
+    def leaseNeutronData(self, runNumber: str, useLiteMode: bool, loader: str = "") -> Dict[str, Any]:
+        """
+        Fetch a nexus data file for read-only use, using the same cache as `fetchNeutronDataCached`.
+        Rather than a copy, the cached raw workspace itself is handed out, under a read lease:
+        the consumer must not modify it, and must release the lease using `releaseNeutronData`.
+        A consumer which does need to modify the workspace may obtain its own copy using `mutableNeutronData`.
+
+        :param runNumber: the neutron data run number
+        :type runNumber: str
+        :param useLiteMode: whether to reduce to the instrument's Lite mode
+        :type useLiteMode: bool
+        :param loader: the loader algorithm to use to load the data, optional
+        :type loader: str
+        :return: a dictionary with the following keys
+
+            - "result": true if everything ran correctly
+            - "loader": the loader that was used by the algorithm, use it next time
+            - "workspace": the name of the leased raw workspace in the ADS
+
+        :rtype: Dict[str, Any]
+        """
+        data = self._loadRawNeutronData(runNumber, useLiteMode, loader)
+        rawWorkspaceName = data["workspace"]
+        data["result"] = self.workspaceDoesExist(rawWorkspaceName)
+        self._neutronLeases[rawWorkspaceName] = self._neutronLeases.get(rawWorkspaceName, 0) + 1
+        return data
+
+    def releaseNeutronData(self, workspace: WorkspaceName):
+        """
+        Release a read lease obtained from `leaseNeutronData`.
+        Workspaces which are not leased are ignored.
+
+        :param workspace: the name of the leased workspace
+        :type workspace: WorkspaceName
+        """
+        numLeases = self._neutronLeases.get(workspace, 0)
+        if numLeases > 1:
+            self._neutronLeases[workspace] = numLeases - 1
+        else:
+            self._neutronLeases.pop(workspace, None)
+
+    def leaseWorkspaces(self, workspaces: Iterable[WorkspaceName]):
+        """
+        Protect cached workspaces, e.g. grouping workspaces, from eviction while they are in use.
+        Each lease must be released using `releaseWorkspaces`.
+
+        :param workspaces: the names of the workspaces to lease
+        :type workspaces: Iterable[WorkspaceName]
+        """
+        for workspace in workspaces:
+            self._workspaceLeases[workspace] = self._workspaceLeases.get(workspace, 0) + 1
+
+    def releaseWorkspaces(self, workspaces: Iterable[WorkspaceName]):
+        """
+        Release leases obtained from `leaseWorkspaces`.
+        Workspaces which are not leased are ignored.
+
+        :param workspaces: the names of the leased workspaces
+        :type workspaces: Iterable[WorkspaceName]
+        """
+        for workspace in workspaces:
+            numLeases = self._workspaceLeases.get(workspace, 0)
+            if numLeases > 1:
+                self._workspaceLeases[workspace] = numLeases - 1
+            else:
+                self._workspaceLeases.pop(workspace, None)
+
+    def mutableNeutronData(self, workspace: WorkspaceName) -> WorkspaceName:
+        """
+        Copy-on-write for leased neutron data: exchange a read lease for a copy which may be modified.
+        Workspaces which are not leased are already owned by the consumer, and are returned as is.
+
+        :param workspace: the name of a workspace obtained from `leaseNeutronData`
+        :type workspace: WorkspaceName
+        :return: the name of a workspace which the consumer may modify
+        :rtype: WorkspaceName
+        """
+        if workspace not in self._neutronLeases:
+            return workspace
+        runNumber, useLiteMode = next(
+            key for key in self._loadedRuns if self._createRawNeutronWorkspaceName(*key) == workspace
+        )
+        key = self._key(runNumber, useLiteMode)
+        workspaceName = self._createCopyNeutronWorkspaceName(runNumber, useLiteMode, self._loadedRuns[key] + 1)
+        self.getCloneOfWorkspace(workspace, workspaceName)
+        self._loadedRuns[key] += 1
+        self.releaseNeutronData(workspace)
+        return workspaceName
+
+    def _loadRawNeutronData(self, runNumber: str, useLiteMode: bool, loader: str = "") -> Dict[str, Any]:
+        """
+        Ensure that the raw workspace for a nexus data file is loaded and cached.
+
+        :return: a dictionary with keys "loader" and "workspace", the name of the cached raw workspace
         :rtype: Dict[str, Any]
         """
         key = self._key(runNumber, useLiteMode)
@@ -790,35 +1041,39 @@ class GroceryService:
         filename: str = self._createNeutronFilename(runNumber, useLiteMode)
 
         loadedFromNative: bool = False
+        loadedFromDisk: bool = False
+        nativeRawWorkspaceName: WorkspaceName = self._createRawNeutronWorkspaceName(runNumber, False)
 
         self._updateNeutronCacheFromADS(runNumber, useLiteMode)
 
-        # if the raw data has already been loaded, clone it
+        # if the raw data has already been loaded, reuse it
         if self._loadedRuns.get(key) is not None:
             data = {"loader": "cached"}
         # if the data is not cached, but the file exists
         elif os.path.isfile(filename):
             data = self.grocer.executeRecipe(filename, rawWorkspaceName, loader)
             self._loadedRuns[key] = 0
+            loadedFromDisk = True
         # if the file does not exist, and this is native resolution data, this represents an error condition
         elif useLiteMode is False:
             raise RuntimeError(f"Could not load run {runNumber} from file {filename}")
         # if in Lite mode, and no raw workspace and no file exists, look if native data has been loaded from cache
         # if so, then clone the native data and reduce it
         elif self._loadedRuns.get(self._key(runNumber, False)) is not None:
-            nativeRawWorkspaceName = self._createRawNeutronWorkspaceName(runNumber, False)
             data = {"loader": "cached"}
+            # the native data is only marked as used: the fetch itself is counted as a miss, below
+            self._touchCache("run", self._key(runNumber, False), nativeRawWorkspaceName, hit=True, count=False)
             loadedFromNative = True
         # neither lite nor native data in cache and lite file does not exist
         # then load native data, clone it, and reduce it
         elif os.path.isfile(self._createNeutronFilename(runNumber, False)):
             # load the native resolution data
             goingNative = (runNumber, False)
-            nativeRawWorkspaceName = self._createRawNeutronWorkspaceName(*goingNative)
             nativeFilename = self._createNeutronFilename(*goingNative)
             data = self.grocer.executeRecipe(nativeFilename, nativeRawWorkspaceName, loader="")
             # keep track of the loaded raw native data
             self._loadedRuns[self._key(*goingNative)] = 0
+            self._touchCache("run", self._key(*goingNative), nativeRawWorkspaceName, hit=False, count=False)
             loadedFromNative = True
         # the data cannot be loaded -- this is an error condition
         else:
@@ -831,12 +1086,11 @@ class GroceryService:
             self._loadedRuns[key] = 0
             self.convertToLiteMode(rawWorkspaceName)
 
-        # create a copy of the raw data for use
-        workspaceName = self._createCopyNeutronWorkspaceName(runNumber, useLiteMode, self._loadedRuns[key] + 1)
-        data["result"] = self.getCloneOfWorkspace(rawWorkspaceName, workspaceName) is not None
-        data["workspace"] = workspaceName
-        self._loadedRuns[key] += 1
+        self._touchCache("run", key, rawWorkspaceName, hit=not (loadedFromDisk or loadedFromNative))
+        if loadedFromDisk or loadedFromNative:
+            self._enforceCacheBudget(exclude=[rawWorkspaceName, nativeRawWorkspaceName])
 
+        data["workspace"] = rawWorkspaceName
         return data
 
     def fetchLiteDataMap(self) -> WorkspaceName:
@@ -876,6 +1130,7 @@ class GroceryService:
                 "loader": "cached",
                 "workspace": workspaceName,
             }
+            self._touchCache("grouping", key, workspaceName, hit=True)
         else:
             filename = self._createGroupingFilename(item.runNumber, item.groupingScheme, item.useLiteMode)
             groupingLoader = "LoadGroupingDefinition"
@@ -894,6 +1149,8 @@ class GroceryService:
                 instrumentSource=instrumentSource,
             )
             self._loadedGroupings[key] = data["workspace"]
+            self._touchCache("grouping", key, data["workspace"], hit=False)
+            self._enforceCacheBudget(exclude=[data["workspace"]])
 
         return data
 
@@ -1094,96 +1351,105 @@ class GroceryService:
         :rtype: List[WorkspaceName]
         """
         groceries = []
-        for item in groceryList:
-            match item.workspaceType:
-                # for neutron data stored in a nexus file
-                case "neutron":
-                    if item.keepItClean:
-                        res = self.fetchNeutronDataCached(item.runNumber, item.useLiteMode, item.loader)
-                    else:
-                        res = self.fetchNeutronDataSingleUse(item.runNumber, item.useLiteMode, item.loader)
-                # for grouping definitions
-                case "grouping":
-                    res = self.fetchGroupingDefinition(item)
-                case "diffcal":
-                    res = {"result": False, "workspace": self._createDiffcalInputWorkspaceName(item.runNumber)}
-                    raise RuntimeError(
-                        "not implemented: no path available to fetch diffcal "
-                        + f"input table workspace: '{res['workspace']}'"
-                    )
-                # for diffraction-calibration workspaces
-                case "diffcal_output":
-                    res = self.fetchWorkspace(
-                        self._createDiffcalOutputWorkspaceFilename(item),
-                        self._createDiffcalOutputWorkspaceName(item),
-                        loader="LoadNexus",
-                    )
-                case "diffcal_diagnostic":
-                    self.fetchWorkspace(
-                        self._createDiffcalDiagnosticWorkspaceFilename(item),
-                        self._createDiffcalOutputWorkspaceName(item),
-                        loader="LoadNexusProcessed",
-                    )
-                case "diffcal_table":
-                    indexer = self.dataService.calibrationIndexer(item.runNumber, item.useLiteMode)
-                    if not isinstance(item.version, int):
-                        item.version = indexer.latestApplicableVersion(item.runNumber)
-                    record = indexer.readRecord(item.version)
-                    if record is not None:
-                        item.runNumber = record.runNumber
-
-                    # NOTE: fetchCalibrationWorkspaces will set the workspace name
-                    # to that of the table workspace.  Because of possible confusion with
-                    # the behavior of the mask workspace, the workspace name is overridden here.
-
-                    tableWorkspaceName = self.lookupDiffcalTableWorkspaceName(
-                        item.runNumber, item.useLiteMode, item.version
-                    )
-                    res = self.fetchCalibrationWorkspaces(item)
-                    res["workspace"] = tableWorkspaceName
-                case "diffcal_mask":
-                    indexer = self.dataService.calibrationIndexer(item.runNumber, item.useLiteMode)
-                    if not isinstance(item.version, int):
-                        item.version = indexer.latestApplicableVersion(item.runNumber)
-                    record = indexer.readRecord(item.version)
-                    if record is not None:
-                        item.runNumber = record.runNumber
-
-                    # NOTE: fetchCalibrationWorkspaces will set the workspace name
-                    # to that of the table workspace, not the mask.  This name is
-                    # overridden here.
-                    maskWorkspaceName = self._createDiffcalMaskWorkspaceName(
-                        item.runNumber, item.useLiteMode, item.version
-                    )
-                    res = self.fetchCalibrationWorkspaces(item)
-                    res["workspace"] = maskWorkspaceName
-                case "normalization":
-                    indexer = self.dataService.normalizationIndexer(item.runNumber, item.useLiteMode)
-                    if not isinstance(item.version, int):
-                        logger.info(f"Version not detected for run {item.runNumber}, fetching from index.")
-                        item.version = indexer.latestApplicableVersion(item.runNumber)
+        try:
+            for item in groceryList:
+                match item.workspaceType:
+                    # for neutron data stored in a nexus file
+                    case "neutron":
+                        if item.keepItClean and item.readOnly:
+                            res = self.leaseNeutronData(item.runNumber, item.useLiteMode, item.loader)
+                        elif item.keepItClean:
+                            res = self.fetchNeutronDataCached(item.runNumber, item.useLiteMode, item.loader)
+                        else:
+                            res = self.fetchNeutronDataSingleUse(item.runNumber, item.useLiteMode, item.loader)
+                    # for grouping definitions
+                    case "grouping":
+                        res = self.fetchGroupingDefinition(item)
+                    case "diffcal":
+                        res = {"result": False, "workspace": self._createDiffcalInputWorkspaceName(item.runNumber)}
+                        raise RuntimeError(
+                            "not implemented: no path available to fetch diffcal "
+                            + f"input table workspace: '{res['workspace']}'"
+                        )
+                    # for diffraction-calibration workspaces
+                    case "diffcal_output":
+                        res = self.fetchWorkspace(
+                            self._createDiffcalOutputWorkspaceFilename(item),
+                            self._createDiffcalOutputWorkspaceName(item),
+                            loader="LoadNexus",
+                        )
+                    case "diffcal_diagnostic":
+                        self.fetchWorkspace(
+                            self._createDiffcalDiagnosticWorkspaceFilename(item),
+                            self._createDiffcalOutputWorkspaceName(item),
+                            loader="LoadNexusProcessed",
+                        )
+                    case "diffcal_table":
+                        indexer = self.dataService.calibrationIndexer(item.runNumber, item.useLiteMode)
                         if not isinstance(item.version, int):
-                            raise RuntimeError(
-                                f"Could not find any Normalizations associated with run {item.runNumber}"
-                            )
-                        logger.info(f"Found version {item.version} for run {item.runNumber}")
-                    record = indexer.readRecord(item.version)
-                    if record is not None:
-                        item.runNumber = record.runNumber
-                    logger.info(f"Fetching normalization workspace for run {item.runNumber}, version {item.version}")
-                    res = self.fetchNormalizationWorkspace(item)
-                case "reduction_pixel_mask":
-                    maskWorkspaceName = self._createReductionPixelMaskWorkspaceName(  # noqa: F841
-                        item.runNumber, item.useLiteMode, item.timestamp
-                    )
-                    res = self.fetchReductionPixelMask(item)
-                case _:
-                    raise RuntimeError(f"unrecognized 'workspaceType': '{item.workspaceType}'")
-            # check that the fetch operation succeeded and if so append the workspace
-            if res["result"] is True:
-                groceries.append(res["workspace"])
-            else:
-                raise RuntimeError(f"Error fetching item {item.model_dump_json(indent=2)}")
+                            item.version = indexer.latestApplicableVersion(item.runNumber)
+                        record = indexer.readRecord(item.version)
+                        if record is not None:
+                            item.runNumber = record.runNumber
+
+                        # NOTE: fetchCalibrationWorkspaces will set the workspace name
+                        # to that of the table workspace.  Because of possible confusion with
+                        # the behavior of the mask workspace, the workspace name is overridden here.
+
+                        tableWorkspaceName = self.lookupDiffcalTableWorkspaceName(
+                            item.runNumber, item.useLiteMode, item.version
+                        )
+                        res = self.fetchCalibrationWorkspaces(item)
+                        res["workspace"] = tableWorkspaceName
+                    case "diffcal_mask":
+                        indexer = self.dataService.calibrationIndexer(item.runNumber, item.useLiteMode)
+                        if not isinstance(item.version, int):
+                            item.version = indexer.latestApplicableVersion(item.runNumber)
+                        record = indexer.readRecord(item.version)
+                        if record is not None:
+                            item.runNumber = record.runNumber
+
+                        # NOTE: fetchCalibrationWorkspaces will set the workspace name
+                        # to that of the table workspace, not the mask.  This name is
+                        # overridden here.
+                        maskWorkspaceName = self._createDiffcalMaskWorkspaceName(
+                            item.runNumber, item.useLiteMode, item.version
+                        )
+                        res = self.fetchCalibrationWorkspaces(item)
+                        res["workspace"] = maskWorkspaceName
+                    case "normalization":
+                        indexer = self.dataService.normalizationIndexer(item.runNumber, item.useLiteMode)
+                        if not isinstance(item.version, int):
+                            logger.info(f"Version not detected for run {item.runNumber}, fetching from index.")
+                            item.version = indexer.latestApplicableVersion(item.runNumber)
+                            if not isinstance(item.version, int):
+                                raise RuntimeError(
+                                    f"Could not find any Normalizations associated with run {item.runNumber}"
+                                )
+                            logger.info(f"Found version {item.version} for run {item.runNumber}")
+                        record = indexer.readRecord(item.version)
+                        if record is not None:
+                            item.runNumber = record.runNumber
+                        logger.info(
+                            f"Fetching normalization workspace for run {item.runNumber}, version {item.version}"
+                        )
+                        res = self.fetchNormalizationWorkspace(item)
+                    case "reduction_pixel_mask":
+                        maskWorkspaceName = self._createReductionPixelMaskWorkspaceName(  # noqa: F841
+                            item.runNumber, item.useLiteMode, item.timestamp
+                        )
+                        res = self.fetchReductionPixelMask(item)
+                    case _:
+                        raise RuntimeError(f"unrecognized 'workspaceType': '{item.workspaceType}'")
+                # check that the fetch operation succeeded and if so append the workspace
+                if res["result"] is True:
+                    groceries.append(res["workspace"])
+                    # the workspaces already fetched are not evicted by the rest of this fetch
+                    self.leaseWorkspaces([res["workspace"]])
+                else:
+                    raise RuntimeError(f"Error fetching item {item.model_dump_json(indent=2)}")
+        finally:
+            self.releaseWorkspaces(groceries)
         return groceries
 
     def fetchGroceryDict(self, groceryDict: Dict[str, GroceryListItem], **kwargs) -> Dict[str, WorkspaceName]:
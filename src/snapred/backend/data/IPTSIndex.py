@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from snapred.backend.log.logger import snapredLogger
+
+logger = snapredLogger.getLogger(__name__)
+
+
+"""
+    An index of the `IPTS-*` directories under the instrument home, by the range of run numbers
+    of the NeXus files in each one's nexus directory:
+
+    * A run is looked up by bisecting the ranges sorted by their first run number.
+    Since the ranges of different IPTS may overlap, the candidate ranges are confirmed
+    by the existence of the run's NeXus file;
+
+    * On a miss, the index is refreshed incrementally: only IPTS directories whose nexus directory
+    has been modified since it was last scanned are listed again.  A run which is still not found
+    is remembered for `missTTL` seconds, during which its lookups do not refresh the index again;
+
+    * The index is persisted as JSON, so that it does not need to be rebuilt in each session.
+"""
+
+
+class IPTSIndex:
+    def __init__(
+        self,
+        instrumentHome: Path,
+        nexusDirectory: str,
+        filePrefix: str,
+        fileExtension: str,
+        indexPath: Path,
+        missTTL: float = 0.0,
+    ):
+        self.instrumentHome = Path(instrumentHome)
+        self.nexusDirectory = nexusDirectory
+        self.filePrefix = filePrefix
+        self.fileExtension = fileExtension
+        self.indexPath = Path(indexPath)
+        self.missTTL = missTTL
+        self._filePattern = re.compile(rf"^{re.escape(filePrefix)}(\d+){re.escape(fileExtension)}$")
+
+        # <IPTS directory name>: (<nexus-directory mtime in ns>, <first run>, <last run>)
+        #   the run range of a directory without any runs is `None`
+        self._entries: Optional[Dict[str, Tuple[int, Optional[int], Optional[int]]]] = None
+
+        # the run ranges, sorted by first run:
+        #   `_maxLasts[i]` is the maximum last run of `_ranges[0:i + 1]`
+        self._ranges: List[Tuple[int, int, str]] = []
+        self._firsts: List[int] = []
+        self._maxLasts: List[int] = []
+
+        # <run>: the time, from `time.monotonic`, of the last refresh not finding it
+        self._misses: Dict[int, float] = {}
+
+        self._lock = threading.RLock()
+
+    def lookup(self, runNumber: str) -> Optional[str]:
+        """
+        Find the IPTS directory containing a run: returns `None` if it is not found.
+        The directory is formatted as by Mantid's `GetIPTS`, with a trailing separator.
+        """
+        try:
+            run = int(runNumber)
+        except ValueError:
+            return None
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            ipts = self._find(run)
+            if ipts is None and not self._isRecentMiss(run):
+                if self.refresh():
+                    ipts = self._find(run)
+                if ipts is None:
+                    self._addMiss(run)
+        return str(self.instrumentHome / ipts) + os.sep if ipts is not None else None
+
+    def refresh(self) -> bool:
+        """
+        Rescan any new or modified IPTS directories, and forget any that have been removed.
+        The index is saved if it changed.
+        :return: whether the index changed
+        """
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            entries = dict(self._entries)
+            present = set()
+            try:
+                iptsDirs = [d for d in os.scandir(self.instrumentHome) if d.name.startswith("IPTS-") and d.is_dir()]
+            except OSError as e:
+                logger.warning(f"Unable to list IPTS directories in '{self.instrumentHome}': {e}")
+                return False
+            for iptsDir in iptsDirs:
+                present.add(iptsDir.name)
+                nexusPath = Path(iptsDir.path) / self.nexusDirectory
+                try:
+                    mtime = os.stat(nexusPath).st_mtime_ns
+                except OSError:
+                    entries.pop(iptsDir.name, None)
+                    continue
+                entry = entries.get(iptsDir.name)
+                if entry is not None and entry[0] == mtime:
+                    continue
+                entries[iptsDir.name] = (mtime, *self._scan(nexusPath))
+            for name in set(entries) - present:
+                del entries[name]
+
+            changed = entries != self._entries
+            if changed:
+                self._setEntries(entries)
+                self._save()
+            return changed
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return len(self._ranges)
+
+    def _isRecentMiss(self, run: int) -> bool:
+        missed = self._misses.get(run)
+        return missed is not None and time.monotonic() - missed < self.missTTL
+
+    def _addMiss(self, run: int):
+        if self.missTTL <= 0.0:
+            return
+        now = time.monotonic()
+        # forget any expired misses
+        self._misses = {run_: missed for run_, missed in self._misses.items() if now - missed < self.missTTL}
+        self._misses[run] = now
+
+    def _find(self, run: int) -> Optional[str]:
+        # the candidates are the ranges starting at or before the run,
+        #   excluding those that end before it
+        for n in range(bisect_right(self._firsts, run) - 1, -1, -1):
+            if self._maxLasts[n] < run:
+                break
+            first, last, ipts = self._ranges[n]
+            if last >= run and self._runPath(ipts, run).exists():
+                return ipts
+        return None
+
+    def _runPath(self, ipts: str, run: int) -> Path:
+        return self.instrumentHome / ipts / self.nexusDirectory / f"{self.filePrefix}{run}{self.fileExtension}"
+
+    def _scan(self, nexusPath: Path) -> Tuple[Optional[int], Optional[int]]:
+        runs = []
+        try:
+            for entry in os.scandir(nexusPath):
+                match = self._filePattern.match(entry.name)
+                if match is not None:
+                    runs.append(int(match.group(1)))
+        except OSError as e:
+            logger.warning(f"Unable to list '{nexusPath}': {e}")
+        return (min(runs), max(runs)) if runs else (None, None)
+
+    def _setEntries(self, entries: Dict[str, Tuple[int, Optional[int], Optional[int]]]):
+        self._entries = entries
+        self._ranges = sorted(
+            (first, last, ipts) for ipts, (_, first, last) in entries.items() if first is not None
+        )
+        self._firsts = [first for first, _, _ in self._ranges]
+        self._maxLasts = []
+        maxLast = None
+        for _, last, _ in self._ranges:
+            maxLast = last if maxLast is None else max(maxLast, last)
+            self._maxLasts.append(maxLast)
+
+    def _load(self):
+        entries = {}
+        if self.indexPath.exists():
+            try:
+                with open(self.indexPath, "r") as f:
+                    index = json.load(f)
+                if index["instrumentHome"] == str(self.instrumentHome):
+                    entries = {
+                        ipts: (int(mtime), first, last) for ipts, (mtime, first, last) in index["entries"].items()
+                    }
+            except (ValueError, TypeError, KeyError) as e:
+                # the index will be rebuilt
+                logger.warning(f"Ignoring invalid IPTS index '{self.indexPath}': {e}")
+                entries = {}
+        self._setEntries(entries)
+
+    def _save(self):
+        index = {
+            "instrumentHome": str(self.instrumentHome),
+            "entries": {ipts: list(entry) for ipts, entry in self._entries.items()},
+        }
+        try:
+            self.indexPath.parent.mkdir(parents=True, exist_ok=True)
+            # write, then rename: a concurrent reader never sees a partial index
+            tmpPath = self.indexPath.with_name(f".{self.indexPath.name}.{os.getpid()}")
+            with open(tmpPath, "w") as f:
+                json.dump(index, f)
+            os.replace(tmpPath, self.indexPath)
+        except OSError as e:
+            # the in-memory index is still usable
+            logger.warning(f"Unable to write IPTS index '{self.indexPath}': {e}")
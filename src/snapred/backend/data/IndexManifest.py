@@ -0,0 +1,132 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from snapred.backend.dao.indexing.IndexEntry import IndexEntry
+from snapred.backend.dao.indexing.Versioning import VERSION_DEFAULT
+
+"""
+    A compact summary of an index, used by the `Indexer` in manifest mode:
+    for each entry, only its version, its timestamp, and the range of run numbers it applies to are retained.
+
+    * The `appliesTo` expression of each entry is parsed once, to an inclusive range of run numbers
+    in which either end may be open;
+
+    * The latest applicable version for a run is found by bisection: the entries applying to all runs
+    _after_ a run number are sorted by that run number, with a running maximum of their timestamps,
+    and similarly for the entries applying to all runs _before_ a run number.
+"""
+
+# (<version>, <timestamp>, <first applicable run>, <last applicable run>):
+#   either of the run numbers may be `None`, for an open range
+ManifestEntry = Tuple[int, float, Optional[int], Optional[int]]
+
+# entries are ordered by timestamp, and then by their position in the index
+_SortKey = Tuple[float, int]
+
+
+class IndexManifest:
+    def __init__(self, entries: Iterable[ManifestEntry]):
+        self.entries: List[ManifestEntry] = [tuple(entry) for entry in entries]
+        self._build()
+
+    @classmethod
+    def fromIndex(cls, index: Iterable[IndexEntry]) -> "IndexManifest":
+        return cls(
+            (entry.version, entry.timestamp, *cls.appliesToRange(entry.appliesTo)) for entry in index
+        )
+
+    @staticmethod
+    def appliesToRange(appliesTo: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Convert an `appliesTo` expression to an inclusive range of run numbers.
+        An entry without an `appliesTo` expression applies to all runs.
+        """
+        if appliesTo is None:
+            return None, None
+        symbol, runNumber = IndexEntry.parseAppliesTo(appliesTo)
+        run = int(runNumber)
+        return {
+            ">=": (run, None),
+            ">": (run + 1, None),
+            "<=": (None, run),
+            "<": (None, run - 1),
+            "": (run, run),
+        }[symbol]
+
+    def versions(self) -> List[int]:
+        return [entry[0] for entry in self.entries]
+
+    def isApplicable(self, version: int, runNumber: str) -> bool:
+        run = int(runNumber)
+        first, last = self._ranges[version]
+        return (first is None or first <= run) and (last is None or run <= last)
+
+    def latestApplicableVersion(self, runNumber: str) -> Optional[int]:
+        """
+        The most recent version in time which applies to the run number:
+        the default version is only returned if no other version applies.
+        """
+        run = int(runNumber)
+        candidates: List[Tuple[_SortKey, int]] = []
+
+        # entries applying to all runs from their first run
+        n = bisect_right(self._afterRuns, run)
+        if n > 0:
+            candidates.append(self._afterLatest[n - 1])
+
+        # entries applying to all runs up to their last run
+        n = bisect_left(self._beforeRuns, run)
+        if n < len(self._beforeRuns):
+            candidates.append(self._beforeLatest[n])
+
+        if run in self._exact:
+            candidates.append(self._exact[run])
+        if self._unbounded is not None:
+            candidates.append(self._unbounded)
+        for first, last, candidate in self._bounded:
+            if first <= run <= last:
+                candidates.append(candidate)
+
+        if candidates:
+            return max(candidates)[1]
+        if VERSION_DEFAULT in self._ranges and self.isApplicable(VERSION_DEFAULT, runNumber):
+            return VERSION_DEFAULT
+        return None
+
+    def _build(self):
+        self._ranges: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        after: List[Tuple[int, Tuple[_SortKey, int]]] = []
+        before: List[Tuple[int, Tuple[_SortKey, int]]] = []
+        self._exact: Dict[int, Tuple[_SortKey, int]] = {}
+        self._unbounded: Optional[Tuple[_SortKey, int]] = None
+        self._bounded: List[Tuple[int, int, Tuple[_SortKey, int]]] = []
+
+        for position, (version, timestamp, first, last) in enumerate(self.entries):
+            self._ranges[version] = (first, last)
+            if version == VERSION_DEFAULT:
+                continue
+            candidate = ((timestamp, position), version)
+            if first is None and last is None:
+                self._unbounded = max(self._unbounded, candidate) if self._unbounded is not None else candidate
+            elif last is None:
+                after.append((first, candidate))
+            elif first is None:
+                before.append((last, candidate))
+            elif first == last:
+                self._exact[first] = max(self._exact.get(first, candidate), candidate)
+            else:
+                self._bounded.append((first, last, candidate))
+
+        # running maximum, from the lowest first run
+        after.sort()
+        self._afterRuns = [run for run, _ in after]
+        self._afterLatest = []
+        for _, candidate in after:
+            self._afterLatest.append(max(self._afterLatest[-1], candidate) if self._afterLatest else candidate)
+
+        # running maximum, from the highest last run
+        before.sort()
+        self._beforeRuns = [run for run, _ in before]
+        self._beforeLatest = [candidate for _, candidate in before]
+        for n in range(len(self._beforeLatest) - 2, -1, -1):
+            self._beforeLatest[n] = max(self._beforeLatest[n], self._beforeLatest[n + 1])
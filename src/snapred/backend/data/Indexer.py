@@ -1,7 +1,11 @@
+import functools
+import json
 import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from pydantic import validate_call
 
@@ -19,6 +23,7 @@ from snapred.backend.dao.indexing.Versioning import (
 from snapred.backend.dao.normalization.Normalization import Normalization
 from snapred.backend.dao.normalization.NormalizationRecord import NormalizationRecord
 from snapred.backend.dao.reduction.ReductionRecord import ReductionRecord
+from snapred.backend.data.IndexManifest import IndexManifest
 from snapred.backend.log.logger import snapredLogger
 from snapred.meta.Enum import StrEnum
 from snapred.meta.mantid.WorkspaceNameGenerator import ValueFormatter as wnvf
@@ -41,6 +46,12 @@ logger = snapredLogger.getLogger(__name__)
 
     The Indexer version list will only update when both a record and a corresponding inex entry
     have been written.
+
+    In manifest mode, the Indexer keeps a compact manifest of the index next to it
+    (see `IndexManifest`), which is valid as long as the index file is unchanged.
+    Version queries are answered from the manifest: the index entries themselves are only read
+    when they are required, and the index is only rewritten on destruction if it has been modified.
+    In this mode, index entries must only be modified through `addIndexEntry`.
 """
 
 
@@ -72,28 +83,72 @@ PARAMS_TYPE = {
 }
 
 
+def indexPath(directory: Path, indexerType: IndexerType) -> Path:
+    return Path(directory) / f"{indexerType}Index.json"
+
+
 class Indexer:
     rootDirectory: Path
-    index: Dict[int, IndexEntry]
 
     indexerType: IndexerType
+    useManifest: bool
 
     ## CONSTRUCTOR / DESTRUCTOR METHODS ##
 
     @validate_call
-    def __init__(self, *, indexerType: IndexerType, directory: Path | str) -> None:
+    def __init__(self, *, indexerType: IndexerType, directory: Path | str, useManifest: bool = False) -> None:
         self.indexerType = indexerType
         self.rootDirectory = Path(directory)
-        self.index = self.readIndex()
+        self.useManifest = useManifest
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reread the index and the version directories: e.g. after they have been modified by another process.
+        """
+        self._dirty = False
+        self._manifest = self.readManifest() if self.useManifest else None
+        # in manifest mode, the index is only read when its entries are required
+        self._index = self.readIndex() if self._manifest is None else None
+        manifestIsValid = self._manifest is not None
         self.dirVersions = self.readDirectoryList()
         self.reconcileIndexToFiles()
+        if self.useManifest and not manifestIsValid and self.rootDirectory.exists():
+            self.writeManifest()
 
     def __del__(self):
         # define the index to automatically write itself whenever the program closes
         if self.rootDirectory.exists():
+            if self.useManifest:
+                if self._dirty:
+                    self.writeIndex()
+                return
             self.reconcileIndexToFiles()
             self.writeIndex()
 
+    @property
+    def index(self) -> Dict[int, IndexEntry]:
+        if self._index is None:
+            self._index = self.readIndex()
+        return self._index
+
+    @index.setter
+    def index(self, index: Dict[int, IndexEntry]):
+        self._index = index
+        self._dirty = True
+        if self.useManifest:
+            self._manifest = None
+
+    def _getManifest(self) -> IndexManifest:
+        if self._manifest is None:
+            self._manifest = IndexManifest.fromIndex(self.index.values())
+        return self._manifest
+
+    def _indexVersions(self) -> List[int]:
+        if self.useManifest:
+            return self._getManifest().versions()
+        return list(self.index.keys())
+
     def readDirectoryList(self):
         # create the directory version list from the directory structure
         versions = set()
@@ -111,7 +166,7 @@ class Indexer:
 
     def reconcileIndexToFiles(self):
         self.dirVersions = self.readDirectoryList()
-        indexVersions = set(self.index.keys())
+        indexVersions = set(self._indexVersions())
 
         # if a directory has no entry in the index, warn
         missingEntries = self.dirVersions.difference(indexVersions)
@@ -134,12 +189,13 @@ class Indexer:
         # take the set of versions common to both
         commonVersions = self.dirVersions & indexVersions
         self.dirVersions = commonVersions
-        self.index = {version: self.index[version] for version in commonVersions}
+        if not self.useManifest or commonVersions != set(self._indexVersions()):
+            self.index = {version: self.index[version] for version in commonVersions}
 
     ## VERSION GETTERS ##
 
     def allVersions(self) -> List[int]:
-        return list(self.index.keys())
+        return self._indexVersions()
 
     def defaultVersion(self) -> int:
         """
@@ -152,7 +208,7 @@ class Indexer:
         The largest version found by the Indexer.
         """
         version = None
-        overlap = set.union(set(self.index.keys()), self.dirVersions)
+        overlap = set.union(set(self._indexVersions()), self.dirVersions)
         if len(overlap) == 0:
             version = None
         elif len(overlap) == 1:
@@ -166,6 +222,9 @@ class Indexer:
         """
         The most recent version in time, which is applicable to the run number.
         """
+        if self.useManifest:
+            return self._getManifest().latestApplicableVersion(runNumber)
+
         # sort by timestamp
         entries = list(self.index.values())
         entries.sort(key=lambda x: x.timestamp)
@@ -188,8 +247,10 @@ class Indexer:
 
         version = None
 
+        indexVersions = set(self._indexVersions())
+
         # if the index and directories are in sync, the next version is one past them
-        if set(self.index.keys()) == self.dirVersions:
+        if indexVersions == self.dirVersions:
             # remove the default version
             dirVersions = [x for x in self.dirVersions if x != VERSION_DEFAULT]
             # if nothing is left, the next is the start
@@ -201,7 +262,7 @@ class Indexer:
         # if the index and directory are out of sync, find the largest in both sets
         else:
             # get the elements particular to each set -- the max of these is the next version
-            indexSet = set(self.index.keys())
+            indexSet = indexVersions
             diffAB = indexSet.difference(self.dirVersions)
             diffBA = self.dirVersions.difference(indexSet)
             # if diffAB is nullset, diffBA has one more member -- that is next
@@ -234,6 +295,12 @@ class Indexer:
 
     @validate_call
     def thisOrLatestApplicableVersion(self, runNumber: str, version: Optional[int]):
+        if self.useManifest:
+            manifest = self._getManifest()
+            if version in manifest.versions() and manifest.isApplicable(version, runNumber):
+                return version
+            return manifest.latestApplicableVersion(runNumber)
+
         if self.isValidVersion(version) and self._isApplicableEntry(self.index[version], runNumber):
             return version
         else:
@@ -275,7 +342,13 @@ class Indexer:
         """
         Path to the index
         """
-        return self.rootDirectory / f"{self.indexerType}Index.json"
+        return indexPath(self.rootDirectory, self.indexerType)
+
+    def manifestPath(self):
+        """
+        Path to the manifest of the index
+        """
+        return self.rootDirectory / f"{self.indexerType}IndexManifest.json"
 
     def recordPath(self, version: Optional[int] = None):
         """
@@ -317,7 +390,7 @@ class Indexer:
 
     def getIndex(self) -> List[IndexEntry]:
         if self.index == {}:
-            self.index = self.readIndex()
+            self._index = self.readIndex()
 
         # remove the default version, if it exists
         res = self.index.copy()
@@ -336,6 +409,41 @@ class Indexer:
         path = self.indexPath()
         path.parent.mkdir(parents=True, exist_ok=True)
         write_model_list_pretty(self.index.values(), path)
+        self._dirty = False
+        if self.useManifest:
+            self.writeManifest()
+
+    def _indexSignature(self) -> Optional[List[int]]:
+        try:
+            stat_ = os.stat(self.indexPath())
+        except OSError:
+            return None
+        return [stat_.st_mtime_ns, stat_.st_size]
+
+    def readManifest(self) -> Optional[IndexManifest]:
+        """
+        Read the manifest of the index:
+        returns `None` if there is no manifest, or if the index has changed since it was written.
+        """
+        path = self.manifestPath()
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                manifest = json.load(f)
+            if manifest["index"] != self._indexSignature():
+                return None
+            return IndexManifest(manifest["entries"])
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring invalid index manifest '{path}': {e}")
+            return None
+
+    def writeManifest(self):
+        path = self.manifestPath()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {"index": self._indexSignature(), "entries": self._getManifest().entries}
+        with open(path, "w") as f:
+            json.dump(manifest, f)
 
     def addIndexEntry(self, entry: IndexEntry):
         """
@@ -346,6 +454,7 @@ class Indexer:
             raise RuntimeError(f"Invalid version {entry.version} on index entry.  Save failed.")
 
         self.index[entry.version] = entry
+        self._manifest = None
         self.writeIndex()
 
     ## RECORD READ / WRITE METHODS ##
@@ -429,3 +538,72 @@ class Indexer:
             parametersPath.parent.mkdir(parents=True, exist_ok=True)
         write_model_pretty(parameters, parametersPath)
         self.dirVersions.add(parameters.version)
+
+
+class IndexerCache:
+    """
+    A bounded, least-recently-used cache of indexers, keyed by (state id, lite mode, indexer type).
+
+    Before a cached indexer is returned, its directory and its index file are checked, using `stat` only:
+    if either has been modified since the indexer last read them (e.g. by another SNAPRed process
+    sharing the same state root), the indexer is refreshed.
+    """
+
+    # (<directory mtime>, <index-file inode>, <index-file mtime>, <index-file size>)
+    Signature = Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+
+    def __init__(self, factory: Callable[[str, bool, IndexerType], Tuple[Indexer, Path]], maxSize: int):
+        # `factory` creates an indexer, and returns it together with its directory
+        self.factory = factory
+        self.maxSize = maxSize
+        self._entries: OrderedDict[Tuple[str, bool, IndexerType], List] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.RLock()
+
+    def __call__(self, stateId: str, useLiteMode: bool, indexerType: IndexerType) -> Indexer:
+        key = (stateId, useLiteMode, indexerType)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                indexer, directory = self.factory(*key)
+                entry = [indexer, directory, self.signature(directory, indexerType)]
+                self._entries[key] = entry
+                while len(self._entries) > self.maxSize:
+                    self._entries.popitem(last=False)
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                indexer, directory, signature = entry
+                signature_ = self.signature(directory, indexerType)
+                if signature_ != signature:
+                    logger.debug(f"{indexerType} index at '{directory}' has been modified: refreshing")
+                    indexer.refresh()
+                    # the refresh may itself have written to the directory
+                    entry[2] = self.signature(directory, indexerType)
+            return entry[0]
+
+    @staticmethod
+    def signature(directory: Path, indexerType: IndexerType) -> "IndexerCache.Signature":
+        try:
+            directoryMtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            directoryMtime = None
+        try:
+            stat_ = os.stat(indexPath(directory, indexerType))
+            return directoryMtime, stat_.st_ino, stat_.st_mtime_ns, stat_.st_size
+        except OSError:
+            return directoryMtime, None, None, None
+
+    def cache_clear(self):
+        # as for `functools.lru_cache`
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def cache_info(self) -> functools._CacheInfo:
+        # as for `functools.lru_cache`
+        with self._lock:
+            return functools._CacheInfo(self._hits, self._misses, self.maxSize, len(self._entries))
@@ -4,13 +4,16 @@ import json
 import os
 import re
 import stat
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from errno import ENOENT as NOT_FOUND
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import h5py
+from mantid.api import WorkspaceGroup
 from mantid.dataobjects import MaskWorkspace
 from mantid.kernel import PhysicalConstants
 from mantid.simpleapi import GetIPTS, mtd
@@ -40,10 +43,15 @@ from snapred.backend.dao.state import (
     DetectorState,
     GroupingMap,
     InstrumentState,
+    PixelGroup,
 )
 from snapred.backend.dao.state.CalibrantSample import CalibrantSample
-from snapred.backend.data.Indexer import Indexer, IndexerType
+from snapred.backend.data.DetectorStateCache import DetectorStateCache, PVFileHandlePool
+from snapred.backend.data.Indexer import Indexer, IndexerCache, IndexerType
+from snapred.backend.data.IPTSIndex import IPTSIndex
 from snapred.backend.data.NexusHDF5Metadata import NexusHDF5Metadata as n5m
+from snapred.backend.data.ReducedSpectraReader import ReducedSpectra, readReducedSpectra
+from snapred.backend.error.AlgorithmException import AlgorithmException
 from snapred.backend.error.RecoverableException import RecoverableException
 from snapred.backend.error.StateValidationException import StateValidationException
 from snapred.backend.log.logger import snapredLogger
@@ -84,6 +92,8 @@ def _createFileNotFoundError(msg, filename):
 class LocalDataService:
     instrumentConfig: "InstrumentConfig"
     verifyPaths: bool = True
+    _detectorStates: Optional[DetectorStateCache] = None
+    _iptsRanges: Optional[IPTSIndex] = None
 
     # conversion factor from microsecond/Angstrom to meters
     # (TODO: FIX THIS COMMENT! Obviously `m2cm` doesn't convert from 1.0 / Angstrom to 1.0 / meters.)
@@ -93,6 +103,16 @@ class LocalDataService:
         self.verifyPaths = Config["localdataservice.config.verifypaths"]
         self.instrumentConfig = self.readInstrumentConfig()
         self.mantidSnapper = MantidSnapper(None, "Utensils")
+        self._pvFiles = PVFileHandlePool(Config["localdataservice.pvFile.maxOpenHandles"])
+        self._indexer = IndexerCache(self._createIndexer, Config["localdataservice.indexer.cacheSize"])
+
+        # <mask workspace name>: (<workspace identity>, <state id>): see `_maskStateId`
+        self._maskStateIds: Dict[str, Tuple[Tuple[Any, ...], str]] = {}
+
+        # Reduction-data files being written in the background: see `writeReductionData`
+        self._reductionWriter: Optional[ThreadPoolExecutor] = None
+        self._pendingReductionWrites: Dict[str, Future] = {}
+        self._reductionWritesLock = threading.Lock()
 
     ##### MISCELLANEOUS METHODS #####
 
@@ -237,9 +257,34 @@ class LocalDataService:
 
     @lru_cache
     def getIPTS(self, runNumber: str, instrumentName: str = Config["instrument.name"]) -> str:
+        # `GetIPTS` searches the archive: it is only used when the run is not in the IPTS index
+        if instrumentName == Config["instrument.name"]:
+            iptsIndex = self._iptsIndex()
+            if iptsIndex is not None:
+                ipts = iptsIndex.lookup(runNumber)
+                if ipts is not None:
+                    return ipts
         ipts = GetIPTS(RunNumber=runNumber, Instrument=instrumentName)
         return str(ipts)
 
+    def _iptsIndex(self) -> Optional[IPTSIndex]:
+        if not Config["localdataservice.iptsIndex.enabled"]:
+            return None
+        instrumentHome = Path(Config["instrument.home"])
+        indexPath = Path(Config["localdataservice.iptsIndex.file"])
+        index = self._iptsRanges
+        if index is None or index.instrumentHome != instrumentHome or index.indexPath != indexPath:
+            index = IPTSIndex(
+                instrumentHome,
+                self.instrumentConfig.nexusDirectory,
+                f"{Config['instrument.name']}_",
+                self.instrumentConfig.nexusFileExtension,
+                indexPath,
+                missTTL=Config["localdataservice.iptsIndex.missTTL"],
+            )
+            self._iptsRanges = index
+        return index
+
     def stateExists(self, runId: str) -> bool:
         stateId, _ = self.generateStateId(runId)
         statePath = self.constructCalibrationStateRoot(stateId)
@@ -276,14 +321,19 @@ class LocalDataService:
             f"SNAP_{str(runConfig.runNumber)}{self.instrumentConfig.nexusFileExtension}",
         )
 
-    def _readPVFile(self, runId: str):
+    def _readPVFile(self, runId: str) -> h5py.File:
+        # The returned handle is owned by the pool:
+        #   hold `self._pvFiles.lock` while reading from it, and do not close it.
         fileName: Path = self._constructPVFilePath(runId)
+        return self._pvFiles.get(fileName)
 
-        if fileName.exists():
-            h5 = h5py.File(fileName, "r")
-        else:
-            raise FileNotFoundError(f"PVFile '{fileName}' does not exist")
-        return h5
+    def _detectorStateCache(self) -> Optional[DetectorStateCache]:
+        if not Config["localdataservice.detectorStateCache.enabled"]:
+            return None
+        filePath = Path(Config["localdataservice.detectorStateCache.file"])
+        if self._detectorStates is None or self._detectorStates.filePath != filePath:
+            self._detectorStates = DetectorStateCache(filePath)
+        return self._detectorStates
 
     # NOTE `lru_cache` decorator needs to be on the outside
     @lru_cache
@@ -296,6 +346,30 @@ class LocalDataService:
             SHA = self._stateIdFromDetectorState(detectorState)
         return SHA.hex, SHA.decodedKey
 
+    def generateStateIds(self, runIds: List[str]) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, Exception]]:
+        """
+        Generate the state ids for a list of runs,
+        concurrently on a pool of at most 'localdataservice.stateIds.maxConcurrent' threads.
+        Each distinct run is resolved (including its IPTS lookup) only once,
+        and a run that fails does not prevent the others from being resolved.
+        :return: (<run number>: (<state id>, <decoded key>), <run number>: <exception>)
+        """
+        uniqueRunIds = list(dict.fromkeys(runIds))
+        stateIds: Dict[str, Tuple[str, str]] = {}
+        errors: Dict[str, Exception] = {}
+        if not uniqueRunIds:
+            return stateIds, errors
+
+        maxWorkers = max(1, min(Config["localdataservice.stateIds.maxConcurrent"], len(uniqueRunIds)))
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            futures = {runId: executor.submit(self.generateStateId, runId) for runId in uniqueRunIds}
+        for runId, future in futures.items():
+            try:
+                stateIds[runId] = future.result()
+            except Exception as e:  # noqa: BLE001
+                errors[runId] = e
+        return stateIds, errors
+
     def _stateIdFromDetectorState(self, detectorState: DetectorState) -> ObjectSHA:
         stateID = StateId(
             vdet_arc1=detectorState.arc[0],
@@ -386,6 +460,11 @@ class LocalDataService:
         filePath = self._constructReductionDataPath(runNumber, useLiteMode, timestamp) / fileName
         return filePath
 
+    @validate_call
+    def _constructReductionMaskCatalogPath(self, runNumber: str, useLiteMode: bool) -> Path:
+        mode = "lite" if useLiteMode else "native"
+        return self._constructReductionStateRoot(runNumber) / mode / "PixelMaskCatalog.jsonl"
+
     @validate_call
     def _reducedRuns(self, runNumber: str, useLiteMode: bool) -> List[str]:
         # A list of already reduced runs sharing the same state as the specified run
@@ -405,13 +484,16 @@ class LocalDataService:
     @validate_call
     def _reducedTimestamps(self, runNumber: str, useLiteMode: bool) -> List[int]:
         # A list of timestamps from existing reduced data for the specified run and grouping.
+        return self._timestampsInDirectory(self._constructReductionDataRoot(runNumber, useLiteMode))
+
+    def _timestampsInDirectory(self, reductionDataRoot: Path) -> List[int]:
+        # A list of the timestamps of the timestamp-named subdirectories of a reduction-data directory.
 
         # Implementation notes:
         # * in python >=3.11, the iso-format parsing can be replaced by
         #   `<datetime class>.fromisoformat(entry.name).timestamp()`
 
         timestampPathTag = re.compile(Config["mantid.workspace.nameTemplate.formatter.timestamp.path_regx"])
-        reductionDataRoot = self._constructReductionDataRoot(runNumber, useLiteMode)
         tss = []
         if reductionDataRoot.exists():
             with os.scandir(reductionDataRoot) as entries:
@@ -450,10 +532,13 @@ class LocalDataService:
                 raise NotImplementedError(f"Indexer of type {indexerType} is not supported by the LocalDataService")
         return path
 
-    @lru_cache
-    def _indexer(self, stateId: str, useLiteMode: bool, indexerType: IndexerType):
+    def _createIndexer(self, stateId: str, useLiteMode: bool, indexerType: IndexerType) -> Tuple[Indexer, Path]:
+        # indexers are cached by `self._indexer`
         path = self._statePathForWorkflow(stateId, useLiteMode, indexerType)
-        return Indexer(indexerType=indexerType, directory=path)
+        indexer = Indexer(
+            indexerType=indexerType, directory=path, useManifest=Config["localdataservice.indexer.useManifest"]
+        )
+        return indexer, Path(path)
 
     def indexer(self, runNumber: str, useLiteMode: bool, indexerType: IndexerType):
         stateId, _ = self.generateStateId(runNumber)
@@ -647,6 +732,14 @@ class LocalDataService:
         """
         Persists the reduction data associated with a `ReductionRecord`
         -- `writeReductionRecord` must have been called prior to this method.
+
+        All of the workspaces are written by a single `SaveNexusProcessed`, which opens the file only once,
+        and then the "/metadata" group is appended.  When "localdataservice.reductionData.compress" is set,
+        the workspace datasets are written chunked and compressed.
+
+        When "localdataservice.reductionData.backgroundWrite" is set, the file is written by a background thread,
+        and this method returns as soon as the write has been queued: the workspaces are held by reference,
+        so they may be deleted from the ADS in the meantime.  Use `flushReductionData` to wait for the writes.
         """
 
         runNumber, useLiteMode, timestamp = record.runNumber, record.useLiteMode, record.timestamp
@@ -659,14 +752,43 @@ class LocalDataService:
             # WARNING: `writeReductionRecord` must be called before `writeReductionData`.
             raise RuntimeError(f"reduction version directories {filePath.parent} do not exist")
 
+        # An unregistered group, in order of the `workspaces` list: it is not added to the ADS.
+        workspaces = WorkspaceGroup()
         for ws in record.workspaceNames:
-            # Append workspaces to hdf5 file, in order of the `workspaces` list
-            self.writeWorkspace(filePath.parent, Path(filePath.name), ws, append=True)
+            workspaces.addWorkspace(mtd[ws])
 
             if ws.tokens("workspaceType") == wngt.REDUCTION_PIXEL_MASK:
                 # Write an additional copy of the combined pixel mask as a separate `SaveDiffCal`-format file
                 maskFilename = ws + ".h5"
                 self.writePixelMask(filePath.parent, Path(maskFilename), ws)
+                self._addReductionMaskCatalogEntry(runNumber, useLiteMode, timestamp)
+
+        compress = Config["localdataservice.reductionData.compress"]
+        if not Config["localdataservice.reductionData.backgroundWrite"]:
+            self._writeReductionDataFile(filePath, workspaces, record, compress)
+            return
+
+        with self._reductionWritesLock:
+            if self._reductionWriter is None:
+                # a single thread: the files are written in order
+                self._reductionWriter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ReductionWriter")
+            future = self._reductionWriter.submit(self._writeReductionDataFile, filePath, workspaces, record, compress)
+            self._pendingReductionWrites[str(filePath)] = future
+        future.add_done_callback(lambda future_: self._reductionDataWritten(filePath, future_))
+        logger.info(f"queued reduction data for writing to '{filePath}'")
+
+    def _writeReductionDataFile(
+        self, filePath: Path, workspaces: WorkspaceGroup, record: ReductionRecord, compress: bool = False
+    ):
+        # This may run on the writer thread: it must not use the shared `mantidSnapper` queue.
+        mantidSnapper = MantidSnapper(None, "ReductionWriter")
+        mantidSnapper.SaveNexusProcessed(
+            "Save the reduction workspaces using Nexus format",
+            InputWorkspace=workspaces,
+            Filename=str(filePath),
+            CompressNexus=compress,
+        )
+        mantidSnapper.executeQueue()
 
         # Append the "metadata" group, containing the `ReductionRecord` metadata
         with h5py.File(filePath, "a") as h5:
@@ -674,6 +796,34 @@ class LocalDataService:
 
         logger.info(f"wrote reduction data to file '{filePath}'")
 
+    def _reductionDataWritten(self, filePath: Path, future: Future):
+        if future.exception() is not None:
+            # the failed write is retained, so that its error is raised by `flushReductionData`
+            logger.error(f"Unable to write reduction data to '{filePath}': {future.exception()}")
+            return
+        with self._reductionWritesLock:
+            if self._pendingReductionWrites.get(str(filePath)) is future:
+                del self._pendingReductionWrites[str(filePath)]
+
+    def flushReductionData(self, filePath: Optional[Path] = None):
+        """
+        Wait for any reduction data being written in the background: either to the specified file, or to all files.
+        The first error from any of these writes is raised.
+        """
+        with self._reductionWritesLock:
+            if filePath is not None:
+                keys = [str(filePath)] if str(filePath) in self._pendingReductionWrites else []
+            else:
+                keys = list(self._pendingReductionWrites)
+            futures = [(key, self._pendingReductionWrites[key]) for key in keys]
+        for key, future in futures:
+            try:
+                future.result()
+            finally:
+                with self._reductionWritesLock:
+                    if self._pendingReductionWrites.get(key) is future:
+                        del self._pendingReductionWrites[key]
+
     @validate_call
     def readReductionData(self, runNumber: str, useLiteMode: bool, timestamp: float) -> ReductionRecord:
         """
@@ -681,6 +831,7 @@ class LocalDataService:
         -- it is provided primarily for diagnostic purposes, and is not yet connected to any workflow
         """
         filePath = self._constructReductionDataFilePath(runNumber, useLiteMode, timestamp)
+        self.flushReductionData(filePath)
         if not filePath.exists():
             raise RuntimeError(f"[readReductionData]: file '{filePath}' does not exist")
 
@@ -706,6 +857,54 @@ class LocalDataService:
         logger.info(f"loaded reduction data from '{filePath}'")
         return record
 
+    @validate_call
+    def readReducedSpectra(
+        self,
+        runNumber: str,
+        useLiteMode: bool,
+        timestamp: float,
+        groupings: Optional[List[str]] = None,
+        spectra: Optional[List[int]] = None,
+        xRange: Optional[Tuple[float, float]] = None,
+        unit: str = wng.Units.DSP,
+    ) -> Dict[str, ReducedSpectra]:
+        """
+        Read a subset of the reduced data saved by `writeReductionData`, as arrays, without loading any workspaces:
+        -- `groupings`: the names of the groupings to read, or `None` for all of the reduction outputs;
+        -- `spectra`: the workspace indices of the spectra to read from each output, or `None` for all spectra;
+        -- `xRange`: the (<x min>, <x max>) range of the bins to read, or `None` for all bins.
+        See `ReducedSpectraReader` for details.
+        """
+        filePath = self._constructReductionDataFilePath(runNumber, useLiteMode, timestamp)
+        self.flushReductionData(filePath)
+        if not filePath.exists():
+            raise RuntimeError(f"[readReducedSpectra]: file '{filePath}' does not exist")
+
+        with h5py.File(filePath, "r") as h5:
+            record = ReductionRecord.model_validate(n5m.extractMetadataGroup(h5, "/metadata"))
+
+        # The workspaces are saved in the order of the record's list, with entry numbers counting from 1
+        entries = {str(ws): n + 1 for n, ws in enumerate(record.workspaceNames)}
+        if groupings is None:
+            pixelMaskKeyword = Config["mantid.workspace.nameTemplate.template.reduction.pixelMask"].split(",")[0]
+            entries = {ws: n for ws, n in entries.items() if pixelMaskKeyword not in ws}
+        else:
+            selected = {}
+            for grouping in groupings:
+                ws = (
+                    wng.reductionOutput()
+                    .unit(unit)
+                    .group(grouping)
+                    .runNumber(record.runNumber)
+                    .timestamp(record.timestamp)
+                    .build()
+                )
+                if ws not in entries:
+                    raise RuntimeError(f"[readReducedSpectra]: no '{grouping}' output in unit '{unit}' in '{filePath}'")
+                selected[str(ws)] = entries[str(ws)]
+            entries = selected
+        return readReducedSpectra(filePath, entries, spectra, xRange)
+
     ##### CALIBRANT SAMPLE METHODS #####
 
     def readSampleFilePaths(self):
@@ -798,8 +997,23 @@ class LocalDataService:
         indexer.writeParameters(normalization)
 
     def readDetectorState(self, runId: str) -> DetectorState:
+        cache = self._detectorStateCache()
+        if cache is None:
+            return self._readDetectorStateFromPVFile(runId)
+
+        filePath = self._constructPVFilePath(runId)
+        detectorState = cache.lookup(filePath)
+        if detectorState is None:
+            detectorState = self._readDetectorStateFromPVFile(runId)
+            cache.store(filePath, detectorState)
+        return detectorState
+
+    def _readDetectorStateFromPVFile(self, runId: str) -> DetectorState:
+        with self._pvFiles.lock:
+            return self._detectorStateFromPVFile(runId, self._readPVFile(runId))
+
+    def _detectorStateFromPVFile(self, runId: str, pvFile) -> DetectorState:
         detectorState = None
-        pvFile = self._readPVFile(runId)
         wav_value = None
         logsLocation = Config["constants.logsLocation"]
         wav_key_1 = f"{logsLocation}/BL3:Chop:Gbl:WavelengthReq/value"
@@ -1051,6 +1265,85 @@ class LocalDataService:
     def _groupingMapPath(self, stateId) -> Path:
         return self.constructCalibrationStateRoot(stateId) / "groupingMap.json"
 
+    ##### PIXEL-GROUP CACHE METHODS #####
+
+    def _pixelGroupCachePath(self, stateId: str, useLiteMode: bool, key: str) -> Path:
+        mode = self._getLiteModeString(useLiteMode)
+        return self.constructCalibrationStateRoot(stateId) / mode / "pixelGroups" / f"{key}.json"
+
+    def readPixelGroup(self, stateId: str, useLiteMode: bool, key: str) -> Optional[PixelGroup]:
+        """
+        Read a previously-computed `PixelGroup` from the state's pixel-group cache.
+        - returns None if there is no entry for the key, or if the entry cannot be parsed.
+        """
+        path = self._pixelGroupCachePath(stateId, useLiteMode, key)
+        if not path.exists():
+            return None
+        try:
+            return parse_file_as(PixelGroup, path)
+        except (OSError, ValueError) as e:
+            # a corrupt cache entry is not an error: the pixel group will just be recalculated
+            logger.warning(f"unable to read cached pixel group at '{path}': {e}")
+            return None
+
+    def writePixelGroup(self, stateId: str, useLiteMode: bool, key: str, pixelGroup: PixelGroup):
+        """
+        Write a `PixelGroup` to the state's pixel-group cache.
+        - the cache is only written for an initialized state: the state root must already exist.
+        """
+        if not self.constructCalibrationStateRoot(stateId).exists():
+            return
+        path = self._pixelGroupCachePath(stateId, useLiteMode, key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_model_pretty(pixelGroup, path)
+        except OSError as e:
+            logger.warning(f"unable to write cached pixel group to '{path}': {e}")
+
+    ##### FOCUSSED-NORMALIZATION CACHE METHODS #####
+
+    def _focussedNormalizationCachePath(self, runNumber: str, useLiteMode: bool, version: int, key: str) -> Path:
+        versionPath = self.normalizationIndexer(runNumber, useLiteMode).versionPath(version)
+        return versionPath / "focussedNormalizations" / f"{key}.nxs.h5"
+
+    def readFocussedNormalization(
+        self, runNumber: str, useLiteMode: bool, version: int, key: str, workspaceName: WorkspaceName
+    ) -> bool:
+        """
+        Load a focussed normalization from the cache of a normalization version.
+        - returns False if there is no entry for the key, or if the entry cannot be loaded.
+        """
+        path = self._focussedNormalizationCachePath(runNumber, useLiteMode, version, key)
+        if not path.exists():
+            return False
+        try:
+            self.readWorkspace(path.parent, Path(path.name), workspaceName)
+        except (AlgorithmException, RuntimeError) as e:
+            # a corrupt cache entry is not an error: the normalization will just be focussed again
+            logger.warning(f"unable to read cached focussed normalization at '{path}': {e}")
+            return False
+        return True
+
+    def writeFocussedNormalization(
+        self, runNumber: str, useLiteMode: bool, version: int, key: str, workspaceName: WorkspaceName
+    ):
+        """
+        Write a focussed normalization to the cache of a normalization version.
+        - the cache is only written for an existing normalization version: its directory must already exist.
+        """
+        path = self._focussedNormalizationCachePath(runNumber, useLiteMode, version, key)
+        if not path.parent.parent.exists():
+            return
+        # write to a temporary file first, so that a partially-written entry is never read
+        tmpPath = path.with_name(f"{key}_{os.getpid()}_{threading.get_ident()}.nxs.h5")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.writeWorkspace(tmpPath.parent, Path(tmpPath.name), workspaceName)
+            os.replace(tmpPath, path)
+        except (AlgorithmException, OSError, RuntimeError) as e:
+            logger.warning(f"unable to write cached focussed normalization to '{path}': {e}")
+            tmpPath.unlink(missing_ok=True)
+
     ## PIXEL-MASK SUPPORT METHODS
 
     def isCompatibleMask(self, wsName: WorkspaceName, runNumber: str, useLiteMode: bool) -> bool:
@@ -1068,11 +1361,117 @@ class LocalDataService:
         if mtd[wsName].getNumberHistograms() != targetPixelCount:
             return False
         expectedStateId, _ = self.generateStateId(runNumber)
-        actualStateId, _ = self.stateIdFromWorkspace(wsName)
+        actualStateId = self._maskStateId(wsName)
         if actualStateId != expectedStateId:
             return False
         return True
 
+    def _maskStateId(self, wsName: WorkspaceName) -> str:
+        # The state id of a resident mask workspace:
+        #   this is cached for as long as the workspace retains its identity (see `_workspaceIdentity`).
+        identity = self._workspaceIdentity(wsName)
+        entry = self._maskStateIds.get(str(wsName))
+        if identity is not None and entry is not None and entry[0] == identity:
+            return entry[1]
+        stateId, _ = self.stateIdFromWorkspace(wsName)
+        if identity is not None:
+            self._maskStateIds[str(wsName)] = (identity, stateId)
+        return stateId
+
+    def _workspaceIdentity(self, wsName: WorkspaceName) -> Optional[Tuple[Any, ...]]:
+        # A key that changes whenever the named workspace is replaced, or modified by any algorithm:
+        #   the length of its history, and the execution date and count of the last algorithm in its history.
+        #   A workspace without any history has no identity, and its state id is not cached.
+        history = mtd[wsName].getHistory()
+        if history.empty():
+            return None
+        lastAlgorithm = history.lastAlgorithm()
+        return (history.size(), str(lastAlgorithm.executionDate()), lastAlgorithm.execCount())
+
+    @validate_call
+    def readReductionMaskCatalog(self, runNumber: str, useLiteMode: bool) -> List[Tuple[str, float]]:
+        """
+        List the (run number, timestamp) of each reduction pixel mask saved in the same state as a run.
+
+        The per-state catalog is a JSON-lines file, which is appended to by `writeReductionData`
+        whenever it writes a pixel mask.  If the catalog does not exist, it is built by scanning
+        the reduction-data directories of the state.
+        Any catalog entries whose pixel-mask file has since been deleted are dropped,
+        and the catalog is then rewritten without them.
+        """
+        catalogPath = self._constructReductionMaskCatalogPath(runNumber, useLiteMode)
+        if not catalogPath.exists():
+            entries = self._scanReductionMasks(catalogPath.parent)
+            if catalogPath.parent.exists():
+                self._writeReductionMaskCatalog(catalogPath, entries)
+            return entries
+
+        entries: Dict[Tuple[str, float], None] = {}
+        lineCount = 0
+        with open(catalogPath, "r") as f:
+            for lineNumber, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                lineCount += 1
+                try:
+                    entry = json.loads(line)
+                    entries[(str(entry["runNumber"]), float(entry["timestamp"]))] = None
+                except (ValueError, TypeError, KeyError) as e:
+                    # e.g. a partially-written line
+                    logger.warning(f"Skipping invalid entry at line {lineNumber} of '{catalogPath}': {e}")
+
+        # drop the entries of any reductions which have since been deleted
+        existing = [
+            (run, ts) for run, ts in entries if self._reductionMaskPath(catalogPath.parent, run, ts).exists()
+        ]
+        if len(existing) < lineCount:
+            self._writeReductionMaskCatalog(catalogPath, existing)
+        return existing
+
+    def _addReductionMaskCatalogEntry(self, runNumber: str, useLiteMode: bool, timestamp: float):
+        catalogPath = self._constructReductionMaskCatalogPath(runNumber, useLiteMode)
+        if not catalogPath.exists():
+            # the new mask is included by the initial scan
+            self.readReductionMaskCatalog(runNumber, useLiteMode)
+            return
+        try:
+            # a single appended line: concurrent writers do not overwrite one another's entries
+            with open(catalogPath, "a") as f:
+                f.write(json.dumps({"runNumber": runNumber, "timestamp": timestamp}) + "\n")
+        except OSError as e:
+            logger.warning(f"Unable to update reduction pixel-mask catalog '{catalogPath}': {e}")
+
+    def _writeReductionMaskCatalog(self, catalogPath: Path, entries: List[Tuple[str, float]]):
+        try:
+            # write, then rename: a concurrent reader never sees a partial catalog
+            tmpPath = catalogPath.with_name(f".{catalogPath.name}.{os.getpid()}")
+            with open(tmpPath, "w") as f:
+                for runNumber, timestamp in entries:
+                    f.write(json.dumps({"runNumber": runNumber, "timestamp": timestamp}) + "\n")
+            os.replace(tmpPath, catalogPath)
+        except OSError as e:
+            logger.warning(f"Unable to write reduction pixel-mask catalog '{catalogPath}': {e}")
+
+    def _reductionMaskPath(self, stateModeRoot: Path, runNumber: str, timestamp: float) -> Path:
+        maskName = wng.reductionPixelMask().runNumber(runNumber).timestamp(timestamp).build()
+        return self._appendTimestamp(stateModeRoot / runNumber, timestamp) / (maskName + ".h5")
+
+    def _scanReductionMasks(self, stateModeRoot: Path) -> List[Tuple[str, float]]:
+        # Scan the reduction-data directories of a state for pixel-mask files:
+        #   the run-number directories are taken directly from the state's directory,
+        #   so that the state of each run need not be regenerated.
+        runNumberFormat = re.compile(r"\d{5,}$")
+        entries = []
+        if not stateModeRoot.exists():
+            return entries
+        with os.scandir(stateModeRoot) as runDirs:
+            runs = [entry.name for entry in runDirs if entry.is_dir() and runNumberFormat.match(entry.name)]
+        for run in runs:
+            for ts in self._timestampsInDirectory(stateModeRoot / run):
+                if self._reductionMaskPath(stateModeRoot, run, ts).exists():
+                    entries.append((run, ts))
+        return entries
+
     @validate_call
     def getCompatibleReductionMasks(self, runNumber: str, useLiteMode: bool) -> List[WorkspaceName]:
         # Assemble a list of masks, both resident and otherwise, that are compatible with the current reduction
@@ -1080,26 +1479,24 @@ class LocalDataService:
         excludedCount = 0
 
         # First: add all masks from previous reductions in the same state
-        for run in self._reducedRuns(runNumber, useLiteMode):
-            for ts in self._reducedTimestamps(runNumber, useLiteMode):
-                maskName = wng.reductionPixelMask().runNumber(runNumber).timestamp(ts).build()
-                maskFilePath = self._constructReductionDataPath(runNumber, useLiteMode, ts) / (maskName + ".h5")
-
-                # Implementation notes:
-                # * No compatibility check is required for reduction masks on the filesystem:
-                #     they are guaranteed to be compatible;
-
-                if maskName not in masks and maskFilePath.exists():
-                    # Ensure that any _resident_ mask is compatible:
-                    if mtd.doesExist(maskName) and not self.isCompatibleMask(maskName, runNumber, useLiteMode):
-                        # There is a possible name collision
-                        # between reduction pixel masks from different lite-mode settings.
-                        #   This clause bypasses that collision in the most straightforward way:
-                        #     such a mask will be excluded, even if there may be a compatible mask
-                        #     of the same name on the filesystem.
-                        excludedCount += 1
-                        continue
-                    masks.add(maskName)
+        for run, ts in self.readReductionMaskCatalog(runNumber, useLiteMode):
+            maskName = wng.reductionPixelMask().runNumber(run).timestamp(ts).build()
+
+            # Implementation notes:
+            # * No compatibility check is required for reduction masks on the filesystem:
+            #     they are guaranteed to be compatible;
+
+            if maskName not in masks:
+                # Ensure that any _resident_ mask is compatible:
+                if mtd.doesExist(maskName) and not self.isCompatibleMask(maskName, runNumber, useLiteMode):
+                    # There is a possible name collision
+                    # between reduction pixel masks from different lite-mode settings.
+                    #   This clause bypasses that collision in the most straightforward way:
+                    #     such a mask will be excluded, even if there may be a compatible mask
+                    #     of the same name on the filesystem.
+                    excludedCount += 1
+                    continue
+                masks.add(maskName)
 
         # Next: add compatible user-created masks that are already resident in the ADS
         mantidMaskName = re.compile(r"MaskWorkspace(_([0-9]+))?")
@@ -2,7 +2,12 @@ import re
 from collections.abc import Mapping, Sequence
 from enum import Enum
 from numbers import Number
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+import h5py
+import numpy as np
+
+from snapred.meta.Enum import StrEnum
 
 """
     Construct a Nexus-compatible HDF5 representation from the dict corresponding to
@@ -12,9 +17,37 @@ from typing import Any, Dict
     In normal Nexus usage, this representation will be ignored by Nexus validators;
 
     * This allows existing methods to be used to save and restore workspaces to and from the same HDF5 file;
+
+    * Two encodings are supported (see `MetadataEncoding`), and the encoding of an existing group is detected
+    when it is extracted.  Groups written before the `ARRAYS` encoding existed are in the `DATASETS` encoding.
 """
 
 
+class MetadataEncoding(StrEnum):
+    # one dataset per leaf node, with sequence indices encoded as "_<n>" keys
+    DATASETS = "datasets"
+
+    # * a mapping is a group: its scalar values are attributes of the group;
+    # * a sequence of scalars of a single type is one array dataset;
+    # * a sequence of mappings, each with the same keys and with scalar values of the same type for each key,
+    #   is a group of column datasets, one for each key;
+    # * any other sequence is a group, with its items encoded by the "_<n>" keys.
+    ARRAYS = "arrays"
+
+
+# attributes reserved by the `ARRAYS` encoding
+_ENCODING = "_encoding"
+_SEQUENCE = "_sequence"
+_LENGTH = "_length"
+
+# the `_SEQUENCE` attribute values
+_LIST = "list"
+_RECORDS = "records"
+
+# scalar types which may be stored as an array: the type of each item must be exactly the same
+_ARRAY_TYPES = {bool: np.bool_, int: np.int64, float: np.float64, str: h5py.string_dtype()}
+
+
 class NexusHDF5Metadata:
     @staticmethod
     def _convert_to_scalar(s):
@@ -166,7 +199,159 @@ class NexusHDF5Metadata:
                 ) from e
 
     @staticmethod
-    def insertMetadataGroup(h5, data: Dict[str, Any], groupName="/metadata"):
+    def _is_leaf(node) -> bool:
+        return isinstance(node, (Number, Enum, str, bytes)) or not isinstance(node, (Mapping, Sequence))
+
+    @staticmethod
+    def _key(key) -> str:
+        # stringify all keys
+        return str(key.value) if isinstance(key, Enum) else str(key)
+
+    @staticmethod
+    def _scalar(node):
+        # a leaf node, as stored by the `ARRAYS` encoding
+        value = __class__._convert_to_scalar(node)
+        return "None" if value is None else value
+
+    @staticmethod
+    def _array(values: List[Any]) -> Optional[np.ndarray]:
+        # An array of scalars, if they are all of exactly the same type: otherwise `None`.
+        if not values:
+            return np.empty((0,), dtype=np.float64)
+        type_ = type(values[0])
+        if type_ not in _ARRAY_TYPES or any(type(value) is not type_ for value in values):
+            return None
+        try:
+            return np.asarray(values, dtype=_ARRAY_TYPES[type_])
+        except OverflowError:
+            return None
+
+    @staticmethod
+    def _columns(items: Sequence) -> Optional[Dict[Tuple[str, ...], np.ndarray]]:
+        # A sequence of mappings with the same structure, as one array for each leaf path: otherwise `None`.
+        def flatten(node, pre: Tuple[str, ...]):
+            for key, value in node.items():
+                path = pre + (__class__._key(key),)
+                if isinstance(value, Mapping) and value:
+                    yield from flatten(value, path)
+                elif __class__._is_leaf(value):
+                    yield path, __class__._scalar(value)
+                else:
+                    raise ValueError(f"not a leaf node at {path}")
+
+        if not items or not all(isinstance(item, Mapping) for item in items):
+            return None
+        try:
+            rows = [dict(flatten(item, ())) for item in items]
+        except ValueError:
+            return None
+        paths = list(rows[0])
+        if not paths or any(row.keys() != rows[0].keys() for row in rows):
+            return None
+        columns = {}
+        for path in paths:
+            column = __class__._array([row[path] for row in rows])
+            if column is None:
+                return None
+            columns[path] = column
+        return columns
+
+    @staticmethod
+    def _encode_arrays(group, node):
+        """
+        Encode a mapping as the contents of an HDF5 group, using the `ARRAYS` encoding.
+        """
+        for key, value in node.items():
+            key = __class__._key(key)
+            if __class__._is_leaf(value):
+                group.attrs[key] = __class__._scalar(value)
+            elif isinstance(value, Mapping):
+                __class__._encode_arrays(group.create_group(key), value)
+            else:
+                __class__._encode_sequence(group, key, value)
+
+    @staticmethod
+    def _encode_sequence(group, key: str, items: Sequence):
+        array = None
+        if all(__class__._is_leaf(item) for item in items):
+            array = __class__._array([__class__._scalar(item) for item in items])
+        if array is not None:
+            group.create_dataset(key, data=array)
+            return
+
+        columns = __class__._columns(items)
+        if columns is not None:
+            records = group.create_group(key)
+            records.attrs[_SEQUENCE] = _RECORDS
+            records.attrs[_LENGTH] = len(items)
+            for path, column in columns.items():
+                records.create_dataset("/".join(path), data=column)
+            return
+
+        sequence = group.create_group(key)
+        sequence.attrs[_SEQUENCE] = _LIST
+        sequence.attrs[_LENGTH] = len(items)
+        __class__._encode_arrays(sequence, {"_" + str(n): item for n, item in enumerate(items)})
+
+    @staticmethod
+    def _decode_value(value):
+        # an attribute, or an array converted to a list
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, bytes):
+            value = value.decode("utf8")
+        return None if value == "None" else value
+
+    @staticmethod
+    def _decode_array(dataset) -> List[Any]:
+        if h5py.check_string_dtype(dataset.dtype) is not None:
+            return [None if value == "None" else value for value in dataset.asstr()[()].tolist()]
+        return dataset[()].tolist()
+
+    @staticmethod
+    def _decode_arrays(group) -> Dict[str, Any]:
+        """
+        Decode the contents of an HDF5 group, written using the `ARRAYS` encoding.
+        """
+        sequence = group.attrs.get(_SEQUENCE)
+        if sequence is not None:
+            sequence = __class__._decode_value(sequence)
+        dict_ = {}
+        for key, value in group.attrs.items():
+            if key not in (_SEQUENCE, _LENGTH, _ENCODING, "NX_class"):
+                dict_[key] = __class__._decode_value(value)
+        for key, value in group.items():
+            if isinstance(value, h5py.Dataset):
+                dict_[key] = __class__._decode_array(value)
+            elif __class__._decode_value(value.attrs.get(_SEQUENCE)) == _RECORDS:
+                dict_[key] = __class__._decode_records(value)
+            else:
+                dict_[key] = __class__._decode_arrays(value)
+
+        if sequence == _LIST:
+            return [dict_["_" + str(n)] for n in range(int(group.attrs[_LENGTH]))]
+        return dict_
+
+    @staticmethod
+    def _decode_records(group) -> List[Dict[str, Any]]:
+        columns = []
+        group.visititems(
+            lambda name, node: columns.append((name.split("/"), __class__._decode_array(node)))
+            if isinstance(node, h5py.Dataset)
+            else None
+        )
+        records = [{} for _ in range(int(group.attrs[_LENGTH]))]
+        for path, column in columns:
+            for record, value in zip(records, column):
+                for key in path[:-1]:
+                    record = record.setdefault(key, {})
+                record[path[-1]] = value
+        return records
+
+    @staticmethod
+    def insertMetadataGroup(
+        h5, data: Dict[str, Any], groupName="/metadata", encoding: MetadataEncoding = MetadataEncoding.ARRAYS
+    ):
         """
         Insert a metadata group into an HDF5-format file:
 
@@ -177,11 +362,17 @@ class NexusHDF5Metadata:
           be quite general;
 
           * input: groupName specifies the full path to the group in the hdf5 file,
-          using standard HDF5 syntax.
+          using standard HDF5 syntax;
+
+          * input: encoding specifies the `MetadataEncoding`: by default, homogeneous sequences are stored as arrays.
         """
-        paths = __class__._traversal(data)
         metadata = h5.create_group(groupName)
         metadata.attrs["NX_class"] = "NXcollection"
+        if encoding == MetadataEncoding.ARRAYS:
+            metadata.attrs[_ENCODING] = MetadataEncoding.ARRAYS.value
+            __class__._encode_arrays(metadata, data)
+            return
+        paths = __class__._traversal(data)
         __class__._reconstruct_hdf5(metadata, paths)
 
     @staticmethod
@@ -210,6 +401,9 @@ class NexusHDF5Metadata:
             return s_
 
         metadata = h5[groupName]
+        if __class__._decode_value(metadata.attrs.get(_ENCODING)) == MetadataEncoding.ARRAYS:
+            return __class__._decode_arrays(metadata)
+
         paths = __class__._traversal(metadata, convert_scalar=convert_scalar)
 
         dict_ = __class__._reconstruct(paths)
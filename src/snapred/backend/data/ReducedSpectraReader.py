@@ -0,0 +1,147 @@
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import h5py
+import numpy as np
+
+"""
+    Partial reading of the workspaces saved in a reduction-data file, directly from its HDF5 datasets,
+    without loading any workspace into the ADS:
+
+    * Each workspace is a `mantid_workspace_<N>` entry, in Mantid's NeXus-processed format:
+    its `workspace` group holds the `values` and `errors` as (<spectrum>, <bin>) datasets,
+    the x-values as `axis1` (shared by all spectra, or one row per spectrum), and the spectrum numbers as `axis2`;
+
+    * Ragged workspaces (e.g. from `RebinRagged`) are saved with one `axis1` row per spectrum,
+    and with every row padded to the length of the longest spectrum using NaN:
+    each spectrum is trimmed at the end of its own x-values;
+
+    * Only the selected spectra, and the bins within the selected x-range, are read.
+    A dataset which is stored contiguously and without compression is memory-mapped,
+    so that the returned arrays are views of the file; otherwise, only the chunks containing the selection are read.
+    Reduction data is compressed by default (`localdataservice.reductionData.compress`),
+    so that its datasets are read by selection, and not memory-mapped.
+"""
+
+
+class ReducedSpectra(NamedTuple):
+    # the workspace name, as listed in the `ReductionRecord`
+    workspaceName: str
+    # the spectrum numbers of the selected spectra
+    spectrumNumbers: np.ndarray
+    # for each selected spectrum: the x-values (bin edges for histogram data), y-values, and errors
+    x: List[np.ndarray]
+    y: List[np.ndarray]
+    e: List[np.ndarray]
+
+
+def readReducedSpectra(
+    filePath: Path,
+    entries: Dict[str, int],
+    spectra: Optional[Sequence[int]] = None,
+    xRange: Optional[Tuple[float, float]] = None,
+) -> Dict[str, ReducedSpectra]:
+    """
+    Read a subset of the workspaces saved in a NeXus-processed file.
+    :param entries: <workspace name>: <entry number>, counting from 1 as for `LoadNexus`
+    :param spectra: workspace indices of the spectra to read, or `None` for all spectra:
+                    the spectra are returned in increasing order, without duplicates
+    :param xRange: (<x min>, <x max>): read only the bins lying within this range, or `None` for all bins
+    :return: <workspace name>: `ReducedSpectra`, in the order of `entries`
+    """
+    if xRange is not None and xRange[0] > xRange[1]:
+        raise ValueError(f"x-range minimum must not exceed its maximum: {xRange}")
+    spectra_ = np.unique(np.asarray(spectra, dtype=int)) if spectra is not None else None
+
+    result = {}
+    with h5py.File(filePath, "r") as h5:
+        for workspaceName, entryNumber in entries.items():
+            entryPath = f"mantid_workspace_{entryNumber}/workspace"
+            if entryPath not in h5:
+                raise RuntimeError(f"'{filePath}' has no histogram data for '{workspaceName}' at '{entryPath}'")
+            result[workspaceName] = _readEntry(filePath, h5[entryPath], workspaceName, spectra_, xRange)
+    return result
+
+
+def _readEntry(
+    filePath: Path,
+    group: h5py.Group,
+    workspaceName: str,
+    spectra: Optional[np.ndarray],
+    xRange: Optional[Tuple[float, float]],
+) -> ReducedSpectra:
+    values, errors, axis1 = group["values"], group["errors"], group["axis1"]
+    numberOfSpectra, numberOfBins = values.shape
+    if spectra is None:
+        rows = slice(None)
+        spectrumIndices = np.arange(numberOfSpectra)
+    else:
+        if len(spectra) and (spectra[0] < 0 or spectra[-1] >= numberOfSpectra):
+            raise ValueError(
+                f"workspace '{workspaceName}' has {numberOfSpectra} spectra: cannot select {list(spectra)}"
+            )
+        rows = spectra
+        spectrumIndices = spectra
+    spectrumNumbers = group["axis2"][:numberOfSpectra][spectrumIndices] if "axis2" in group else spectrumIndices + 1
+
+    y, e = _mapped(filePath, values), _mapped(filePath, errors)
+    isHistogram = axis1.shape[-1] == numberOfBins + 1
+
+    if axis1.ndim == 1:
+        # the x-values are shared by all spectra: a single rectangular selection
+        x = axis1[()]
+        bins = _binRange(x, xRange, isHistogram)
+        xs = _xValues(x, bins, isHistogram)
+        ys, es = _select(y, rows, bins), _select(e, rows, bins)
+        return ReducedSpectra(workspaceName, spectrumNumbers, [xs] * len(spectrumIndices), list(ys), list(es))
+
+    # one row of x-values per spectrum
+    xRows = _mapped(filePath, axis1)
+    xs, ys, es = [], [], []
+    for index in spectrumIndices:
+        x = _trimmed(np.asarray(xRows[index]))
+        bins = _binRange(x, xRange, isHistogram)
+        xs.append(_xValues(x, bins, isHistogram))
+        ys.append(_select(y, int(index), bins))
+        es.append(_select(e, int(index), bins))
+    return ReducedSpectra(workspaceName, spectrumNumbers, xs, ys, es)
+
+
+def _trimmed(x: np.ndarray) -> np.ndarray:
+    # the valid x-values of a padded row: up to its first NaN
+    padding = np.flatnonzero(np.isnan(x))
+    return x[: padding[0]] if len(padding) else x
+
+
+def _binRange(x: np.ndarray, xRange: Optional[Tuple[float, float]], isHistogram: bool) -> slice:
+    # The bins lying within the x-range: for histogram data, both edges of a bin must lie within the range.
+    numberOfBins = len(x) - 1 if isHistogram else len(x)
+    if xRange is None:
+        return slice(0, numberOfBins)
+    start = int(np.searchsorted(x, xRange[0], side="left"))
+    stop = int(np.searchsorted(x, xRange[1], side="right")) - (1 if isHistogram else 0)
+    start = min(start, numberOfBins)
+    return slice(start, max(start, stop))
+
+
+def _xValues(x: np.ndarray, bins: slice, isHistogram: bool) -> np.ndarray:
+    # the x-values of the selected bins: for histogram data, the bin edges
+    if isHistogram and bins.stop > bins.start:
+        return x[bins.start : bins.stop + 1]
+    return x[bins]
+
+
+def _select(data: Union[np.ndarray, h5py.Dataset], rows: Union[slice, int, np.ndarray], bins: slice) -> np.ndarray:
+    if isinstance(data, h5py.Dataset) and isinstance(rows, np.ndarray) and not len(rows):
+        # h5py does not accept an empty index list
+        return np.empty((0, bins.stop - bins.start), dtype=data.dtype)
+    return data[rows, bins]
+
+
+def _mapped(filePath: Path, dataset: h5py.Dataset) -> Union[np.ndarray, h5py.Dataset]:
+    # A read-only memory map of a contiguous, uncompressed dataset;
+    #   any other dataset is returned as is, to be read by selection.
+    offset = dataset.id.get_offset() if dataset.chunks is None and dataset.compression is None else None
+    if offset is None or not dataset.dtype.isnative:
+        return dataset
+    return np.memmap(filePath, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape)
@@ -3,7 +3,6 @@ from typing import Any, Dict, List, Tuple
 from snapred.backend.dao.ingredients import GenerateFocussedVanadiumIngredients as Ingredients
 from snapred.backend.log.logger import snapredLogger
 from snapred.backend.recipe.Recipe import Recipe
-from snapred.meta.decorators.Singleton import Singleton
 from snapred.meta.redantic import list_to_raw
 
 logger = snapredLogger.getLogger(__name__)
@@ -12,7 +11,6 @@ logger = snapredLogger.getLogger(__name__)
 Pallet = Tuple[Ingredients, Dict[str, str]]
 
 
-@Singleton
 class GenerateFocussedVanadiumRecipe(Recipe[Ingredients]):
     """
 
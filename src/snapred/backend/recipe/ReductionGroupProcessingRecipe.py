@@ -4,14 +4,12 @@ from snapred.backend.dao.ingredients import ReductionGroupProcessingIngredients
 from snapred.backend.error.AlgorithmException import AlgorithmException
 from snapred.backend.log.logger import snapredLogger
 from snapred.backend.recipe.Recipe import Recipe, WorkspaceName
-from snapred.meta.decorators.Singleton import Singleton
 
 logger = snapredLogger.getLogger(__name__)
 
 Pallet = Tuple[Ingredients, Dict[str, str]]
 
 
-@Singleton
 class ReductionGroupProcessingRecipe(Recipe[Ingredients]):
     def unbagGroceries(self, groceries: Dict[str, Any]):
         self.rawInput = groceries["inputWorkspace"]
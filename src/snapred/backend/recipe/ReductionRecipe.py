@@ -1,13 +1,22 @@
-from typing import Any, Dict, List, Optional, Set, Tuple, Type
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+import numpy as np
 
 from snapred.backend.dao.ingredients import ReductionIngredients as Ingredients
+from snapred.backend.dao.WorkspaceMetadata import WorkspaceMetadata
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.recipe.algorithm.Utensils import Utensils
 from snapred.backend.recipe.ApplyNormalizationRecipe import ApplyNormalizationRecipe
 from snapred.backend.recipe.GenerateFocussedVanadiumRecipe import GenerateFocussedVanadiumRecipe
 from snapred.backend.recipe.GenericRecipe import ArtificialNormalizationRecipe
 from snapred.backend.recipe.PreprocessReductionRecipe import PreprocessReductionRecipe
 from snapred.backend.recipe.Recipe import Recipe, WorkspaceName
 from snapred.backend.recipe.ReductionGroupProcessingRecipe import ReductionGroupProcessingRecipe
+from snapred.backend.recipe.WriteWorkspaceMetadata import WriteWorkspaceMetadata
+from snapred.meta.Config import Config
 from snapred.meta.mantid.WorkspaceNameGenerator import ValueFormatter as wnvf
 from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceNameGenerator as wng
 
@@ -36,8 +45,24 @@ class ReductionRecipe(Recipe[Ingredients]):
             self.maskWs = groceries.get("maskWorkspace")
             # list of grouping workspaces
             self.groupingWorkspaces = groceries["groupingWorkspaces"]
+            # shared workspaces which must not be modified, if any: these are copied on write
+            self.readOnlyWorkspaces = groceries.get("readOnlyWorkspaces", [])
+            # metadata tags for a read-only sample, if any: these are written to its copies
+            self.workspaceMetadata = groceries.get("workspaceMetadata")
+            # normalizations which have already been focussed, by grouping index, if any:
+            #   these are neither modified nor deleted
+            self.sharedNormalizations = groceries.get("focussedNormalizationWorkspaces", {})
     """
 
+    def __init__(self, utensils: Utensils = None):
+        super().__init__(utensils)
+        # focussed normalizations shared between the runs of a batch, by grouping index: see `cater`
+        self.sharedNormalizations: Dict[int, str] = {}
+        # input workspaces which must be cloned before they are modified: see `execute`
+        self.readOnlyWorkspaces: List[str] = []
+        # metadata tags to write to the copies of a read-only sample: see `execute`
+        self.workspaceMetadata: Optional[WorkspaceMetadata] = None
+
     def logger(self):
         return logger
 
@@ -63,6 +88,10 @@ class ReductionRecipe(Recipe[Ingredients]):
         self.normalizationWs = groceries.get("normalizationWorkspace", "")
         self.maskWs = groceries.get("maskWorkspace", "")
         self.groupingWorkspaces = groceries["groupingWorkspaces"]
+        self.readOnlyWorkspaces = groceries.get("readOnlyWorkspaces", [])
+        self.workspaceMetadata = groceries.get("workspaceMetadata")
+        if "focussedNormalizationWorkspaces" in groceries:
+            self.sharedNormalizations = dict(groceries["focussedNormalizationWorkspaces"])
 
     def _cloneWorkspace(self, inputWorkspace: str, outputWorkspace: str) -> str:
         self.mantidSnapper.CloneWorkspace(
@@ -81,6 +110,10 @@ class ReductionRecipe(Recipe[Ingredients]):
             self.mantidSnapper.executeQueue()
             return inputWorkspace
 
+    def _writeWorkspaceMetadata(self, workspace: str):
+        if self.workspaceMetadata is not None:
+            WriteWorkspaceMetadata().cook(self.workspaceMetadata, {"workspace": workspace})
+
     def _deleteWorkspace(self, workspace: str):
         self.mantidSnapper.DeleteWorkspace(
             "Deleting workspace...",
@@ -107,6 +140,7 @@ class ReductionRecipe(Recipe[Ingredients]):
         runNumber, liteMode = workspace.tokens("runNumber", "lite")
         self.unfocWs = wng.run().runNumber(runNumber).lite(liteMode).unit(unitsAbrev).group(wng.Groups.UNFOC).build()
         self._cloneWorkspace(workspace, self.unfocWs)
+        self._writeWorkspaceMetadata(self.unfocWs)
 
         if mask:
             self.mantidSnapper.MaskDetectorFlags(
@@ -158,6 +192,9 @@ class ReductionRecipe(Recipe[Ingredients]):
                     )
                 )
 
+    def _getPreprocessedSampleWorkspaceName(self):
+        return f"preprocessed_sample_{self.ingredients.runNumber}_{wnvf.formatTimestamp(self.ingredients.timestamp)}"
+
     def _getNormalizationWorkspaceName(self, groupingIndex: int):
         return f"reduced_normalization_{groupingIndex}_{wnvf.formatTimestamp(self.ingredients.timestamp)}"
 
@@ -173,7 +210,11 @@ class ReductionRecipe(Recipe[Ingredients]):
         sampleClone = self._cloneWorkspace(self.sampleWs, reducedOutputWs)
         self.groceries["inputWorkspace"] = sampleClone
         normalizationClone = None
-        if self.normalizationWs:
+        if self.sharedNormalizations:
+            # the shared normalization has already been focussed, and is not modified by its application
+            normalizationClone = self.sharedNormalizations[groupingIndex]
+            self.groceries["normalizationWorkspace"] = normalizationClone
+        elif self.normalizationWs:
             normalizationClone = self._cloneWorkspace(
                 self.normalizationWs,
                 self._getNormalizationWorkspaceName(groupingIndex),
@@ -181,20 +222,187 @@ class ReductionRecipe(Recipe[Ingredients]):
             self.groceries["normalizationWorkspace"] = normalizationClone
         return sampleClone, normalizationClone
 
+    def _getGroupMaskCoverage(self, groupingWorkspace: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculate the mask coverage of every group in a grouping workspace at once.
+
+        :param groupingWorkspace: the grouping workspace, with one spectrum per pixel
+        :return: the group IDs, and for each group, the number of masked pixels and the total number of pixels
+        """
+        maskValues = self.mantidSnapper.mtd[self.maskWs].extractY()[:, 0]
+        pixelGroupIDs = self.mantidSnapper.mtd[groupingWorkspace].extractY()[:, 0].astype(int)
+        if len(maskValues) != len(pixelGroupIDs):
+            raise RuntimeError(
+                f"Mask workspace '{self.maskWs}' is not compatible with grouping workspace '{groupingWorkspace}'"
+            )
+
+        # pixels in group zero are not assigned to any group
+        assigned = pixelGroupIDs > 0
+        groupIDs, groupIndices = np.unique(pixelGroupIDs[assigned], return_inverse=True)
+        totalPixels = np.bincount(groupIndices, minlength=len(groupIDs))
+        maskedPixels = np.bincount(groupIndices, weights=(maskValues[assigned] != 0.0), minlength=len(groupIDs))
+        return groupIDs, maskedPixels.astype(int), totalPixels
+
     def _isGroupFullyMasked(self, groupingWorkspace: str) -> bool:
-        maskWorkspace = self.mantidSnapper.mtd[self.maskWs]
-        groupWorkspace = self.mantidSnapper.mtd[groupingWorkspace]
+        groupIDs, maskedPixels, totalPixels = self._getGroupMaskCoverage(groupingWorkspace)
+
+        partiallyMasked = maskedPixels > 0
+        if np.any(partiallyMasked):
+            self.logger().info(
+                f"Masked pixels within {groupingWorkspace} schema: "
+                + ", ".join(
+                    f"group {groupID}: {masked}/{total}"
+                    for groupID, masked, total in zip(
+                        groupIDs[partiallyMasked], maskedPixels[partiallyMasked], totalPixels[partiallyMasked]
+                    )
+                )
+            )
 
-        totalMaskedPixels = 0
-        totalGroupPixels = 0
+        totalGroupPixels = int(np.sum(totalPixels))
+        return totalGroupPixels > 0 and int(np.sum(maskedPixels)) == totalGroupPixels
 
-        for i in range(groupWorkspace.getNumberHistograms()):
-            group_spectra = groupWorkspace.readY(i)
-            for spectrumIndex in group_spectra:
-                if maskWorkspace.readY(int(spectrumIndex))[0] == 1:
-                    totalMaskedPixels += 1
-                totalGroupPixels += 1
-        return totalMaskedPixels == totalGroupPixels
+    def _preprocessNormalization(self):
+        self._applyRecipe(
+            PreprocessReductionRecipe,
+            self.ingredients.preprocess(),
+            inputWorkspace=self.normalizationWs,
+            **({"maskWorkspace": self.maskWs} if self.maskWs else {}),
+        )
+        self._cloneIntermediateWorkspace(self.normalizationWs, "normalization_preprocessed")
+
+    def _focusNormalization(self, normalizationClone: str, groupingIndex: int):
+        self._applyRecipe(
+            ReductionGroupProcessingRecipe,
+            self.ingredients.groupProcessing(groupingIndex),
+            inputWorkspace=normalizationClone,
+        )
+        self._cloneIntermediateWorkspace(normalizationClone, f"normalization_GroupProcessing_{groupingIndex}")
+        self._applyRecipe(
+            GenerateFocussedVanadiumRecipe,
+            self.ingredients.generateFocussedVanadium(groupingIndex),
+            inputWorkspace=normalizationClone,
+        )
+        self._cloneIntermediateWorkspace(normalizationClone, f"normalization_FoocussedVanadium_{groupingIndex}")
+
+    def _prepareSharedNormalizations(self, groupingIndices: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """
+        Preprocess the normalization once, and then focus it once for each grouping,
+        so that it can be applied to every run in a batch.
+
+        :param groupingIndices: the groupings for which to focus the normalization, or None for every grouping
+        :return: the focussed normalization workspaces, by grouping index
+        """
+        self._preprocessNormalization()
+        sharedNormalizations = {}
+        if groupingIndices is None:
+            groupingIndices = range(len(self.groupingWorkspaces))
+        for groupingIndex in groupingIndices:
+            groupingWs = self.groupingWorkspaces[groupingIndex]
+            self.groceries["groupingWorkspace"] = groupingWs
+            if self.maskWs and self._isGroupFullyMasked(groupingWs):
+                continue
+            normalizationClone = self._cloneWorkspace(
+                self.normalizationWs,
+                self._getNormalizationWorkspaceName(groupingIndex),
+            )
+            self._focusNormalization(normalizationClone, groupingIndex)
+            sharedNormalizations[groupingIndex] = normalizationClone
+        return sharedNormalizations
+
+    def _processGrouping(self, groupingIndex: int, groupingWs: str) -> Optional[str]:
+        """
+        Process the sample and normalization for a single grouping.
+
+        :return: the reduced output workspace, or None if the group is fully masked
+        """
+        self.groceries["groupingWorkspace"] = groupingWs
+
+        if self.maskWs and self._isGroupFullyMasked(groupingWs):
+            # Notify the user of a fully masked group, but continue with the workflow
+            self.logger().warning(
+                f"\nAll pixels masked within {groupingWs} schema.\n"
+                + "Skipping all algorithm execution for this group.\n"
+                + "This will affect future reductions."
+            )
+            return None
+
+        sampleClone, normalizationClone = self._prepGroupingWorkspaces(groupingIndex)
+
+        # 2. ReductionGroupProcessingRecipe
+        self._applyRecipe(
+            ReductionGroupProcessingRecipe,
+            self.ingredients.groupProcessing(groupingIndex),
+            inputWorkspace=sampleClone,
+        )
+        self._cloneIntermediateWorkspace(sampleClone, f"sample_GroupProcessing_{groupingIndex}")
+
+        # 3. GenerateFocussedVanadiumRecipe
+        if not self.sharedNormalizations:
+            self._focusNormalization(normalizationClone, groupingIndex)
+
+        # if there was no normalization and the user elected to use artificial normalization
+        # generate one given the params and the processed sample data
+        # Skipping the above steps as they are accounted for in generating the artificial normalization
+        if self.ingredients.artificialNormalizationIngredients:
+            normalizationClone = self._prepareArtificialNormalization(sampleClone, groupingIndex)
+
+        # 4. ApplyNormalizationRecipe
+        self._applyRecipe(
+            ApplyNormalizationRecipe,
+            self.ingredients.applyNormalization(groupingIndex),
+            inputWorkspace=sampleClone,
+            normalizationWorkspace=normalizationClone,
+        )
+        self._cloneIntermediateWorkspace(sampleClone, f"sample_ApplyNormalization_{groupingIndex}")
+
+        # Cleanup
+        if self.normalizationWs and not self.sharedNormalizations:
+            self._deleteWorkspace(normalizationClone)
+
+        return sampleClone
+
+    def _processGroupings(self) -> List[Optional[str]]:
+        """
+        Process every grouping, either sequentially or, if 'reduction.groupings.parallel' is set,
+        concurrently on a pool of at most 'reduction.groupings.maxConcurrent' threads.
+
+        :return: the reduced output workspaces, in the order of the grouping workspaces
+        """
+        nGroupings = len(self.groupingWorkspaces)
+        durations: List[float] = [0.0] * nGroupings
+
+        def timed(worker: "ReductionRecipe", groupingIndex: int, groupingWs: str) -> Optional[str]:
+            start = time.perf_counter()
+            output = worker._processGrouping(groupingIndex, groupingWs)
+            durations[groupingIndex] = time.perf_counter() - start
+            return output
+
+        start = time.perf_counter()
+        parallel = Config["reduction.groupings.parallel"] and nGroupings > 1
+        if parallel:
+            # Each grouping is processed by its own copy of this recipe,
+            #   so that the groceries and the algorithm queue are not shared between threads.
+            workers = [self._groupingWorker() for _ in range(nGroupings)]
+            # Each grouping in progress holds its own clones of the sample and normalization.
+            maxWorkers = min(Config["reduction.groupings.maxConcurrent"], nGroupings)
+            with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+                outputs = list(executor.map(timed, workers, range(nGroupings), self.groupingWorkspaces))
+        else:
+            outputs = [timed(self, n, groupingWs) for n, groupingWs in enumerate(self.groupingWorkspaces)]
+        elapsed = time.perf_counter() - start
+
+        self.logger().info(
+            f"Processed {nGroupings} groupings {'concurrently' if parallel else 'sequentially'}"
+            f" in {elapsed:.2f}s (sum over groupings: {sum(durations):.2f}s,"
+            f" speedup: {sum(durations) / elapsed if elapsed > 0.0 else 1.0:.2f}x)"
+        )
+        return outputs
+
+    def _groupingWorker(self) -> "ReductionRecipe":
+        worker = ReductionRecipe()
+        worker.__dict__.update({k: v for k, v in self.__dict__.items() if k != "mantidSnapper"})
+        worker.groceries = self.groceries.copy()
+        return worker
 
     def queueAlgos(self):
         pass
@@ -208,6 +416,12 @@ class ReductionRecipe(Recipe[Ingredients]):
 
         # 1. PreprocessReductionRecipe
         outputs = []
+        sampleIsReadOnly = self.sampleWs in self.readOnlyWorkspaces
+        if sampleIsReadOnly:
+            # copy-on-write: the sample is preprocessed in place
+            self.sampleWs = self._cloneWorkspace(self.sampleWs, self._getPreprocessedSampleWorkspaceName())
+            # the shared sample is not tagged: only its copy is
+            self._writeWorkspaceMetadata(self.sampleWs)
         self._applyRecipe(
             PreprocessReductionRecipe,
             self.ingredients.preprocess(),
@@ -215,70 +429,14 @@ class ReductionRecipe(Recipe[Ingredients]):
             **({"maskWorkspace": self.maskWs} if self.maskWs else {}),
         )
         self._cloneIntermediateWorkspace(self.sampleWs, "sample_preprocessed")
-        self._applyRecipe(
-            PreprocessReductionRecipe,
-            self.ingredients.preprocess(),
-            inputWorkspace=self.normalizationWs,
-            **({"maskWorkspace": self.maskWs} if self.maskWs else {}),
-        )
-        self._cloneIntermediateWorkspace(self.normalizationWs, "normalization_preprocessed")
-
-        for groupingIndex, groupingWs in enumerate(self.groupingWorkspaces):
-            self.groceries["groupingWorkspace"] = groupingWs
-
-            if self.maskWs and self._isGroupFullyMasked(groupingWs):
-                # Notify the user of a fully masked group, but continue with the workflow
-                self.logger().warning(
-                    f"\nAll pixels masked within {groupingWs} schema.\n"
-                    + "Skipping all algorithm execution for this group.\n"
-                    + "This will affect future reductions."
-                )
-                continue
-
-            sampleClone, normalizationClone = self._prepGroupingWorkspaces(groupingIndex)
-
-            # 2. ReductionGroupProcessingRecipe
-            self._applyRecipe(
-                ReductionGroupProcessingRecipe,
-                self.ingredients.groupProcessing(groupingIndex),
-                inputWorkspace=sampleClone,
-            )
-            self._cloneIntermediateWorkspace(sampleClone, f"sample_GroupProcessing_{groupingIndex}")
-            self._applyRecipe(
-                ReductionGroupProcessingRecipe,
-                self.ingredients.groupProcessing(groupingIndex),
-                inputWorkspace=normalizationClone,
-            )
-            self._cloneIntermediateWorkspace(normalizationClone, f"normalization_GroupProcessing_{groupingIndex}")
-
-            # 3. GenerateFocussedVanadiumRecipe
-            self._applyRecipe(
-                GenerateFocussedVanadiumRecipe,
-                self.ingredients.generateFocussedVanadium(groupingIndex),
-                inputWorkspace=normalizationClone,
-            )
-            self._cloneIntermediateWorkspace(normalizationClone, f"normalization_FoocussedVanadium_{groupingIndex}")
-
-            # if there was no normalization and the user elected to use artificial normalization
-            # generate one given the params and the processed sample data
-            # Skipping the above steps as they are accounted for in generating the artificial normalization
-            if self.ingredients.artificialNormalizationIngredients:
-                normalizationClone = self._prepareArtificialNormalization(sampleClone, groupingIndex)
-
-            # 4. ApplyNormalizationRecipe
-            self._applyRecipe(
-                ApplyNormalizationRecipe,
-                self.ingredients.applyNormalization(groupingIndex),
-                inputWorkspace=sampleClone,
-                normalizationWorkspace=normalizationClone,
-            )
-            self._cloneIntermediateWorkspace(sampleClone, f"sample_ApplyNormalization_{groupingIndex}")
-
-            # Cleanup
-            outputs.append(sampleClone)
+        if not self.sharedNormalizations:
+            self._preprocessNormalization()
 
-            if self.normalizationWs:
-                self._deleteWorkspace(normalizationClone)
+        # 2. - 4. the processing chain for each grouping
+        outputs.extend(ws for ws in self._processGroupings() if ws is not None)
+        if sampleIsReadOnly:
+            # the preprocessed sample has been cloned for each grouping
+            self._deleteWorkspace(self.sampleWs)
 
         if self.maskWs:
             outputs.append(self.maskWs)
@@ -295,13 +453,54 @@ class ReductionRecipe(Recipe[Ingredients]):
         self.prep(ingredients, groceries)
         return self.execute()
 
-    def cater(self, shipment: List[Pallet]) -> List[Dict[str, Any]]:
+    def focusNormalizations(
+        self, ingredients: Ingredients, groceries: Dict[str, Any], groupingIndices: Optional[Iterable[int]] = None
+    ) -> Dict[int, str]:
+        """
+        A secondary interface method for the recipe.
+        Preprocess and focus the normalization, without reducing the sample:
+        the focussed normalizations may then be passed to `cook` or `cater`
+        as the "focussedNormalizationWorkspaces" grocery, and they are owned by the caller.
+        Groupings which are fully masked are skipped.
+
+        :param groupingIndices: the groupings for which to focus the normalization, or None for every grouping
+        :return: the focussed normalization workspaces, by grouping index
+        """
+        self.prep(ingredients, groceries)
+        return self._prepareSharedNormalizations(groupingIndices)
+
+    def cater(self, shipment: Iterable[Pallet]) -> List[Dict[str, Any]]:
         """
         A secondary interface method for the recipe.
         It is a batched version of cook.
         Given a shipment of ingredients and groceries, it prepares, executes and returns the final workspaces.
+
+        The pallets of a shipment must share their state, grouping workspaces, normalization and pixel masks:
+        the normalization is then preprocessed and focussed only once for each grouping.
+        The shipment may be a generator, so that sample runs can be loaded as they are reduced.
         """
+        pallets = iter(shipment)
+        firstPallet = next(pallets, None)
+        if firstPallet is None:
+            return []
+        ingredients, groceries = firstPallet
+        if (
+            not groceries.get("normalizationWorkspace")
+            or ingredients.artificialNormalizationIngredients
+            or "focussedNormalizationWorkspaces" in groceries
+        ):
+            # there is no normalization to share, or it has already been focussed
+            return [self.cook(ingredients_, groceries_) for ingredients_, groceries_ in chain([firstPallet], pallets)]
+
+        self.prep(ingredients, groceries)
+        self.sharedNormalizations = self._prepareSharedNormalizations()
         output = []
-        for ingredient, grocery in shipment:
-            output.append(self.cook(ingredient, grocery))
+        try:
+            for ingredients_, groceries_ in chain([firstPallet], pallets):
+                self.prep(ingredients_, groceries_)
+                output.append(self.execute())
+        finally:
+            for normalizationWs in self.sharedNormalizations.values():
+                self._deleteWorkspace(normalizationWs)
+            self.sharedNormalizations = {}
         return output
@@ -1,3 +1,6 @@
+from itertools import chain
+
+import numpy as np
 from mantid.api import (
     AlgorithmFactory,
     ITableWorkspaceProperty,
@@ -13,6 +16,8 @@ from mantid.simpleapi import (
     mtd,
 )
 
+from snapred.meta.mantid.TableColumns import appendTableColumns
+
 
 class CalculateDiffCalTable(PythonAlgorithm):
     """
@@ -54,28 +59,25 @@ class CalculateDiffCalTable(PythonAlgorithm):
             BinWidth=abs(self.getProperty("BinWidth").value),
         )
         tmpDifcWS = mtd[tmpDifc]
-        difcs = [float(x) for x in tmpDifcWS.extractY()]
+
+        # one row per detector, in the order of the spectra
+        detids = [
+            tmpDifcWS.getSpectrum(wkspIndx).getDetectorIDs() for wkspIndx in range(tmpDifcWS.getNumberHistograms())
+        ]
+        counts = np.fromiter(map(len, detids), dtype=int, count=len(detids))
+        detid = np.fromiter(chain.from_iterable(detids), dtype=np.int32, count=int(counts.sum()))
+        difc = np.repeat(tmpDifcWS.extractY()[:, 0].astype(float), counts)
+        zeros = np.zeros_like(difc)
 
         # convert the calibration workspace into a calibration table
         DIFCtable = CreateEmptyTableWorkspace(
             OutputWorkspace=self.getPropertyValue("CalibrationTable"),
         )
-        DIFCtable.addColumn(type="int", name="detid", plottype=6)
-        DIFCtable.addColumn(type="double", name="difc", plottype=6)
-        DIFCtable.addColumn(type="double", name="difa", plottype=6)
-        DIFCtable.addColumn(type="double", name="tzero", plottype=6)
-
-        for wkspIndx, difc in enumerate(difcs):
-            detids = tmpDifcWS.getSpectrum(wkspIndx).getDetectorIDs()
-            for detid in detids:
-                DIFCtable.addRow(
-                    {
-                        "detid": int(detid),
-                        "difc": float(difc),
-                        "difa": 0.0,
-                        "tzero": 0.0,
-                    }
-                )
+        appendTableColumns(
+            DIFCtable,
+            {"detid": detid, "difc": difc, "difa": zeros, "tzero": zeros},
+            plotType=6,
+        )
         DeleteWorkspace(
             Workspace=tmpDifc,
         )
@@ -61,46 +61,64 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
         self.outputWorkspaceName = self.getPropertyValue("OutputWorkspace")
 
     def peakClip(self, data, winSize: int, decrese: bool, LLS: bool, smoothing: float):
-        # Clipping peaks from the data with optional smoothing and transformations
-        startData = np.copy(data)
+        # Clipping peaks from a single spectrum: see `peakClipSpectra`
+        return self.peakClipSpectra(np.atleast_2d(data), winSize, decrese, LLS, smoothing)[0]
+
+    def peakClipSpectra(self, data, winSize: int, decrese: bool, LLS: bool, smoothing: float):
+        # Clipping peaks from a 2-D array of spectra (one spectrum per row, all of the same length),
+        #   with optional smoothing and transformations.
+        # Each clipping pass is a sequential recurrence along the bins: the value at bin `i` depends on the
+        #   already-clipped values to its left.  To remain bit-identical with the per-spectrum loop,
+        #   the bins are traversed in order, but each step is evaluated for all spectra,
+        #   and all of the window pairs, at once.
+        startData = np.array(data, dtype=float, ndmin=2)
+        data = startData
         window = winSize
         if smoothing > 0:
-            data = self.smooth(data, smoothing)
+            data = self.smoothSpectra(data, smoothing)
 
         if LLS:
             data = self.LLSTransformation(data)
 
         temp = data.copy()
+        nBins = temp.shape[1]
         scan = list(range(window + 1, 0, -1)) if decrese else list(range(1, window + 1))
 
         for w in scan:
-            for i in range(len(temp)):
-                if i < w or i > (len(temp) - w - 1):
-                    continue
-                winArray = temp[i - w : i + w + 1].copy()
-                winArrayReversed = winArray[::-1]
-                average = (winArray + winArrayReversed) / 2
-                temp[i] = np.min(average[: int(len(average) / 2)])
+            for i in range(w, nBins - w):
+                # pairs `(i - w + k, i + w - k)` for `k` in `[0, w)`
+                temp[:, i] = np.min((temp[:, i - w : i] + temp[:, i + w : i : -1]) / 2, axis=1)
 
         if LLS:
             temp = self.InvLLSTransformation(temp)
 
-        index = np.where((startData - temp) == min(startData - temp))[0][0]
-        output = temp * (startData[index] / temp[index])
+        index = np.argmin(startData - temp, axis=1)
+        rows = np.arange(temp.shape[0])
+        output = temp * (startData[rows, index] / temp[rows, index])[:, np.newaxis]
         return output
 
     def smooth(self, data, order):
-        # Applies smoothing to the data
-        sm = np.zeros(len(data))
+        # Applies smoothing to a single spectrum
+        return self.smoothSpectra(np.atleast_2d(data), order)[0]
+
+    def smoothSpectra(self, data, order):
+        # Applies triangular-weighted smoothing to each row of a 2-D array of spectra.
+        # Terms are accumulated in the same order as a per-bin sum over `[i - order / 2, i + order / 2]`,
+        #   truncated at the spectrum boundaries.
+        data = np.array(data, dtype=float, ndmin=2)
+        nBins = data.shape[1]
+        halfWidth = int(order / 2)
         factor = order / 2 + 1
-        for i in range(len(data)):
-            temp = 0
-            ave = 0
-            for r in range(max(0, i - int(order / 2)), min(i + int(order / 2), len(data) - 1) + 1):
-                temp += (factor - abs(r - i)) * data[r]
-                ave += factor - abs(r - i)
-            sm[i] = temp / ave
-        return sm
+        temp = np.zeros(data.shape)
+        ave = np.zeros(nBins)
+        for offset in range(-halfWidth, halfWidth + 1):
+            start, stop = max(0, -offset), min(nBins, nBins - offset)
+            if start >= stop:
+                continue
+            weight = factor - abs(offset)
+            temp[:, start:stop] += weight * data[:, start + offset : stop + offset]
+            ave[start:stop] += weight
+        return temp / ave
 
     def LLSTransformation(self, input):  # noqa: A002
         # Applies LLS transformation to emphasize weaker peaks
@@ -140,17 +158,22 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
         self.inputWorkspace = self.mantidSnapper.mtd[self.inputWorkspaceName]
         self.outputWorkspace = self.mantidSnapper.mtd[self.outputWorkspaceName]
 
-        # Apply peak clipping to each histogram in the workspace
+        # Apply peak clipping to all histograms in the workspace:
+        #   histograms are clipped together as 2-D arrays, one array for each distinct histogram length.
+        spectraByLength = {}
         for i in range(self.outputWorkspace.getNumberHistograms()):
-            dataY = self.outputWorkspace.readY(i)
-            clippedData = self.peakClip(
+            spectraByLength.setdefault(len(self.outputWorkspace.readY(i)), []).append(i)
+        for indices in spectraByLength.values():
+            dataY = np.array([self.outputWorkspace.readY(i) for i in indices])
+            clippedData = self.peakClipSpectra(
                 data=dataY,
                 winSize=self.peakWindowClippingSize,
                 decrese=self.decreaseParameter,
                 LLS=self.LSS,
                 smoothing=self.smoothingParameter,
             )
-            self.outputWorkspace.setY(i, clippedData)
+            for i, clippedY in zip(indices, clippedData):
+                self.outputWorkspace.setY(i, clippedY)
 
         # Set the output workspace property
         self.setProperty("OutputWorkspace", self.outputWorkspaceName)
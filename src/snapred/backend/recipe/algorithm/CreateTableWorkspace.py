@@ -4,6 +4,7 @@ from mantid.kernel import Direction
 from mantid.kernel import ULongLongPropertyWithValue as PointerProperty
 from mantid.simpleapi import CreateEmptyTableWorkspace
 
+from snapred.meta.mantid.TableColumns import appendTableColumns
 from snapred.meta.pointer import access_pointer
 
 
@@ -34,17 +35,15 @@ class CreateTableWorkspace(PythonAlgorithm):
         ws = CreateEmptyTableWorkspace(
             OutputWorkspace=outputWorkspace,
         )
-        # add the columns
+        # add the columns, and all the data in the columns
+        columnTypes = {}
         for colname in colnames:
             coltype = type((data[colname][-1:] or [""])[0])
             if coltype is float:
                 coltype = "double"
             else:
                 coltype = coltype.__name__
-
-            ws.addColumn(type=coltype, name=colname)
-        # now add all the data in the columns
-        for i in range(length):
-            ws.addRow({colname: data[colname][i] for colname in colnames})
+            columnTypes[colname] = coltype
+        appendTableColumns(ws, data, columnTypes)
 
         self.setProperty("OutputWorkspace", ws)
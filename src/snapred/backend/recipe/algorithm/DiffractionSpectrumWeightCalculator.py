@@ -9,6 +9,8 @@ from mantid.kernel import Direction
 from snapred.backend.dao.GroupPeakList import GroupPeakList
 from snapred.backend.log.logger import snapredLogger
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
+from snapred.meta.mantid.PeakWindows import peakWindowMask, peakWindowMasks
+from snapred.meta.mantid.SplineSmoothing import readSpectra, writeSpectra
 
 logger = snapredLogger.getLogger(__name__)
 
@@ -80,19 +82,23 @@ class DiffractionSpectrumWeightCalculator(PythonAlgorithm):
         self.unbagGroceries()
 
         weight_ws = self.mantidSnapper.mtd[self.weightWorkspaceName]
-        for index, groupID in enumerate(self.groupIDs):
-            # get spectrum X,Y
-            x = weight_ws.readX(index)
-            y = weight_ws.readY(index)
-
-            # create and initialize a weights array
-            weights = np.ones(len(y))
-            # for each peak extent, set zeros to the weights array
-            for peak in self.predictedPeaks[groupID]:
-                mask_indices = np.where(np.logical_and(x > peak.position.minimum, x < peak.position.maximum))[0]
-                mask_indices = mask_indices[mask_indices < len(weights)]
-                weights[mask_indices] = 0.0
-            weight_ws.setY(index, weights)
+        x, y = readSpectra(weight_ws)
+
+        # for each spectrum, the extents of its group's peaks
+        windows = []
+        for groupID in self.groupIDs:
+            peaks = self.predictedPeaks[groupID]
+            windows.append(([peak.position.minimum for peak in peaks], [peak.position.maximum for peak in peaks]))
+
+        # set zeros to the weights within any peak extent
+        if isinstance(y, np.ndarray):
+            # when the x-values are common to all spectra, the peak extents of every group are located at once
+            commonX = len(x) > 0 and np.all(x == x[0])
+            masks = peakWindowMasks(x[0] if commonX else x, windows, y.shape[1])
+        else:
+            masks = [peakWindowMask(xn, windowsn, len(yn)) for xn, yn, windowsn in zip(x, y, windows)]
+        weights = [np.where(mask, 0.0, 1.0) for mask in masks]
+        writeSpectra(weight_ws, weights)
 
         if self.isEventWorkspace:
             self.mantidSnapper.ConvertToEventWorkspace(
@@ -4,6 +4,7 @@ from mantid.api import AlgorithmFactory, ITableWorkspaceProperty, PropertyMode,
 from mantid.kernel import Direction
 
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
+from snapred.meta.mantid.TableColumns import appendTableColumns
 
 
 class GenerateTableWorkspaceFromListOfDict(PythonAlgorithm):
@@ -34,15 +35,11 @@ class GenerateTableWorkspaceFromListOfDict(PythonAlgorithm):
             return
 
         firstRow = listOfDict[0]
+        columnTypes = {}
         for key in firstRow.keys():
             _type = type(firstRow[key])
-            if _type is float:
-                ws.addColumn(type="double", name=key)
-            else:
-                ws.addColumn(type=_type.__name__, name=key)
-
-        for row in listOfDict:
-            ws.addRow([row[key] for key in row.keys()])
+            columnTypes[key] = "double" if _type is float else _type.__name__
+        appendTableColumns(ws, {key: [row[key] for row in listOfDict] for key in firstRow.keys()}, columnTypes)
 
         self.setProperty("OutputWorkspace", outputWorkspace)
         return
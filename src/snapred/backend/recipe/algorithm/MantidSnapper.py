@@ -1,4 +1,5 @@
 from collections import namedtuple
+from typing import Dict, Tuple
 
 from mantid.api import AlgorithmManager, Progress, mtd
 from mantid.kernel import Direction
@@ -14,6 +15,9 @@ from snapred.meta.pointer import access_pointer, create_pointer
 
 logger = snapredLogger.getLogger(__name__)
 
+# the name, direction and type of an algorithm property
+_PropertySchema = namedtuple("_PropertySchema", ["name", "direction", "type"])
+
 
 class _CustomMtd:
     def __getitem__(self, key):
@@ -37,6 +41,12 @@ class MantidSnapper:
     typeTranslationTable = {"string": str, "number": float, "dbl list": list, "boolean": bool}
     _mtd = _CustomMtd()
 
+    # Process-wide caches:
+    #   the property schema of each algorithm, by algorithm name (the latest version is always used);
+    _schemaCache: Dict[str, Dict[str, _PropertySchema]] = {}
+    #   the named-tuple type of the outputs, by algorithm name and output-property names.
+    _outputsTypeCache: Dict[Tuple[str, Tuple[str, ...]], type] = {}
+
     def __init__(self, parentAlgorithm, name):
         """
                                         :;:::::;:
@@ -79,21 +89,52 @@ class MantidSnapper:
         callbackType = self.typeTranslationTable.get(prop.type, str)
         return callback(callbackType)
 
+    @classmethod
+    def algorithmSchema(cls, name: str) -> Dict[str, _PropertySchema]:
+        """
+        The properties of an algorithm, by property name.
+        Creating an algorithm just to inspect its properties is expensive: the schemas are cached.
+        """
+        schema = cls._schemaCache.get(name)
+        if schema is None:
+            mantidAlgorithm = AlgorithmManager.create(name)
+            schema = {
+                prop.name: _PropertySchema(prop.name, Direction.values[prop.direction], prop.type)
+                for prop in mantidAlgorithm.getProperties()
+            }
+            # remove mantid algorithm from managed algorithms
+            AlgorithmManager.removeById(mantidAlgorithm.getAlgorithmID())
+            cls._schemaCache[name] = schema
+        return schema
+
+    @classmethod
+    def _outputsType(cls, name: str, outputNames: Tuple[str, ...]) -> type:
+        outputsType = cls._outputsTypeCache.get((name, outputNames))
+        if outputsType is None:
+            outputsType = namedtuple("{}Outputs".format(name), outputNames)
+            cls._outputsTypeCache[(name, outputNames)] = outputsType
+        return outputsType
+
+    @classmethod
+    def clearSchemaCache(cls):
+        cls._schemaCache.clear()
+        cls._outputsTypeCache.clear()
+
     def __getattr__(self, key):
         def enqueueAlgorithm(message, **kwargs):
             self._endrange += 1
             # inspect mantid algorithm for output properties
             # if there are any, add them to a list for return
             outputProperties = {}
-            mantidAlgorithm = AlgorithmManager.create(key)
+            schema = self.algorithmSchema(key)
             # get all output props
-            for prop in mantidAlgorithm.getProperties():
-                if Direction.values[prop.direction] == Direction.Output:
+            for prop in schema.values():
+                if prop.direction == Direction.Output:
                     outputProperties[prop.name] = self.createOutputCallback(prop)
             # get only set inout props
-            for propName in set(kwargs.keys()).difference(mantidAlgorithm.getProperties()):
-                prop = mantidAlgorithm.getProperty(propName)
-                if Direction.values[prop.direction] == Direction.InOut:
+            for propName in kwargs:
+                prop = schema.get(propName)
+                if prop is not None and prop.direction == Direction.InOut:
                     outputProperties[prop.name] = self.createOutputCallback(prop)
 
             # TODO: Special cases are bad
@@ -105,17 +146,14 @@ class MantidSnapper:
                 if kwargs.get("MakeCalWorkspace", True):
                     outputProperties["CalWorkspace"] = kwargs["WorkspaceName"] + "_cal"
 
-            # remove mantid algorithm from managed algorithms
-            AlgorithmManager.removeById(mantidAlgorithm.getAlgorithmID())
-            # if only one property is returned, return it directly
-
             self._algorithmQueue.append((key, message, kwargs, outputProperties))
 
+            # if only one property is returned, return it directly
             if len(outputProperties) == 1:
                 (outputProperties,) = outputProperties.values()
             else:
                 # Convert to tuple for a more pythonic return
-                NamedOutputsTuple = namedtuple("{}Outputs".format(key), outputProperties.keys())
+                NamedOutputsTuple = self._outputsType(key, tuple(outputProperties.keys()))
                 outputProperties = NamedOutputsTuple(**outputProperties)
 
             return outputProperties
@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Dict, Tuple
 
+import numpy as np
 from mantid.api import (
     AlgorithmFactory,
     MatrixWorkspaceProperty,
@@ -59,17 +60,40 @@ class MaskDetectorFlags(PythonAlgorithm):
     def unbagGroceries(self):
         pass
 
-    def PyExec(self) -> None:
-        # Set the detector mask flags from the mask workspace values
+    def detectorIndexMap(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Map the non-monitor detectors of the output workspace to the spectra of the mask workspace.
+        # Warning: <detector info>.indexOf(id_) != <mask workspace index of detectors excluding monitors>
         detectors = self.outputWS.detectorInfo()
         ids = detectors.detectorIDs()
+        # by definition, the detector-info index is the position in the `detectorIDs()` array
+        if self.outputWS.getInstrument().getNumberDetectors(True) == len(ids):
+            # no monitors: the monitor flags don't need to be read
+            detectorIndices = np.arange(len(ids))
+        else:
+            isMonitor = np.fromiter((detectors.isMonitor(ix) for ix in range(len(ids))), dtype=bool, count=len(ids))
+            detectorIndices = np.flatnonzero(~isMonitor)
+        maskIndices = np.asarray(self.maskWS.getIndicesFromDetectorIDs(ids[detectorIndices].tolist()), dtype=int)
+        if len(maskIndices) != len(detectorIndices):
+            raise RuntimeError("Mask workspace must have one spectrum per (non-monitor) pixel")
+        return detectorIndices, maskIndices
 
-        # Warning: <detector info>.indexOf(id_) != <mask workspace index of detectors excluding monitors>
-        for id_ in ids:
-            ix = detectors.indexOf(int(id_))
-            if detectors.isMonitor(ix):
-                continue
-            detectors.setMasked(ix, self.maskWS.isMasked(int(id_)))
+    def PyExec(self) -> None:
+        # Set the detector mask flags from the mask workspace values
+        detectors = self.outputWS.detectorInfo()
+        detectorIndices, maskIndices = self.detectorIndexMap()
+        maskValues = self.maskWS.extractY()[:, 0] != 0.0
+        masked = detectorIndices[maskValues[maskIndices]]
+
+        # Monitor flags are not modified: retain them while the detector flags are reset.
+        monitorIndices = np.setdiff1d(np.arange(len(detectors)), detectorIndices, assume_unique=True)
+        maskedMonitors = [int(ix) for ix in monitorIndices if detectors.isMasked(int(ix))]
+
+        # Only the masked detectors need to be set individually.
+        detectors.clearMaskFlags()
+        for ix in masked.tolist():
+            detectors.setMasked(ix, True)
+        for ix in maskedMonitors:
+            detectors.setMasked(ix, True)
         self.setPropertyValue("OutputWorkspace", self.outputWSName)
 
 
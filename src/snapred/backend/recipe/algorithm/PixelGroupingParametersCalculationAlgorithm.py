@@ -1,4 +1,5 @@
 import math
+from typing import Dict
 
 import numpy as np
 from mantid.api import (
@@ -17,6 +18,7 @@ from snapred.backend.dao.state.PixelGroupingParameters import PixelGroupingParam
 from snapred.backend.log.logger import snapredLogger
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
 from snapred.meta.Config import Config
+from snapred.meta.mantid.DetectorIndices import detectorInfoIndices
 from snapred.meta.redantic import list_to_raw
 
 logger = snapredLogger.getLogger(__name__)
@@ -71,6 +73,69 @@ class PixelGroupingParametersCalculationAlgorithm(PythonAlgorithm):
         self.resolutionWorkspaceName: str = "pgp_resolution"  # TODO use WNG
         self.partialResolutionWorkspaceName: str = self.resolutionWorkspaceName + "_partial"
 
+    @staticmethod
+    def azimuthIsPhi(instrument) -> bool:
+        # `PreprocessDetectorsToMD` tabulates the azimuth as `IDetector.getPhi()`: the angle about the z-axis
+        #   from the x-axis, with respect to the origin.  This is `DetectorInfo.azimuthal()`
+        #   when the sample is at the origin, the beam is along +z, and "up" is along +y.
+        samplePos = instrument.getSample().getPos()
+        beamLine = samplePos - instrument.getSource().getPos()
+        up = instrument.getReferenceFrame().vecPointingUp()
+        return (
+            (samplePos.X(), samplePos.Y(), samplePos.Z()) == (0.0, 0.0, 0.0)
+            and beamLine.X() == 0.0
+            and beamLine.Y() == 0.0
+            and beamLine.Z() > 0.0
+            and (up.X(), up.Y(), up.Z()) == (0.0, 1.0, 0.0)
+        )
+
+    def extractDetectorTable(self, workspaceName: str) -> Dict[str, np.ndarray]:
+        """
+        The detector ID, L2, 2theta, azimuth and mask flag of the detector of each spectrum, as arrays:
+        these are tabulated by `PreprocessDetectorsToMD` in a single pass, using Mantid's own geometry.
+        A grouping workspace has one spectrum per (non-monitor) pixel.
+        """
+        tableName = mtd.unique_hidden_name()
+        self.mantidSnapper.PreprocessDetectorsToMD(
+            "Tabulating detector positions...",
+            InputWorkspace=workspaceName,
+            OutputWorkspace=tableName,
+            GetMaskState=True,
+        )
+        self.mantidSnapper.executeQueue()
+        table = self.mantidSnapper.mtd[tableName]
+        detectors = {
+            "detectorID": np.asarray(table.column("DetectorID"), dtype=int),
+            "L2": np.asarray(table.column("L2"), dtype=float),
+            "twoTheta": np.asarray(table.column("TwoTheta"), dtype=float),
+            "azimuth": np.asarray(table.column("Azimuthal"), dtype=float),
+            "isMasked": np.asarray(table.column("detMask"), dtype=int) != 0,
+        }
+        self.mantidSnapper.WashDishes(
+            "Remove the detector table",
+            Workspace=tableName,
+        )
+        self.mantidSnapper.executeQueue()
+
+        workspace = self.mantidSnapper.mtd[workspaceName]
+        if not self.azimuthIsPhi(workspace.getInstrument()):
+            # Only for a non-standard geometry: `DetectorInfo.azimuthal()` for each pixel.
+            detectorInfo = workspace.detectorInfo()
+            detIndices = detectorInfoIndices(detectorInfo.detectorIDs(), detectors["detectorID"])
+            azimuth = np.zeros(len(detIndices))
+            for n, detIndex in enumerate(detIndices.tolist()):
+                try:
+                    azimuth[n] = detectorInfo.azimuthal(detIndex)
+                except RuntimeError as e:
+                    # Also entered as defect EWM#5073:
+                    # `DetectorInfo.azimuthal()` has issues in calculating ambiguous azimuth values:
+                    #   * by convention, these values can be set to zero, without overly affecting the mean value.
+                    if "Failed to create up axis orthogonal to the beam direction" not in str(e):
+                        raise
+                    logger.debug(e)
+            detectors["azimuth"] = azimuth
+        return detectors
+
     def PyExec(self):
         self.log().notice("Calculate pixel grouping state-derived parameters")
 
@@ -129,71 +194,70 @@ class PixelGroupingParametersCalculationAlgorithm(PythonAlgorithm):
         resolutionWS = self.mantidSnapper.mtd[self.resolutionWorkspaceName]
 
         groupIDs = groupingWS.getGroupIDs()
-        detectorInfo = groupingWS.detectorInfo()
-        for groupIndex, groupID in enumerate(groupIDs):
-            detIDs = groupingWS.getDetectorIDsOfGroup(int(groupID))
-
-            groupMeanL2 = 0.0
-
-            groupMin2Theta = 2.0 * np.pi
-            groupMax2Theta = 0.0
-            groupMean2Theta = 0.0
-
-            groupMeanPhi = 0.0
-
-            pixelCount = 0
-            normalizationFactor = 0.0
-            for detID in detIDs:
-                detIndex = detectorInfo.indexOf(int(detID))
-                if detectorInfo.isMonitor(int(detIndex)) or detectorInfo.isMasked(int(detIndex)):
-                    continue
-
-                twoTheta = detectorInfo.twoTheta(int(detIndex))
-                solidAngleFactor = np.sin(twoTheta / 2.0)
-                groupMin2Theta = min(groupMin2Theta, twoTheta)
-                groupMax2Theta = max(groupMax2Theta, twoTheta)
-
-                twoTheta *= solidAngleFactor
-                groupMean2Theta += twoTheta
-
-                try:
-                    phi = detectorInfo.azimuthal(int(detIndex))
-                    phi *= solidAngleFactor
-                    groupMeanPhi += phi
-                except RuntimeError as e:
-                    # Also entered as defect EWM#5073:
-                    # `DetectorInfo.azimuthal()` has issues in calculating ambiguous azimuth values:
-                    #   * by convention, these values can be set to zero, without overly affecting the mean value.
-                    if "Failed to create up axis orthogonal to the beam direction" not in str(e):
-                        raise
-                    logger.debug(e)
-
-                L2 = detectorInfo.l2(int(detIndex))
-                L2 *= solidAngleFactor
-                groupMeanL2 += L2
-
-                normalizationFactor += solidAngleFactor
-                pixelCount += 1
-
-            if pixelCount > 0:
-                if normalizationFactor > np.finfo(float).eps:
-                    groupMeanL2 /= normalizationFactor
-                    groupMean2Theta /= normalizationFactor
-                    groupMeanPhi /= normalizationFactor
-                else:
-                    # special case: all on-axis pixels
-                    groupMeanL2 = 0.0
-                    groupMean2Theta = 0.0
-                    groupMeanPhi = 0.0
+        detectors = self.extractDetectorTable(tmpGroupingWSName)
+
+        # Map the detectors of every group to their detector-table rows in one step:
+        #   pixels are ordered by group index.
+        groupDetIDs = [np.asarray(groupingWS.getDetectorIDsOfGroup(int(groupID)), dtype=int) for groupID in groupIDs]
+        pixelGroupIndices = np.repeat(np.arange(len(groupIDs)), [len(detIDs) for detIDs in groupDetIDs])
+        rows = detectorInfoIndices(
+            detectors["detectorID"], np.concatenate(groupDetIDs) if groupDetIDs else np.empty(0, dtype=int)
+        )
+        L2 = detectors["L2"][rows]
+        twoTheta = detectors["twoTheta"][rows]
+        phi = detectors["azimuth"][rows]
+
+        # Solid-angle-weighted means, and 2theta limits, for all groups at once:
+        #   the detector table has no monitors, so that only masked pixels are excluded.
+        included = ~detectors["isMasked"][rows]
+        groupIndices = pixelGroupIndices[included]
+        includedTwoTheta = twoTheta[included]
+        solidAngleFactor = np.sin(includedTwoTheta / 2.0)
+
+        pixelCounts = np.bincount(groupIndices, minlength=len(groupIDs))
+        normalizationFactors = np.zeros(len(groupIDs))
+        groupMeanL2 = np.zeros(len(groupIDs))
+        groupMean2Theta = np.zeros(len(groupIDs))
+        groupMeanPhi = np.zeros(len(groupIDs))
+        groupMin2Theta = np.full(len(groupIDs), 2.0 * np.pi)
+        groupMax2Theta = np.zeros(len(groupIDs))
+        unmaskedGroups = np.flatnonzero(pixelCounts)
+        if len(unmaskedGroups) > 0:
+            # `groupIndices` is sorted: each group's pixels are contiguous
+            starts = np.searchsorted(groupIndices, unmaskedGroups)
+            normalizationFactors[unmaskedGroups] = np.add.reduceat(solidAngleFactor, starts)
+            groupMeanL2[unmaskedGroups] = np.add.reduceat(L2[included] * solidAngleFactor, starts)
+            groupMean2Theta[unmaskedGroups] = np.add.reduceat(includedTwoTheta * solidAngleFactor, starts)
+            groupMeanPhi[unmaskedGroups] = np.add.reduceat(phi[included] * solidAngleFactor, starts)
+            groupMin2Theta[unmaskedGroups] = np.minimum.reduceat(includedTwoTheta, starts)
+            groupMax2Theta[unmaskedGroups] = np.maximum.reduceat(includedTwoTheta, starts)
+
+        # the first pixel of each group, for any fully-masked group
+        groupSizes = np.bincount(pixelGroupIndices, minlength=len(groupIDs))
+        firstPixels = np.cumsum(groupSizes) - groupSizes
+
+        # special case: all on-axis pixels => mean values are zero
+        normalized = normalizationFactors > np.finfo(float).eps
+        for groupMean in (groupMeanL2, groupMean2Theta, groupMeanPhi):
+            groupMean[normalized] /= normalizationFactors[normalized]
+            groupMean[~normalized] = 0.0
 
+        for groupIndex, groupID in enumerate(groupIDs):
+            if pixelCounts[groupIndex] > 0:
                 dMin = (
-                    self.CONVERSION_FACTOR * (1.0 / (2.0 * math.sin(groupMax2Theta / 2.0))) * self.tofMin / self.L
-                    if groupMax2Theta > np.finfo(float).eps
+                    self.CONVERSION_FACTOR
+                    * (1.0 / (2.0 * math.sin(groupMax2Theta[groupIndex] / 2.0)))
+                    * self.tofMin
+                    / self.L
+                    if groupMax2Theta[groupIndex] > np.finfo(float).eps
                     else 0.0
                 )
                 dMax = (
-                    self.CONVERSION_FACTOR * (1.0 / (2.0 * math.sin(groupMin2Theta / 2.0))) * self.tofMax / self.L
-                    if groupMin2Theta > np.finfo(float).eps
+                    self.CONVERSION_FACTOR
+                    * (1.0 / (2.0 * math.sin(groupMin2Theta[groupIndex] / 2.0)))
+                    * self.tofMax
+                    / self.L
+                    if groupMin2Theta[groupIndex] > np.finfo(float).eps
                     else 0.0
                 )
 
@@ -203,9 +267,9 @@ class PixelGroupingParametersCalculationAlgorithm(PythonAlgorithm):
                     PixelGroupingParameters(
                         groupID=groupID,
                         isMasked=False,
-                        L2=groupMeanL2,
-                        twoTheta=groupMean2Theta,
-                        azimuth=groupMeanPhi,
+                        L2=groupMeanL2[groupIndex],
+                        twoTheta=groupMean2Theta[groupIndex],
+                        azimuth=groupMeanPhi[groupIndex],
                         dResolution=Limit(minimum=dMin, maximum=dMax),
                         dRelativeResolution=delta_d_over_d,
                     )
@@ -220,27 +284,18 @@ class PixelGroupingParametersCalculationAlgorithm(PythonAlgorithm):
                 #     consuming methods need to check either the `PixelGroupingParameters.isMasked` flag,
                 #     or equivalently, test for an _empty_ `dResolution` `Limit` domain.
                 #
-                detIndex = None
-                # Find first non-monitor detector:
-                #   * `DetectorInfo.azimuthal()` will raise an exception when called on a monitor.
-                for detID in detIDs:
-                    detIndex = detectorInfo.indexOf(int(detID))
-                    if not detectorInfo.isMonitor(int(detIndex)):
-                        break
-
-                L2 = detectorInfo.l2(int(detIndex))
-                twoTheta = detectorInfo.twoTheta(int(detIndex))
-                phi = detectorInfo.azimuthal(int(detIndex))
-                dMin = self.CONVERSION_FACTOR * (1.0 / (2.0 * math.sin(twoTheta / 2.0))) * self.tofMin / self.L
+                pixel = firstPixels[groupIndex]
+
+                dMin = self.CONVERSION_FACTOR * (1.0 / (2.0 * math.sin(twoTheta[pixel] / 2.0))) * self.tofMin / self.L
                 delta_d_over_d = resolutionWS.readY(groupIndex)[0]
                 allGroupingParams.append(
                     PixelGroupingParameters(
                         groupID=groupID,
                         # Fully-masked group
                         isMasked=True,
-                        L2=L2,
-                        twoTheta=twoTheta,
-                        azimuth=phi,
+                        L2=L2[pixel],
+                        twoTheta=twoTheta[pixel],
+                        azimuth=phi[pixel],
                         # Empty limit domain
                         dResolution=Limit(minimum=dMin, maximum=dMin),
                         # Resolution value for fully-masked group (as set by `EstimateResolutionDiffraction`):
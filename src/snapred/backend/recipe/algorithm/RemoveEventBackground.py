@@ -18,10 +18,11 @@ from mantid.simpleapi import (
     MakeDirtyDish,
     mtd,
 )
-from scipy.interpolate import make_smoothing_spline
 
 from snapred.backend.dao.GroupPeakList import GroupPeakList
 from snapred.meta.Config import Config
+from snapred.meta.mantid.PeakWindows import interpolatePeakRegions
+from snapred.meta.mantid.SplineSmoothing import readSpectra, smoothSpectra, writeSpectra
 from snapred.meta.pointer import access_pointer
 
 
@@ -128,21 +129,21 @@ class RemoveEventBackground(PythonAlgorithm):
 
         # Replace peak regions with interpolated values from surrounding data
         ws = mtd[self.outputBackgroundWorkspaceName]
+        x, y = readSpectra(ws)
         for groupID in self.groupIDs:
-            for detid in self.groupDetectorIDs[groupID]:
-                y_data = ws.readY(detid).copy()
-                x_data = ws.readX(detid)
-
-                for mask in self.maskRegions[groupID]:
-                    mask_indices = (x_data >= mask[0]) & (x_data <= mask[1])
-                    before_mask = np.where(x_data < mask[0])[0][-1]
-                    after_mask = np.where(x_data > mask[1])[0][0]
-
-                    # Linear interpolation across the masked region
-                    interp_values = np.linspace(y_data[before_mask], y_data[after_mask], mask_indices.sum())
-                    y_data[mask_indices[:-1]] = interp_values
-
-                ws.setY(detid, y_data)
+            regions = ([mask[0] for mask in self.maskRegions[groupID]], [mask[1] for mask in self.maskRegions[groupID]])
+            indices = np.asarray(self.groupDetectorIDs[groupID], dtype=int)
+            if isinstance(y, np.ndarray):
+                # Linear interpolation across the masked regions, for every detector in the group at once
+                x_group, y_group = x[indices], y[indices]
+                if len(x_group) and np.all(x_group == x_group[0]):
+                    x_group = x_group[0]
+                interpolatePeakRegions(x_group, y_group, regions)
+                y[indices] = y_group
+            else:
+                for detid in indices:
+                    interpolatePeakRegions(x[detid], y[detid][np.newaxis, :], regions)
+        writeSpectra(ws, y)
 
         # Apply smoothing to the entire dataset
         self.applySmoothing(ws)
@@ -160,20 +161,13 @@ class RemoveEventBackground(PythonAlgorithm):
         """
         Applies smoothing to the entire workspace data.
         """
-        numSpec = workspace.getNumberHistograms()
-
-        for index in range(numSpec):
-            x = workspace.readX(index)
-            y = workspace.readY(index)
-
-            # Apply spline smoothing to the entire dataset
-            tck = make_smoothing_spline(x[:-1], y, lam=self.smoothingParameter)
-            y_smooth = tck(x[:-1], extrapolate=False)
+        x, y = readSpectra(workspace)
 
-            # Ensure no negative values after smoothing
-            y_smooth[y_smooth < 0] = 0
+        # Apply spline smoothing to the entire dataset, for each spectrum,
+        #   and ensure no negative values after smoothing
+        ySmooth = smoothSpectra([xn[:-1] for xn in x], y, self.smoothingParameter, nonNegative=True)
 
-            workspace.setY(index, y_smooth)
+        writeSpectra(workspace, ySmooth)
 
 
 # Register algorithm with Mantid
@@ -22,10 +22,10 @@ from mantid.api import (
     WorkspaceUnitValidator,
 )
 from mantid.kernel import Direction
-from scipy.interpolate import make_smoothing_spline
 
 from snapred.backend.log.logger import snapredLogger
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
+from snapred.meta.mantid.SplineSmoothing import readSpectra, smoothSpectra, writeSpectra
 
 logger = snapredLogger.getLogger(__name__)
 
@@ -111,29 +111,20 @@ class SmoothDataExcludingPeaksAlgo(PythonAlgorithm):
         outputWorkspace = self.mantidSnapper.mtd[self.outputWorkspaceName]
         weightWorkspace = self.mantidSnapper.mtd[self.weightWorkspaceName]
 
-        numSpec = weightWorkspace.getNumberHistograms()
+        x, y = readSpectra(inputWorkspace)
+        weightX, weightY = readSpectra(weightWorkspace)
 
-        for index in range(numSpec):
-            x = inputWorkspace.readX(index)
-            y = inputWorkspace.readY(index)
+        xMidpoints = [(xn[:-1] + xn[1:]) / 2 for xn in x]
+        weightXMidpoints = [(xn[:-1] + xn[1:]) / 2 for xn in weightX]
+        mask = [yn != 0 for yn in weightY]
 
-            weightX = weightWorkspace.readX(index)
-            weightY = weightWorkspace.readY(index)
-
-            weightXMidpoints = (weightX[:-1] + weightX[1:]) / 2
-            xMidpoints = (x[:-1] + x[1:]) / 2
-
-            weightXMidpoints = weightXMidpoints[weightY != 0]
-            y = y[weightY != 0]
-
-            # throw an exception if y or weightXMidpoints are empty
-            if len(y) == 0 or len(weightXMidpoints) == 0:
-                raise ValueError("No data in the workspace, all data removed by peak removal.")
-            # Generate spline with purged dataset
-            tck = make_smoothing_spline(weightXMidpoints, y, lam=self.lam)
-            # fill in the removed data using the spline function and original datapoints
-            smoothing_results = tck(xMidpoints, extrapolate=False)
-            outputWorkspace.setY(index, smoothing_results)
+        # throw an exception if any spectrum has no data left after peak removal
+        if not all(maskn.any() for maskn in mask):
+            raise ValueError("No data in the workspace, all data removed by peak removal.")
+        # Generate a spline for each purged spectrum,
+        #   and fill in the removed data using the spline function and original datapoints
+        smoothingResults = smoothSpectra(xMidpoints, y, self.lam, xFit=weightXMidpoints, mask=mask)
+        writeSpectra(outputWorkspace, smoothingResults)
 
         self.mantidSnapper.WashDishes(
             "Cleaning up weight workspace...",
@@ -1,7 +1,9 @@
+import hashlib
 import json
+import time
 from collections.abc import Iterable
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from snapred.backend.dao.ingredients import (
     ArtificialNormalizationIngredients,
@@ -17,6 +19,7 @@ from snapred.backend.dao.request import (
 )
 from snapred.backend.dao.request.ReductionRequest import Versions
 from snapred.backend.dao.response.ReductionResponse import ReductionResponse
+from snapred.backend.dao.response.StateIdsResponse import StateIdsResponse
 from snapred.backend.dao.SNAPRequest import SNAPRequest
 from snapred.backend.dao.WorkspaceMetadata import DiffcalStateMetadata, NormalizationStateMetadata, WorkspaceMetadata
 from snapred.backend.data.DataExportService import DataExportService
@@ -32,6 +35,7 @@ from snapred.backend.recipe.ReductionGroupProcessingRecipe import ReductionGroup
 from snapred.backend.recipe.ReductionRecipe import ReductionRecipe
 from snapred.backend.service.Service import Service
 from snapred.backend.service.SousChef import SousChef
+from snapred.meta.Config import Config
 from snapred.meta.decorators.FromString import FromString
 from snapred.meta.decorators.Singleton import Singleton
 from snapred.meta.mantid.WorkspaceNameGenerator import (
@@ -69,6 +73,7 @@ class ReductionService(Service):
         self.sousChef = SousChef()
         self.mantidSnapper = MantidSnapper(None, __name__)
         self.registerPath("", self.reduction)
+        self.registerPath("batch", self.reductionBatch)
         self.registerPath("ingredients", self.prepReductionIngredients)
         self.registerPath("groceries", self.fetchReductionGroceries)
         self.registerPath("groupings", self.fetchReductionGroupings)
@@ -182,18 +187,225 @@ class ReductionService(Service):
         """
 
         groupingResults = self.fetchReductionGroupings(request)
-        request.focusGroups = groupingResults["focusGroups"]
-        ingredients = self.prepReductionIngredients(request)
-        ingredients.artificialNormalizationIngredients = request.artificialNormalizationIngredients
-
-        groceries = self.fetchReductionGroceries(request)
-        # attach the list of grouping workspaces to the grocery dictionary
-        groceries["groupingWorkspaces"] = groupingResults["groupingWorkspaces"]
-
-        data = ReductionRecipe().cook(ingredients, groceries)
+        # the grouping workspaces must not be evicted from the cache when the run data is loaded
+        self.groceryService.leaseWorkspaces(groupingResults["groupingWorkspaces"])
+        try:
+            request.focusGroups = groupingResults["focusGroups"]
+            ingredients = self.prepReductionIngredients(request)
+            ingredients.artificialNormalizationIngredients = request.artificialNormalizationIngredients
+
+            groceries = self.fetchReductionGroceries(request, readOnly=True)
+            # attach the list of grouping workspaces to the grocery dictionary
+            groceries["groupingWorkspaces"] = groupingResults["groupingWorkspaces"]
+
+            focussedNormalizations = None
+            try:
+                focussedNormalizations = self.fetchFocussedNormalizations(request, ingredients, groceries)
+                if focussedNormalizations is not None:
+                    groceries["focussedNormalizationWorkspaces"] = focussedNormalizations
+                data = ReductionRecipe().cook(ingredients, groceries)
+            finally:
+                self.groceryService.releaseNeutronData(groceries["inputWorkspace"])
+                for workspace in (focussedNormalizations or {}).values():
+                    self.groceryService.deleteWorkspaceUnconditional(workspace)
+        finally:
+            self.groceryService.releaseWorkspaces(groupingResults["groupingWorkspaces"])
         record = self._createReductionRecord(request, ingredients, data["outputs"])
         return ReductionResponse(record=record, unfocusedData=data.get("unfocusedWS", None))
 
+    @FromString
+    def reductionBatch(self, requests: List[ReductionRequest]) -> List[ReductionResponse]:
+        """
+        Perform reduction on a batch of run numbers.
+
+        Runs which share a state, lite-mode flag, calibration and normalization versions, and pixel masks
+        are reduced together: their grouping workspaces, diffcal table, normalization and ingredients
+        are loaded or prepared once, and the normalization is preprocessed and focussed once for each grouping.
+        The sample runs are then loaded and reduced one at a time.
+
+        :param requests: a list of ReductionRequest objects
+        :type requests: List[ReductionRequest]
+        :return: the reduction responses, in the order of the requests
+        :rtype: List[ReductionResponse]
+        """
+        responses: List[ReductionResponse] = [None] * len(requests)
+        for indices in self._groupBatchRequests(requests).values():
+            batch = [requests[n] for n in indices]
+            for n, response in zip(indices, self._reduceBatch(batch)):
+                responses[n] = response
+        return responses
+
+    def _groupBatchRequests(self, requests: List[ReductionRequest]) -> Dict[Tuple, List[int]]:
+        # Group the requests (by index) according to everything that reduction groceries can share.
+        batches: Dict[Tuple, List[int]] = {}
+        for n, request in enumerate(requests):
+            if request.artificialNormalizationIngredients is not None:
+                # an artificial normalization is generated from each sample run: nothing is shared
+                batches[("artificial", n)] = [n]
+                continue
+            stateId, _ = self.dataFactoryService.constructStateId(request.runNumber)
+            calVersion = None
+            normVersion = None
+            if ContinueWarning.Type.MISSING_DIFFRACTION_CALIBRATION not in request.continueFlags:
+                calVersion = self.dataFactoryService.getThisOrLatestCalibrationVersion(
+                    request.runNumber, request.useLiteMode
+                )
+            if ContinueWarning.Type.MISSING_NORMALIZATION not in request.continueFlags:
+                normVersion = self.dataFactoryService.getThisOrLatestNormalizationVersion(
+                    request.runNumber, request.useLiteMode
+                )
+            request.versions = Versions(calVersion, normVersion)
+            key = (
+                stateId,
+                request.useLiteMode,
+                calVersion,
+                normVersion,
+                request.continueFlags,
+                tuple(str(mask) for mask in request.pixelMasks),
+            )
+            batches.setdefault(key, []).append(n)
+        return batches
+
+    def _reduceBatch(self, requests: List[ReductionRequest]) -> List[ReductionResponse]:
+        # All of the requests share their state, groupings and normalization: see `_groupBatchRequests`.
+        for request in requests:
+            if request.timestamp is None:
+                request.timestamp = self.getUniqueTimestamp()
+        groupingResults = self.fetchReductionGroupings(requests[0])
+        for request in requests:
+            request.focusGroups = groupingResults["focusGroups"]
+
+        # Ingredients depend only on the state and on the calibration and normalization records.
+        sharedIngredients = self.prepReductionIngredients(requests[0])
+        sharedIngredients.artificialNormalizationIngredients = requests[0].artificialNormalizationIngredients
+
+        ingredientsList = [
+            sharedIngredients.model_copy(
+                update={
+                    "runNumber": request.runNumber,
+                    "timestamp": request.timestamp,
+                    "keepUnfocused": request.keepUnfocused,
+                    "convertUnitsTo": request.convertUnitsTo,
+                }
+            )
+            for request in requests
+        ]
+
+        focussedNormalizations: Optional[Dict[int, str]] = None
+
+        def shipment() -> Iterator[Tuple[ReductionIngredients, Dict[str, Any]]]:
+            # Fetch the groceries for each run only as it is reduced:
+            #   the grouping workspaces, diffcal table and normalization will already be resident.
+            nonlocal focussedNormalizations
+            for n, (request, ingredients) in enumerate(zip(requests, ingredientsList)):
+                groceries = self.fetchReductionGroceries(request, readOnly=True)
+                groceries["groupingWorkspaces"] = groupingResults["groupingWorkspaces"]
+                try:
+                    if n == 0:
+                        # the focussed normalizations are shared by every run in the batch
+                        focussedNormalizations = self.fetchFocussedNormalizations(request, ingredients, groceries)
+                    if focussedNormalizations is not None:
+                        groceries["focussedNormalizationWorkspaces"] = focussedNormalizations
+                    yield ingredients, groceries
+                finally:
+                    # the run has been reduced by the time the next one is requested
+                    self.groceryService.releaseNeutronData(groceries["inputWorkspace"])
+
+        # the grouping workspaces are shared by every run: they must not be evicted as each run is loaded
+        self.groceryService.leaseWorkspaces(groupingResults["groupingWorkspaces"])
+        try:
+            outputs = ReductionRecipe().cater(shipment())
+        finally:
+            self.groceryService.releaseWorkspaces(groupingResults["groupingWorkspaces"])
+            for workspace in (focussedNormalizations or {}).values():
+                self.groceryService.deleteWorkspaceUnconditional(workspace)
+        responses = []
+        for request, ingredients, data in zip(requests, ingredientsList, outputs):
+            record = self._createReductionRecord(request, ingredients, data["outputs"])
+            responses.append(ReductionResponse(record=record, unfocusedData=data.get("unfocusedWS", None)))
+        return responses
+
+    def _focussedNormalizationKey(
+        self,
+        ingredients: ReductionIngredients,
+        groupingIndex: int,
+        calibrationVersion: Optional[int],
+        mask: Optional[str],
+    ) -> str:
+        # Everything, apart from the normalization version itself, that the focussed normalization depends on.
+        key = {
+            "useLiteMode": ingredients.useLiteMode,
+            "calibrationVersion": calibrationVersion,
+            "mask": mask,
+            "preprocess": ingredients.preprocess().model_dump(mode="json"),
+            "generateFocussedVanadium": ingredients.generateFocussedVanadium(groupingIndex).model_dump(mode="json"),
+        }
+        hasher = hashlib.shake_256()
+        hasher.update(json.dumps(key, sort_keys=True).encode("utf-8"))
+        return hasher.digest(8).hex()
+
+    def _maskDigest(self, maskWorkspace: Optional[WorkspaceName]) -> Optional[str]:
+        # the combined pixel mask is identified by its values: its name includes the timestamp of the reduction
+        if not maskWorkspace:
+            return None
+        hasher = hashlib.shake_256()
+        hasher.update(self.mantidSnapper.mtd[maskWorkspace].extractY().tobytes())
+        return hasher.digest(8).hex()
+
+    def fetchFocussedNormalizations(
+        self, request: ReductionRequest, ingredients: ReductionIngredients, groceries: Dict[str, Any]
+    ) -> Optional[Dict[int, str]]:
+        """
+        Fetch the normalization, focussed and smoothed for each grouping, from the cache kept with its
+        normalization version, focussing and caching it for any grouping where it is not already cached.
+
+        The focussed normalization depends only upon the normalization and calibration versions,
+        the combined pixel mask, and the pixel group: runs sharing a normalization then skip its processing entirely.
+
+        :param request: a reduction request, with its versions set by `fetchReductionGroceries`
+        :type request: ReductionRequest
+        :param ingredients: the reduction ingredients
+        :type ingredients: ReductionIngredients
+        :param groceries: the reduction groceries, including the grouping workspaces
+        :type groceries: Dict[str, Any]
+        :return: the focussed normalization workspaces, by grouping index, which are owned by the caller;
+            or None, if there is no normalization to cache (or the cache is disabled)
+        :rtype: Optional[Dict[int, str]]
+        """
+        normVersion = request.versions.normalization if request.versions is not None else None
+        if (
+            not Config["reduction.normalizationCache.enabled"]
+            or normVersion is None
+            or not groceries.get("normalizationWorkspace")
+            or ingredients.artificialNormalizationIngredients is not None
+        ):
+            return None
+
+        mask = self._maskDigest(groceries.get("maskWorkspace"))
+        keys = [
+            self._focussedNormalizationKey(ingredients, groupingIndex, request.versions.calibration, mask)
+            for groupingIndex in range(len(groceries["groupingWorkspaces"]))
+        ]
+        focussedNormalizations = {}
+        for groupingIndex, key in enumerate(keys):
+            workspace = f"focussed_normalization_{key}"
+            if self.dataFactoryService.getFocussedNormalization(
+                request.runNumber, request.useLiteMode, normVersion, key, workspace
+            ):
+                focussedNormalizations[groupingIndex] = workspace
+
+        missing = [groupingIndex for groupingIndex in range(len(keys)) if groupingIndex not in focussedNormalizations]
+        if missing:
+            logger.info(f"Focussing normalization version {normVersion} for {len(missing)} of {len(keys)} groupings")
+            # fully-masked groupings are skipped
+            focussed = ReductionRecipe().focusNormalizations(ingredients, groceries, missing)
+            for groupingIndex, workspace in focussed.items():
+                self.dataExportService.exportFocussedNormalization(
+                    request.runNumber, request.useLiteMode, normVersion, keys[groupingIndex], workspace
+                )
+                focussedNormalizations[groupingIndex] = workspace
+        return focussedNormalizations
+
     def _createReductionRecord(
         self, request: ReductionRequest, ingredients: ReductionIngredients, workspaceNames: List[WorkspaceName]
     ) -> ReductionRecord:
@@ -337,7 +549,7 @@ class ReductionService(Service):
         return self.sousChef.prepReductionIngredients(farmFresh)
 
     @FromString
-    def fetchReductionGroceries(self, request: ReductionRequest) -> Dict[str, Any]:
+    def fetchReductionGroceries(self, request: ReductionRequest, readOnly: bool = False) -> Dict[str, Any]:
         """
         Fetch the required groceries, including
 
@@ -348,12 +560,17 @@ class ReductionService(Service):
 
         :param request: a reduction request
         :type request: ReductionRequest
+        :param readOnly: lease the cached neutron run data rather than copying it:
+            the lease must be released using `GroceryService.releaseNeutronData`
+        :type readOnly: bool
         :return: A grocery dictionary with keys
 
             - "inputworkspace"
             - "diffcalWorkspace"
             - "normalizationWorkspace"
             - "maskWorkspace"
+            - "readOnlyWorkspaces", if `readOnly` is set
+            - "workspaceMetadata", if `readOnly` is set: the metadata tags for the copies of the input workspace
 
         :rtype: Dict[str, Any]
         """
@@ -403,7 +620,10 @@ class ReductionService(Service):
             )
 
         # gather the input workspace and the diffcal table
-        self.groceryClerk.name("inputWorkspace").neutron(request.runNumber).useLiteMode(request.useLiteMode).add()
+        self.groceryClerk.name("inputWorkspace").neutron(request.runNumber).useLiteMode(request.useLiteMode)
+        if readOnly:
+            self.groceryClerk.readOnly()
+        self.groceryClerk.add()
 
         if calVersion:
             self.groceryClerk.name("diffcalWorkspace").diffcal_table(request.runNumber, calVersion).useLiteMode(
@@ -424,11 +644,16 @@ class ReductionService(Service):
             **({"maskWorkspace": combinedMask} if combinedMask else {}),
         )
 
-        self._markWorkspaceMetadata(request, groceries["inputWorkspace"])
+        if readOnly:
+            # the leased workspace is shared with later requests: it must not be tagged
+            groceries["readOnlyWorkspaces"] = [groceries["inputWorkspace"]]
+            groceries["workspaceMetadata"] = self._workspaceMetadata(request)
+        else:
+            self._markWorkspaceMetadata(request, groceries["inputWorkspace"])
 
         return groceries
 
-    def _markWorkspaceMetadata(self, request: ReductionRequest, workspace: WorkspaceName):
+    def _workspaceMetadata(self, request: ReductionRequest) -> WorkspaceMetadata:
         calibrationState = (
             DiffcalStateMetadata.NONE
             if ContinueWarning.Type.MISSING_DIFFRACTION_CALIBRATION in request.continueFlags
@@ -440,8 +665,10 @@ class ReductionService(Service):
             if ContinueWarning.Type.MISSING_NORMALIZATION in request.continueFlags
             else NormalizationStateMetadata.EXISTS
         )
-        metadata = WorkspaceMetadata(diffcalState=calibrationState, normalizationState=normalizationState)
-        self.groceryService.writeWorkspaceMetadataAsTags(workspace, metadata)
+        return WorkspaceMetadata(diffcalState=calibrationState, normalizationState=normalizationState)
+
+    def _markWorkspaceMetadata(self, request: ReductionRequest, workspace: WorkspaceName):
+        self.groceryService.writeWorkspaceMetadataAsTags(workspace, self._workspaceMetadata(request))
 
     def saveReduction(self, request: ReductionExportRequest):
         self.dataExportService.exportReductionRecord(request.record)
@@ -473,18 +700,34 @@ class ReductionService(Service):
     def getSavePath(self, runNumber: str) -> Path:
         return self.dataExportService.getReductionStateRoot(runNumber)
 
-    def getStateIds(self, runNumbers: List[str]) -> List[str]:
-        stateIds = []
-        for runNumber in runNumbers:
-            stateId, _ = self.dataFactoryService.constructStateId(runNumber)
-            stateIds.append(stateId)
-        return stateIds
+    def getStateIds(self, runNumbers: List[str]) -> StateIdsResponse:
+        """
+        Resolve the state ids of a list of runs concurrently:
+        runs that cannot be resolved are reported in the response's 'errors'.
+        """
+        start = time.perf_counter()
+        stateIds, errors = self.dataFactoryService.constructStateIds(runNumbers)
+        response = StateIdsResponse(
+            stateIds={runNumber: stateId for runNumber, (stateId, _) in stateIds.items()},
+            errors={runNumber: str(e) for runNumber, e in errors.items()},
+            duration=time.perf_counter() - start,
+        )
+        logger.debug(
+            f"Resolved state ids for {len(response.stateIds)} of {len(stateIds) + len(errors)} runs "
+            f"in {response.duration:.2f} s"
+        )
+        return response
 
     def _groupByStateId(self, requests: List[SNAPRequest]):
+        runNumbers = [json.loads(request.payload)["runNumber"] for request in requests]
+        stateIds, errors = self.dataFactoryService.constructStateIds(runNumbers)
+        if errors:
+            # as for a single run: the batch cannot be grouped
+            raise next(iter(errors.values()))
+
         stateIDs = {}
-        for request in requests:
-            runNumber = json.loads(request.payload)["runNumber"]
-            stateID, _ = self.dataFactoryService.constructStateId(runNumber)
+        for request, runNumber in zip(requests, runNumbers):
+            stateID, _ = stateIds[runNumber]
             if stateIDs.get(stateID) is None:
                 stateIDs[stateID] = []
             stateIDs[stateID].append(request)
@@ -1,7 +1,10 @@
+import hashlib
+import json
 import os
+from collections import OrderedDict
 from copy import deepcopy
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import pydantic
 
@@ -18,6 +21,7 @@ from snapred.backend.dao.ingredients import (
 from snapred.backend.dao.request import FarmFreshIngredients
 from snapred.backend.dao.state import FocusGroup, InstrumentState, PixelGroup
 from snapred.backend.dao.state.CalibrantSample import CalibrantSample
+from snapred.backend.data.DataExportService import DataExportService
 from snapred.backend.data.DataFactoryService import DataFactoryService
 from snapred.backend.data.GroceryService import GroceryService
 from snapred.backend.error.RecoverableException import RecoverableException
@@ -47,7 +51,11 @@ class SousChef(Service):
         self.groceryService = GroceryService()
         self.groceryClerk = GroceryListItem.builder()
         self.dataFactoryService = DataFactoryService()
-        self._pixelGroupCache: Dict[Tuple[str, bool, str], PixelGroup] = {}
+        self.dataExportService = DataExportService()
+        # least-recently-used first: bounded by 'grouping.pixelGroupCache.maxSize'
+        self._pixelGroupCache: OrderedDict[str, PixelGroup] = OrderedDict()
+        # the key of each cached pixel group, by the cheap lookup key of the requests it has served
+        self._pixelGroupLookup: Dict[Tuple[Any, ...], str] = {}
         self._peaksCache: Dict[Tuple[str, bool, str, float, float, float], List[GroupPeakList]] = {}
         self._xtalCache: Dict[Tuple[str, float, float], CrystallographicInfo] = {}
         return
@@ -94,17 +102,80 @@ class SousChef(Service):
             groupingMap = self.dataFactoryService.getGroupingMap(ingredients.runNumber)
             return groupingMap.getMap(ingredients.useLiteMode)[ingredients.focusGroup.name]
 
-    def prepPixelGroup(self, ingredients: FarmFreshIngredients) -> PixelGroup:
-        groupingSchema = ingredients.focusGroup.name
-        key = (
+    @staticmethod
+    def _pixelGroupKey(
+        focusGroup: FocusGroup, instrumentState: InstrumentState, ingredients: FarmFreshIngredients
+    ) -> str:
+        # Pixel grouping parameters depend only on the state, the grouping scheme, the lite-mode flag,
+        #   the mask, and the parameters used to estimate the resolution: these define the cache key.
+        definition = Path(focusGroup.definition)
+        fileStat = definition.stat() if definition.exists() else None
+        instrumentConfig = instrumentState.instrumentConfig
+        key = {
+            "stateId": str(instrumentState.id),
+            "useLiteMode": ingredients.useLiteMode,
+            "focusGroup": focusGroup.name,
+            "definition": str(definition),
+            "definitionStat": [fileStat.st_size, fileStat.st_mtime_ns] if fileStat else None,
+            # no pixel mask is applied during 'prepPixelGroup'
+            "mask": None,
+            "nBinsAcrossPeakWidth": ingredients.nBinsAcrossPeakWidth,
+            "tof": [instrumentState.particleBounds.tof.minimum, instrumentState.particleBounds.tof.maximum],
+            "delTOverT": instrumentConfig.delTOverT,
+            "delLOverL": instrumentConfig.delLOverL,
+            "L": instrumentConfig.L1 + instrumentConfig.L2,
+            "delTh": instrumentState.delTh,
+        }
+        hasher = hashlib.shake_256()
+        hasher.update(json.dumps(key, sort_keys=True).encode("utf-8"))
+        return hasher.digest(8).hex()
+
+    def _pixelGroupLookupKey(self, ingredients: FarmFreshIngredients) -> Tuple[Any, ...]:
+        # A cheap key, requiring neither the instrument state nor the grouping map:
+        #   within a run and mode, the instrument state only changes with the calibration version.
+        focusGroup = ingredients.focusGroup
+        try:
+            fileStat = os.stat(focusGroup.definition)
+            definitionStat = (fileStat.st_size, fileStat.st_mtime_ns)
+        except OSError:
+            definitionStat = None
+        return (
             ingredients.runNumber,
             ingredients.useLiteMode,
-            groupingSchema,
-            ingredients.calibrantSamplePath,
+            focusGroup.name,
+            focusGroup.definition,
+            definitionStat,
+            ingredients.nBinsAcrossPeakWidth,
+            self.dataFactoryService.getThisOrCurrentCalibrationVersion(ingredients.runNumber, ingredients.useLiteMode),
         )
-        if key not in self._pixelGroupCache:
-            focusGroup = self.prepFocusGroup(ingredients)
-            instrumentState = self.prepInstrumentState(ingredients)
+
+    def _cachePixelGroup(self, key: str, pixelGroup: PixelGroup):
+        self._pixelGroupCache[key] = pixelGroup
+        self._pixelGroupCache.move_to_end(key)
+        while len(self._pixelGroupCache) > Config["grouping.pixelGroupCache.maxSize"]:
+            evicted, _ = self._pixelGroupCache.popitem(last=False)
+            self._pixelGroupLookup = {k: v for k, v in self._pixelGroupLookup.items() if v != evicted}
+
+    def prepPixelGroup(self, ingredients: FarmFreshIngredients) -> PixelGroup:
+        lookupKey = self._pixelGroupLookupKey(ingredients)
+        key = self._pixelGroupLookup.get(lookupKey)
+        if key in self._pixelGroupCache:
+            self._pixelGroupCache.move_to_end(key)
+            return deepcopy(self._pixelGroupCache[key])
+
+        # on a miss: build the instrument state, and the full key
+        focusGroup = self.prepFocusGroup(ingredients)
+        instrumentState = self.prepInstrumentState(ingredients)
+        key = self._pixelGroupKey(focusGroup, instrumentState, ingredients)
+        self._pixelGroupLookup[lookupKey] = key
+        if key in self._pixelGroupCache:
+            self._pixelGroupCache.move_to_end(key)
+            return deepcopy(self._pixelGroupCache[key])
+
+        # runs from the same state share their pixel grouping parameters: check the state's cache on disk
+        stateId = str(instrumentState.id)
+        pixelGroup = self.dataFactoryService.getCachedPixelGroup(stateId, ingredients.useLiteMode, key)
+        if pixelGroup is None:
             pixelIngredients = PixelGroupingIngredients(
                 instrumentState=instrumentState,
                 nBinsAcrossPeakWidth=ingredients.nBinsAcrossPeakWidth,
@@ -115,13 +186,15 @@ class SousChef(Service):
             groceries = self.groceryService.fetchGroceryDict(self.groceryClerk.buildDict())
             data = PixelGroupingParametersCalculationRecipe().executeRecipe(pixelIngredients, groceries)
 
-            self._pixelGroupCache[key] = PixelGroup(
+            pixelGroup = PixelGroup(
                 focusGroup=focusGroup,
                 pixelGroupingParameters=data["parameters"],
                 timeOfFlight=data["tof"],
                 nBinsAcrossPeakWidth=ingredients.nBinsAcrossPeakWidth,
             )
-        return deepcopy(self._pixelGroupCache[key])
+            self.dataExportService.exportPixelGroup(stateId, ingredients.useLiteMode, key, pixelGroup)
+        self._cachePixelGroup(key, pixelGroup)
+        return deepcopy(pixelGroup)
 
     def prepManyPixelGroups(self, ingredients: FarmFreshIngredients) -> List[PixelGroup]:
         pixelGroups = []
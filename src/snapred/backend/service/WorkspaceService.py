@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 from snapred.backend.dao.request import (
     ClearWorkspacesRequest,
@@ -25,6 +25,7 @@ class WorkspaceService(Service):
         self.registerPath("renameFromTemplate", self.renameFromTemplate)
         self.registerPath("clear", self.clear)
         self.registerPath("getResidentWorkspaces", self.getResidentWorkspaces)
+        self.registerPath("getCacheStatistics", self.getCacheStatistics)
         return
 
     @staticmethod
@@ -70,3 +71,10 @@ class WorkspaceService(Service):
         - optionally excludes the cached workspaces from this list.
         """
         return self.groceryService.getResidentWorkspaces(excludeCache=request.excludeCache)
+
+    def getCacheStatistics(self) -> Dict[str, int]:
+        """
+        Gets the hit, miss, and eviction counters of the workspace cache,
+        together with its current size and memory budget in bytes.
+        """
+        return self.groceryService.getCacheStatistics()
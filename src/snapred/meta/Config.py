@@ -5,7 +5,7 @@ import re
 import sys
 from glob import glob
 from pathlib import Path
-from typing import Any, Dict, List, TypeVar
+from typing import Any, Callable, Dict, List, TypeVar
 
 import yaml
 
@@ -88,12 +88,63 @@ def deep_update(mapping: Dict[KeyType, Any], *updating_mappings: Dict[KeyType, A
     return updated_mapping
 
 
+class _WatchedDict(dict):
+    """
+    A configuration dictionary which reports any modification to itself, or to any of its nested dictionaries:
+    the configuration values resolved from it may then be invalidated.
+    """
+
+    def __init__(self, mapping: Dict[str, Any], onChange: Callable[[], None]):
+        self._onChange = onChange
+        super().__init__((k, self._watch(v)) for k, v in mapping.items())
+
+    def _watch(self, value: Any) -> Any:
+        if isinstance(value, dict) and not isinstance(value, _WatchedDict):
+            return _WatchedDict(value, self._onChange)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, self._watch(value))
+        self._onChange()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._onChange()
+
+    def clear(self):
+        super().clear()
+        self._onChange()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._onChange()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._onChange()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+
 @Singleton
 class _Config:
     _config: Dict[str, Any] = {}
     _logger = logging.getLogger("snapred.meta.Config.Config")
 
     def __init__(self):
+        # fully-resolved values, by period-delimited key:
+        #   these are cleared whenever the configuration is refreshed or modified.
+        self._resolved: Dict[str, Any] = {}
+
         # use refresh to do initial load, clearing shouldn't matter
         self.refresh("application.yml", True)
 
@@ -128,6 +179,9 @@ class _Config:
         if "samples" in self._config and "home" in self._config["samples"]:
             self._config["samples"]["home"] = expandhome(self._config["samples"]["home"])
 
+    def _invalidate(self):
+        self._resolved.clear()
+
     def refresh(self, env_name: str, clearPrevious: bool = False) -> None:
         if clearPrevious:
             self._config.clear()
@@ -148,7 +202,8 @@ class _Config:
                     envConfig = yaml.safe_load(file)
                 new_env_name = env_name.replace(".yml", "")
             # update the configuration with the  new environment
-            self._config = deep_update(self._config, envConfig)
+            self._config = _WatchedDict(deep_update(self._config, envConfig), self._invalidate)
+            self._invalidate()
 
             # add the name to the config object if it wasn't specified
             if "environment" not in envConfig:
@@ -195,6 +250,16 @@ class _Config:
 
     # period delimited key lookup
     def __getitem__(self, key):
+        # Each key is resolved only once: after that, the lookup is a single dictionary access.
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        val = self._lookup(key)
+        self._resolved[key] = val
+        return val
+
+    def _lookup(self, key):
         keys = key.split(".")
         val = self._config[keys[0]]
         totalProcessed = 0
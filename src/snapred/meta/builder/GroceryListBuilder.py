@@ -111,6 +111,10 @@ class GroceryListBuilder:
         self._tokens["keepItClean"] = False
         return self
 
+    def readOnly(self):
+        self._tokens["readOnly"] = True
+        return self
+
     def build(self) -> GroceryListItem:
         # create the grocery item list, and return
         return GroceryListItem(**self._tokens)
@@ -0,0 +1,29 @@
+import numpy as np
+
+"""
+    Bulk conversion of detector IDs to `DetectorInfo` indices:
+
+    * By definition, the detector-info index of a detector is the position of its ID in `DetectorInfo.detectorIDs()`;
+
+    * Instead of calling `DetectorInfo.indexOf` for each detector, all of the IDs are located
+    by a single `np.searchsorted` over the sorted detector IDs.
+"""
+
+
+def detectorInfoIndices(detectorIDs: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    The detector-info indices of the specified detector IDs.
+    :param detectorIDs: `DetectorInfo.detectorIDs()`
+    :param ids: the detector IDs to locate
+    """
+    detectorIDs = np.asarray(detectorIDs)
+    ids = np.asarray(ids, dtype=detectorIDs.dtype)
+    if not len(ids):
+        return np.empty(0, dtype=int)
+    sortOrder = np.argsort(detectorIDs)
+    positions = np.searchsorted(detectorIDs, ids, sorter=sortOrder)
+    indices = sortOrder[np.minimum(positions, len(detectorIDs) - 1)] if len(detectorIDs) else positions
+    if not len(detectorIDs) or np.any(detectorIDs[indices] != ids):
+        missing = ids if not len(detectorIDs) else ids[detectorIDs[indices] != ids]
+        raise RuntimeError(f"detector IDs not found in the instrument: {missing[:10].tolist()}")
+    return indices
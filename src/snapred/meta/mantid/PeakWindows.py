@@ -0,0 +1,153 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+"""
+    Vectorized masks, and interpolation, of the bins lying within peak windows:
+
+    * A bin is masked when its x-value lies strictly within any window: for histogram data, its left bin edge;
+
+    * With sorted x-values, the bins within a window are a contiguous range, given by `np.searchsorted`
+    of the window's edges.  The ranges of all of the windows are then marked in a single pass,
+    by the cumulative sum of +1 at each range's start and -1 at its stop,
+    so that the cost is linear in the number of bins, rather than in (peaks x bins);
+
+    * When the x-values are common to all spectra, the window edges of every spectrum are located
+    by a single `np.searchsorted`;
+
+    * In the same way, the peak regions of a set of histograms are filled by linear interpolation
+    from the bins bracketing each region, located by `np.searchsorted`, with each region filled
+    across all of the histograms at once.
+"""
+
+Windows = Tuple[Union[np.ndarray, Sequence[float]], Union[np.ndarray, Sequence[float]]]
+
+
+def windowRanges(x: np.ndarray, minima: np.ndarray, maxima: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each window, the range of indices `[start, stop)` of the sorted x-values lying strictly within it.
+    """
+    start = np.searchsorted(x, minima, side="right")
+    stop = np.searchsorted(x, maxima, side="left")
+    return start, np.maximum(start, stop)
+
+
+def peakWindowMask(x: np.ndarray, windows: Windows, length: int) -> np.ndarray:
+    """
+    The mask of a single spectrum.
+    :param x: the sorted x-values of the spectrum
+    :param windows: (<window minima>, <window maxima>)
+    :param length: the number of bins: any x-values beyond this length are ignored
+    """
+    return peakWindowMasks(np.asarray(x)[np.newaxis, :], [windows], length)[0]
+
+
+def peakWindowMasks(x: np.ndarray, windows: Sequence[Windows], length: int) -> np.ndarray:
+    """
+    The masks of a set of spectra, as a 2-D boolean array.
+    :param x: the sorted x-values: a 1-D array common to all spectra, or a 2-D array with a row for each spectrum
+    :param windows: for each spectrum, (<window minima>, <window maxima>)
+    :param length: the number of bins of each spectrum: any x-values beyond this length are ignored
+    """
+    x = np.asarray(x)
+    numSpec = len(windows)
+    if x.ndim == 2 and len(x) != numSpec:
+        raise ValueError(f"expecting x-values for each of {numSpec} spectra, not {len(x)}")
+    minima = [np.asarray(window[0], dtype=float) for window in windows]
+    maxima = [np.asarray(window[1], dtype=float) for window in windows]
+    counts = np.array([len(m) for m in minima], dtype=int)
+    if any(len(m) != n for m, n in zip(maxima, counts)):
+        raise ValueError("expecting the same number of window minima and maxima, for each spectrum")
+    rows = np.repeat(np.arange(numSpec), counts)
+    if not len(rows):
+        return np.zeros((numSpec, length), dtype=bool)
+
+    if x.ndim == 1:
+        start, stop = windowRanges(x, np.concatenate(minima), np.concatenate(maxima))
+    else:
+        ranges = [windowRanges(x[n], minima[n], maxima[n]) for n in range(numSpec)]
+        start = np.concatenate([r[0] for r in ranges])
+        stop = np.concatenate([r[1] for r in ranges])
+    start = np.minimum(start, length)
+    stop = np.minimum(stop, length)
+
+    # +1 at the start of each range, and -1 at its stop: the bins within any range have a positive cumulative sum
+    width = length + 1
+    delta = np.bincount(rows * width + start, minlength=numSpec * width) - np.bincount(
+        rows * width + stop, minlength=numSpec * width
+    )
+    return np.cumsum(delta.reshape(numSpec, width)[:, :length], axis=1) > 0
+
+
+def bracketingIndices(x: np.ndarray, minima: np.ndarray, maxima: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each window, the index of the last of the sorted x-values below it, and of the first x-value above it.
+    """
+    before = np.searchsorted(x, minima, side="left") - 1
+    after = np.searchsorted(x, maxima, side="right")
+    return before, after
+
+
+def interpolatePeakRegions(x: np.ndarray, y: np.ndarray, regions: Windows):
+    """
+    Replace the values within each peak region by a linear interpolation between the values bracketing it,
+    for a set of histograms sharing the same peak regions.  The values are replaced in place.
+
+    A bin is within a region when its left bin edge lies within the region, including the region's edges.
+    The regions are filled in order, so that a region bracketed by a previously filled region
+    is interpolated from the filled values.  Each fill reproduces `np.linspace` exactly.
+    :param x: the sorted bin edges: a 1-D array common to all histograms, or a 2-D array with a row for each histogram
+    :param y: the values: a 2-D array with a row for each histogram
+    :param regions: (<region minima>, <region maxima>)
+    """
+    x = np.asarray(x)
+    numRows, numBins = y.shape
+    minima = np.asarray(regions[0], dtype=float)
+    maxima = np.asarray(regions[1], dtype=float)
+    if x.ndim == 2 and len(x) != numRows:
+        raise ValueError(f"expecting bin edges for each of {numRows} histograms, not {len(x)}")
+    if len(minima) != len(maxima):
+        raise ValueError("expecting the same number of region minima and maxima")
+    if not numRows or not len(minima):
+        return
+
+    if x.ndim == 1:
+        before, after = bracketingIndices(x, minima, maxima)
+        before = np.broadcast_to(before, (numRows, len(minima)))
+        after = np.broadcast_to(after, (numRows, len(minima)))
+    else:
+        brackets = [bracketingIndices(xn, minima, maxima) for xn in x]
+        before = np.array([b for b, _ in brackets]).reshape(numRows, len(minima))
+        after = np.array([a for _, a in brackets]).reshape(numRows, len(minima))
+    unbracketed = (before < 0) | (after >= numBins)
+    if unbracketed.any():
+        region = np.flatnonzero(unbracketed.any(axis=0))[0]
+        raise ValueError(
+            f"peak region ({minima[region]}, {maxima[region]}) is not bracketed by the bin edges of every histogram"
+        )
+
+    rows = np.arange(numRows)
+    for region in range(len(minima)):
+        b, a = before[:, region], after[:, region]
+        counts = np.maximum(a - b - 1, 0)
+        total = int(counts.sum())
+        if not total:
+            continue
+        start, stop = y[rows, b], y[rows, a]
+
+        # for each filled bin: its histogram, and its position within the region
+        fillRows = np.repeat(rows, counts)
+        j = (np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)).astype(float)
+        div = np.repeat(counts - 1, counts).astype(float)
+        delta = np.repeat(stop - start, counts)
+        start_ = np.repeat(start, counts)
+
+        # as `np.linspace(start, stop, count)`
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = delta / div
+            values = np.where(step == 0, j / div * delta, j * step)
+        values = np.where(div > 0, values, j * delta) + start_
+        last = (j == div) & (div > 0)
+        values[last] = np.repeat(stop, counts)[last]
+
+        y[fillRows, np.repeat(b + 1, counts) + j.astype(int)] = values
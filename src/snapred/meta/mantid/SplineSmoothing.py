@@ -0,0 +1,123 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.interpolate import make_smoothing_spline
+
+from snapred.meta.Config import Config
+
+"""
+    Batched spline smoothing of the spectra of a workspace:
+
+    * The x- and y-values are extracted once, as 2-D arrays (or as a list of rows, for a ragged workspace);
+
+    * Each spectrum is fit independently, so that chunks of spectra are dispatched to a pool of workers:
+    a thread pool by default, or a process pool, which avoids contention for the GIL at the cost of copying each chunk.
+    Each spectrum is fit by exactly the same calls as in the serial loop, so that the results do not depend on
+    the number of workers;
+
+    * The smoothed y-values are returned together, to be written back in a single pass.
+"""
+
+Rows = Union[np.ndarray, Sequence[np.ndarray]]
+
+_EXECUTORS = ("thread", "process")
+
+
+def readSpectra(workspace) -> Tuple[Rows, Rows]:
+    """
+    The x- and y-values of every spectrum of a `MatrixWorkspace`:
+    as 2-D arrays, unless the workspace is ragged, in which case as lists of 1-D arrays.
+    """
+    if not workspace.isRaggedWorkspace():
+        return workspace.extractX(), workspace.extractY()
+    numSpec = workspace.getNumberHistograms()
+    xs = [np.array(workspace.readX(index)) for index in range(numSpec)]
+    ys = [np.array(workspace.readY(index)) for index in range(numSpec)]
+    return xs, ys
+
+
+def writeSpectra(workspace, ys: Rows):
+    """
+    Replace the y-values of every spectrum of a `MatrixWorkspace`.
+    """
+    for index, y in enumerate(ys):
+        workspace.setY(index, y)
+
+
+def smoothSpectra(
+    x: Rows,
+    y: Rows,
+    lam: Optional[float],
+    xFit: Optional[Rows] = None,
+    mask: Optional[Rows] = None,
+    nonNegative: bool = False,
+    maxWorkers: Optional[int] = None,
+    executor: Optional[str] = None,
+    chunkSize: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Fit a smoothing spline to each spectrum, and evaluate it at that spectrum's x-values.
+    :param x: for each spectrum, the x-values at which its spline is evaluated
+    :param y: for each spectrum, the y-values to fit
+    :param lam: the smoothing parameter of `make_smoothing_spline`
+    :param xFit: for each spectrum, the x-values of its y-values, if these differ from `x`
+    :param mask: for each spectrum, which of its points to include in the fit, or `None` for all points
+    :param nonNegative: replace any negative values of the smoothed spectra by zero
+    :param maxWorkers: the number of workers, by default `Config["smoothing.spline.maxWorkers"]`:
+                       1 fits the spectra serially
+    :param executor: "thread" or "process", by default `Config["smoothing.spline.executor"]`
+    :param chunkSize: the number of spectra dispatched to a worker at once,
+                      by default `Config["smoothing.spline.chunkSize"]`
+    :return: the smoothed y-values of each spectrum
+    """
+    numSpec = len(y)
+    if len(x) != numSpec or (xFit is not None and len(xFit) != numSpec) or (mask is not None and len(mask) != numSpec):
+        raise ValueError(f"expecting the same number of spectra in each argument: {numSpec} y-value rows")
+    maxWorkers = maxWorkers if maxWorkers is not None else Config["smoothing.spline.maxWorkers"]
+    executor = executor if executor is not None else Config["smoothing.spline.executor"]
+    chunkSize = chunkSize if chunkSize is not None else Config["smoothing.spline.chunkSize"]
+    if executor not in _EXECUTORS:
+        raise ValueError(f"unknown executor '{executor}': expecting one of {list(_EXECUTORS)}")
+    chunkSize = max(1, int(chunkSize))
+
+    chunks = []
+    for start in range(0, numSpec, chunkSize):
+        rows = slice(start, start + chunkSize)
+        chunks.append(
+            (
+                x[rows],
+                y[rows],
+                xFit[rows] if xFit is not None else None,
+                mask[rows] if mask is not None else None,
+                lam,
+                nonNegative,
+            )
+        )
+
+    maxWorkers = max(1, min(int(maxWorkers), len(chunks)))
+    if maxWorkers == 1:
+        results = [_smoothChunk(*chunk) for chunk in chunks]
+    else:
+        poolType = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        with poolType(max_workers=maxWorkers) as pool:
+            results = list(pool.map(_smoothChunk, *zip(*chunks)))
+    return [ySmooth for chunk in results for ySmooth in chunk]
+
+
+def _smoothChunk(
+    x: Rows, y: Rows, xFit: Optional[Rows], mask: Optional[Rows], lam: Optional[float], nonNegative: bool
+) -> List[np.ndarray]:
+    # module level, so that it may be sent to a process pool
+    result = []
+    for n in range(len(y)):
+        xn, yn = x[n], y[n]
+        xFitn = xFit[n] if xFit is not None else xn
+        if mask is not None:
+            xFitn, yn = xFitn[mask[n]], yn[mask[n]]
+        tck = make_smoothing_spline(xFitn, yn, lam=lam)
+        ySmooth = tck(xn, extrapolate=False)
+        if nonNegative:
+            ySmooth[ySmooth < 0] = 0
+        result.append(ySmooth)
+    return result
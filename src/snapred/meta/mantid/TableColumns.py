@@ -0,0 +1,59 @@
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+"""
+    Columnar construction of table workspaces:
+
+    * Mantid's `addRow` with a `dict` looks up every column by name, for every row:
+    building a large table (e.g. one row per detector) this way is dominated by the per-row overhead;
+
+    * Instead, each column is converted to a list of Python values once, and the rows are appended positionally.
+    Column types are inferred from the NumPy dtype of each column, unless they are specified.
+"""
+
+# table-column type, for each NumPy dtype kind
+_COLUMN_TYPES = {"b": "bool", "i": "int", "u": "int", "f": "double", "U": "str", "S": "str", "O": "str"}
+
+
+def columnType(values: Union[np.ndarray, Sequence]) -> str:
+    """
+    The table-column type for a column of values: "int", "double", "bool", or "str".
+    """
+    kind = np.asarray(values).dtype.kind
+    if kind not in _COLUMN_TYPES:
+        raise ValueError(f"cannot convert values of dtype '{np.asarray(values).dtype}' to a table column")
+    return _COLUMN_TYPES[kind]
+
+
+def appendTableColumns(
+    table,
+    columns: Dict[str, Union[np.ndarray, Sequence]],
+    columnTypes: Optional[Dict[str, str]] = None,
+    plotType: Optional[int] = None,
+):
+    """
+    Add columns to an empty table workspace, and fill them from arrays of equal length.
+    :param table: the `ITableWorkspace`, without any columns
+    :param columns: <column name>: <values>, in column order
+    :param columnTypes: <column name>: <table-column type>, for any column whose type should not be inferred
+    :param plotType: if not `None`, the plot type of every column
+    """
+    if table.columnCount() > 0:
+        raise RuntimeError(f"table workspace '{table.name()}' already has columns")
+    columnTypes = columnTypes if columnTypes is not None else {}
+
+    types, values = [], []
+    for name, column in columns.items():
+        types.append(columnTypes.get(name) or columnType(column))
+        values.append(column.tolist() if isinstance(column, np.ndarray) else list(column))
+        if len(values[-1]) != len(values[0]):
+            raise RuntimeError(f"Column mismatch: length {len(values[-1])} vs {len(values[0])}")
+
+    for name, type_ in zip(columns, types):
+        if plotType is not None:
+            table.addColumn(type=type_, name=name, plottype=plotType)
+        else:
+            table.addColumn(type=type_, name=name)
+    for row in zip(*values):
+        table.addRow(list(row))
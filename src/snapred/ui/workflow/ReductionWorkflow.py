@@ -135,11 +135,14 @@ class ReductionWorkflow(WorkflowImplementer):
     def _validateRunNumbers(self, runNumbers: List[str]):
         # For now, all run numbers in a reduction batch must be from the same instrument state.
         # This is primarily because pixel-mask selection occurs by instrument state.
-        stateIds = []
         try:
-            stateIds = self.request(path="reduction/getStateIds", payload=runNumbers).data
+            response = self.request(path="reduction/getStateIds", payload=runNumbers).data
         except Exception as e:  # noqa: BLE001
             raise ValueError(f"Unable to get instrument state for {runNumbers}: {e}")
+        if response.errors:
+            details = "; ".join(f"{runNumber}: {error}" for runNumber, error in response.errors.items())
+            raise ValueError(f"Unable to get instrument state for {list(response.errors.keys())}: {details}")
+        stateIds = list(response.stateIds.values())
         if len(stateIds) > 1 and len(set(stateIds)) > 1:
             raise ValueError("All run numbers must be from the same state")
 
@@ -0,0 +1,38 @@
+"""
+  Benchmark script for: `Config` lookup.
+
+  Compares the per-lookup cost of resolving a key from scratch on every call (the previous behavior,
+  emulated by invalidating the resolved values before each lookup) against the memoized lookup,
+  for plain values and for values with nested `${...}` substitutions.
+"""
+
+import time
+
+from snapred.meta.Config import Config
+
+# USER INPUT ##########################
+keys = [
+    "instrument.name",
+    "version.default",
+    "mantid.workspace.nameTemplate.formatter.version.workspace",
+    "instrument.calibration.powder.grouping.home",
+    "instrument.native.definition.file",
+]
+repetitions = 20000
+#######################################
+
+
+def timeLookup(key: str, invalidate: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        if invalidate:
+            Config._invalidate()
+        Config[key]
+    return (time.perf_counter() - start) / repetitions
+
+
+print(f"{'key':>60} {'uncached [us]':>14} {'cached [us]':>12} {'speedup':>8}")
+for key in keys:
+    uncached = timeLookup(key, invalidate=True)
+    cached = timeLookup(key, invalidate=False)
+    print(f"{key:>60} {uncached * 1.0e6:>14.2f} {cached * 1.0e6:>12.3f} {uncached / cached:>8.1f}")
@@ -0,0 +1,72 @@
+"""
+  Benchmark script for: `CalculateDiffCalTable`.
+
+  Compares the previous per-detector implementation (`getDetectorIDs` for every spectrum,
+  and `addRow` with a dict for every detector ID) against the columnar implementation, at lite and native resolution.
+  The `CalculateDIFC` step is common to both, and is included in the times.
+"""
+
+import time
+
+import numpy as np
+from mantid.simpleapi import (
+    CalculateDIFC,
+    CalculateDiffCalTable,
+    CreateEmptyTableWorkspace,
+    DeleteWorkspace,
+    LoadEmptyInstrument,
+    mtd,
+)
+
+import snapred.backend.recipe.algorithm
+from snapred.meta.Config import Config
+
+#User inputs ###########################
+binWidth = 0.001
+repeats = 3
+#######################################
+
+
+def legacyCalculateDiffCalTable(inputWSName, outputWSName):
+    tmpDifc = mtd.unique_name(prefix="_tmp_")
+    CalculateDIFC(InputWorkspace=inputWSName, OutputWorkspace=tmpDifc, OffsetMode="Signed", BinWidth=binWidth)
+    tmpDifcWS = mtd[tmpDifc]
+    difcs = [float(x) for x in tmpDifcWS.extractY()]
+    DIFCtable = CreateEmptyTableWorkspace(OutputWorkspace=outputWSName)
+    DIFCtable.addColumn(type="int", name="detid", plottype=6)
+    DIFCtable.addColumn(type="double", name="difc", plottype=6)
+    DIFCtable.addColumn(type="double", name="difa", plottype=6)
+    DIFCtable.addColumn(type="double", name="tzero", plottype=6)
+    for wkspIndx, difc in enumerate(difcs):
+        for detid in tmpDifcWS.getSpectrum(wkspIndx).getDetectorIDs():
+            DIFCtable.addRow({"detid": int(detid), "difc": float(difc), "difa": 0.0, "tzero": 0.0})
+    DeleteWorkspace(tmpDifc)
+
+
+print(f"{'resolution':>10} {'rows':>8} {'old [s]':>10} {'new [s]':>10} {'speedup':>8}")
+for resolution in ("lite", "native"):
+    instrumentWS = f"instrument_{resolution}"
+    LoadEmptyInstrument(
+        Filename=Config[f"instrument.{resolution}.definition.file"],
+        OutputWorkspace=instrumentWS,
+    )
+
+    oldTimes, newTimes = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        legacyCalculateDiffCalTable(instrumentWS, "old")
+        oldTimes.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        CalculateDiffCalTable(
+            InputWorkspace=instrumentWS, CalibrationTable="new", OffsetMode="Signed", BinWidth=binWidth
+        )
+        newTimes.append(time.perf_counter() - start)
+
+        oldTable, newTable = mtd["old"], mtd["new"]
+        assert oldTable.column("detid") == newTable.column("detid")
+        assert np.allclose(oldTable.column("difc"), newTable.column("difc"))
+
+    oldTime, newTime = np.median(oldTimes), np.median(newTimes)
+    rowCount = mtd["new"].rowCount()
+    print(f"{resolution:>10} {rowCount:>8} {oldTime:>10.3f} {newTime:>10.3f} {oldTime / newTime:>8.1f}")
@@ -0,0 +1,71 @@
+"""
+  Benchmark script for: `Indexer` manifest mode.
+
+  Builds synthetic calibration histories of increasing length, and compares the time to construct an `Indexer`
+  and to answer latest-applicable-version queries, with and without the index manifest.
+  The first construction in manifest mode writes the manifest: only later constructions are timed.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from random import randint, seed
+
+from snapred.backend.dao.indexing.IndexEntry import IndexEntry
+from snapred.backend.data.Indexer import Indexer, IndexerType
+from snapred.meta.mantid.WorkspaceNameGenerator import ValueFormatter as wnvf
+from snapred.meta.redantic import write_model_list_pretty
+
+# USER INPUT ##########################
+historyLengths = [10, 100, 500, 2000]
+queries = 1000
+constructions = 5
+#######################################
+
+seed(42)
+
+
+def createHistory(directory: Path, nVersions: int):
+    symbols = [">=", ">", "<=", "<", ""]
+    entries = []
+    for version in range(1, nVersions + 1):
+        runNumber = randint(10000, 60000)
+        entries.append(
+            IndexEntry(
+                runNumber=str(runNumber),
+                useLiteMode=True,
+                version=version,
+                appliesTo=f"{symbols[randint(0, 4)]}{runNumber}",
+                timestamp=float(version),
+            )
+        )
+        (directory / wnvf.pathVersion(version)).mkdir()
+    write_model_list_pretty(entries, directory / f"{IndexerType.CALIBRATION}Index.json")
+
+
+def timeIndexer(directory: Path, useManifest: bool):
+    if useManifest:
+        # write the manifest
+        Indexer(indexerType=IndexerType.CALIBRATION, directory=directory, useManifest=True)
+
+    start = time.perf_counter()
+    for _ in range(constructions):
+        indexer = Indexer(indexerType=IndexerType.CALIBRATION, directory=directory, useManifest=useManifest)
+    construction = (time.perf_counter() - start) / constructions
+
+    runNumbers = [str(randint(10000, 60000)) for _ in range(queries)]
+    start = time.perf_counter()
+    for runNumber in runNumbers:
+        indexer.latestApplicableVersion(runNumber)
+    query = (time.perf_counter() - start) / queries
+    return construction, query
+
+
+print(f"{'versions':>8} {'mode':>9} {'construct [ms]':>15} {'query [us]':>11}")
+for nVersions in historyLengths:
+    with tempfile.TemporaryDirectory() as tmpDir:
+        directory = Path(tmpDir)
+        createHistory(directory, nVersions)
+        for label, useManifest in (("index", False), ("manifest", True)):
+            construction, query = timeIndexer(directory, useManifest)
+            print(f"{nVersions:>8} {label:>9} {construction * 1.0e3:>15.2f} {query * 1.0e6:>11.2f}")
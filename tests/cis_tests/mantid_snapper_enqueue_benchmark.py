@@ -0,0 +1,52 @@
+"""
+  Benchmark script for: `MantidSnapper` enqueue overhead.
+
+  Compares the time to enqueue algorithms when every call inspects a newly-created algorithm
+  (the previous behavior, emulated by clearing the schema cache before each call)
+  against the cached algorithm-property schemas.  No algorithms are executed.
+"""
+
+import time
+
+import snapred.backend.recipe.algorithm  # noqa: F401
+from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
+
+# USER INPUT ##########################
+# the algorithms enqueued by a single iteration of `PixelDiffCalRecipe`
+algorithms = {
+    "ConvertUnits": {"InputWorkspace": "ws", "OutputWorkspace": "ws", "Target": "dSpacing"},
+    "Rebin": {"InputWorkspace": "ws", "OutputWorkspace": "ws", "Params": "0.1,-0.001,3.0"},
+    "CrossCorrelate": {"InputWorkspace": "ws", "OutputWorkspace": "cc", "ReferenceSpectra": 1},
+    "GetDetectorOffsets": {"InputWorkspace": "cc", "OutputWorkspace": "offsets", "MaskWorkspace": "mask"},
+    "ConvertDiffCal": {"OffsetsWorkspace": "offsets", "OutputWorkspace": "table"},
+    "ApplyDiffCal": {"InstrumentWorkspace": "ws", "CalibrationWorkspace": "table"},
+    "DeleteWorkspace": {"Workspace": "cc"},
+}
+repetitions = 200
+#######################################
+
+
+def enqueueAll(snapper: MantidSnapper, clearCache: bool):
+    for name, kwargs in algorithms.items():
+        if clearCache:
+            MantidSnapper.clearSchemaCache()
+        getattr(snapper, name)(f"Enqueue {name}", **kwargs)
+    # discard the queue without executing it
+    snapper.cleanup()
+
+
+snapper = MantidSnapper(None, "Benchmark")
+results = {}
+for label, clearCache in (("uncached", True), ("cached", False)):
+    MantidSnapper.clearSchemaCache()
+    enqueueAll(snapper, clearCache)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        enqueueAll(snapper, clearCache)
+    elapsed = time.perf_counter() - start
+    results[label] = elapsed / (repetitions * len(algorithms))
+
+print(f"{'mode':>8} {'per enqueue [us]':>16}")
+for label, perCall in results.items():
+    print(f"{label:>8} {perCall * 1.0e6:>16.1f}")
+print(f"speedup: {results['uncached'] / results['cached']:.1f}x")
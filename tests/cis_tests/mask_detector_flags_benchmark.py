@@ -0,0 +1,70 @@
+"""
+  Benchmark script for: `MaskDetectorFlags`.
+
+  Compares the previous per-pixel implementation (`indexOf`, `isMonitor`, `isMasked` and `setMasked`
+  for every detector ID) against the array-based implementation, at lite and native resolution.
+"""
+
+import time
+
+import numpy as np
+from mantid.simpleapi import (
+    CloneWorkspace,
+    ExtractMask,
+    LoadEmptyInstrument,
+    MaskDetectorFlags,
+    mtd,
+)
+
+import snapred.backend.recipe.algorithm
+from snapred.meta.Config import Config
+
+#User inputs ###########################
+maskedFraction = 0.05
+repeats = 3
+#######################################
+
+
+def legacyMaskDetectorFlags(maskWSName, outputWSName):
+    maskWS = mtd[maskWSName]
+    detectors = mtd[outputWSName].detectorInfo()
+    ids = detectors.detectorIDs()
+    for id_ in ids:
+        ix = detectors.indexOf(int(id_))
+        if detectors.isMonitor(ix):
+            continue
+        detectors.setMasked(ix, maskWS.isMasked(int(id_)))
+
+
+rng = np.random.default_rng(seed=42)
+print(f"{'resolution':>10} {'pixels':>8} {'old [s]':>10} {'new [s]':>10} {'speedup':>8}")
+for resolution in ("lite", "native"):
+    instrumentWS = f"instrument_{resolution}"
+    maskWS = f"mask_{resolution}"
+    LoadEmptyInstrument(
+        Filename=Config[f"instrument.{resolution}.definition.file"],
+        OutputWorkspace=instrumentWS,
+    )
+    ExtractMask(InputWorkspace=instrumentWS, OutputWorkspace=maskWS)
+    mask = mtd[maskWS]
+    pixelCount = mask.getNumberHistograms()
+    for wi in rng.choice(pixelCount, size=int(maskedFraction * pixelCount), replace=False):
+        mask.setY(int(wi), [1.0])
+
+    oldTimes, newTimes = [], []
+    for _ in range(repeats):
+        CloneWorkspace(InputWorkspace=instrumentWS, OutputWorkspace="old")
+        start = time.perf_counter()
+        legacyMaskDetectorFlags(maskWS, "old")
+        oldTimes.append(time.perf_counter() - start)
+
+        CloneWorkspace(InputWorkspace=instrumentWS, OutputWorkspace="new")
+        start = time.perf_counter()
+        MaskDetectorFlags(MaskWorkspace=maskWS, OutputWorkspace="new")
+        newTimes.append(time.perf_counter() - start)
+
+        oldInfo, newInfo = mtd["old"].detectorInfo(), mtd["new"].detectorInfo()
+        assert all(oldInfo.isMasked(ix) == newInfo.isMasked(ix) for ix in range(len(oldInfo)))
+
+    oldTime, newTime = np.median(oldTimes), np.median(newTimes)
+    print(f"{resolution:>10} {pixelCount:>8} {oldTime:>10.3f} {newTime:>10.3f} {oldTime / newTime:>8.1f}")
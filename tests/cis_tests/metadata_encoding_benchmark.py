@@ -0,0 +1,69 @@
+"""
+  Benchmark script for: `NexusHDF5Metadata` encodings.
+
+  Writes the "/metadata" group of a reduction record, with its `pixelGroupingParameters` replicated
+  to a realistic number of groups, and compares the write time, read time, number of HDF5 objects, and file size
+  of the `DATASETS` encoding (one dataset per leaf node) and the `ARRAYS` encoding.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+
+from snapred.backend.data.NexusHDF5Metadata import MetadataEncoding
+from snapred.backend.data.NexusHDF5Metadata import NexusHDF5Metadata as n5m
+from snapred.meta.Config import Resource
+
+# USER INPUT ##########################
+# any reduction record
+recordFilePath = Resource.getPath("inputs/reduction/ReductionRecord_20240614T130420.json")
+# the number of pixel-grouping parameters for each grouping
+groupings = {"column": 6, "bank": 2, "all": 1, "native": 1000}
+repeats = 3
+#######################################
+
+with open(recordFilePath, "r") as f:
+    record = json.load(f)
+template = next(iter(record["pixelGroupingParameters"].values()))[0]
+pixelGroupingParameters = {}
+for grouping, numberOfGroups in groupings.items():
+    pixelGroupingParameters[grouping] = []
+    for n in range(numberOfGroups):
+        parameters = copy.deepcopy(template)
+        parameters["groupID"] = n + 1
+        pixelGroupingParameters[grouping].append(parameters)
+record["pixelGroupingParameters"] = pixelGroupingParameters
+
+
+def timeEncoding(encoding: MetadataEncoding):
+    write, read, objects, size = 0.0, 0.0, 0, 0
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            filePath = Path(tmpDir) / "metadata.h5"
+            start = time.perf_counter()
+            with h5py.File(filePath, "w") as h5:
+                n5m.insertMetadataGroup(h5, record, "/metadata", encoding=encoding)
+            write += time.perf_counter() - start
+
+            start = time.perf_counter()
+            with h5py.File(filePath, "r") as h5:
+                n5m.extractMetadataGroup(h5, "/metadata")
+            read += time.perf_counter() - start
+
+            with h5py.File(filePath, "r") as h5:
+                names = []
+                h5["/metadata"].visit(names.append)
+                objects = len(names)
+            size = os.path.getsize(filePath)
+    return write / repeats, read / repeats, objects, size
+
+
+print(f"{'encoding':>9} {'write [ms]':>11} {'read [ms]':>10} {'objects':>8} {'size [KiB]':>11}")
+for encoding in MetadataEncoding:
+    write, read, objects, size = timeEncoding(encoding)
+    print(f"{encoding.value:>9} {write * 1.0e3:>11.1f} {read * 1.0e3:>10.1f} {objects:>8} {size / 2**10:>11.1f}")
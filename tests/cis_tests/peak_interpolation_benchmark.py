@@ -0,0 +1,66 @@
+"""
+  Benchmark script for: the peak-region interpolation of `RemoveEventBackground`.
+
+  Fills the peak regions of a set of synthetic pixel histograms, each with its own d-spacing bin edges,
+  as for the pixels of one group after conversion to d-spacing.
+  Compares the previous implementation (a loop over pixels and regions, with `np.where` and `np.linspace`
+  for each (pixel, region)) against `PeakWindows.interpolatePeakRegions`, and checks that the results are identical.
+"""
+
+import time
+
+import numpy as np
+
+from snapred.meta.mantid.PeakWindows import interpolatePeakRegions
+
+# USER INPUT ##########################
+numberOfPixels = 20000
+numberOfBins = 2000
+numberOfPeaks = [10, 50, 200]
+repeats = 3
+#######################################
+
+rng = np.random.default_rng(2024)
+tofEdges = np.geomspace(2000.0, 14500.0, numberOfBins + 1)
+# a different conversion to d-spacing for each pixel
+x = tofEdges / rng.uniform(4000.0, 4500.0, (numberOfPixels, 1))
+y = rng.poisson(20.0, (numberOfPixels, numberOfBins)).astype(float)
+
+
+def legacyInterpolate(x, y, regions):
+    for detid in range(len(y)):
+        y_data = y[detid].copy()
+        x_data = x[detid]
+        for mask in regions:
+            mask_indices = (x_data >= mask[0]) & (x_data <= mask[1])
+            before_mask = np.where(x_data < mask[0])[0][-1]
+            after_mask = np.where(x_data > mask[1])[0][0]
+            interp_values = np.linspace(y_data[before_mask], y_data[after_mask], mask_indices.sum())
+            y_data[mask_indices[:-1]] = interp_values
+        y[detid] = y_data
+
+
+print(f"{numberOfPixels} pixels of {numberOfBins} bins")
+print(f"{'peaks':>6} {'old [s]':>9} {'new [s]':>9} {'speedup':>8}")
+for peakCount in numberOfPeaks:
+    # the peak regions must lie within the d-spacing range of every pixel
+    centers = np.sort(rng.uniform(x[:, 0].max() * 1.05, x[:, -1].min() * 0.95, peakCount))
+    widths = centers * 0.004
+    regions = list(zip(centers - widths, centers + widths))
+
+    oldTimes, newTimes = [], []
+    for _ in range(repeats):
+        yOld = y.copy()
+        start = time.perf_counter()
+        legacyInterpolate(x, yOld, regions)
+        oldTimes.append(time.perf_counter() - start)
+
+        yNew = y.copy()
+        start = time.perf_counter()
+        interpolatePeakRegions(x, yNew, ([r[0] for r in regions], [r[1] for r in regions]))
+        newTimes.append(time.perf_counter() - start)
+
+        assert np.array_equal(yOld, yNew)
+
+    oldTime, newTime = np.median(oldTimes), np.median(newTimes)
+    print(f"{peakCount:>6} {oldTime:>9.3f} {newTime:>9.3f} {oldTime / newTime:>8.1f}")
@@ -0,0 +1,102 @@
+"""
+  Benchmark script for: `PixelGroupingParametersCalculationAlgorithm`.
+
+  Compares the previous per-detector calculation of the group-mean L2, 2theta and azimuth
+  (one `DetectorInfo` call per pixel per quantity) against the array-based implementation,
+  for several grouping schemes at lite and native resolution, and verifies that the results agree.
+
+  The "table" column times `extractDetectorTable` alone: a single `PreprocessDetectorsToMD` pass
+  tabulating the detector ID, L2, 2theta, azimuth and mask flag of every pixel
+  (the azimuth is read per pixel from `DetectorInfo` only for a non-standard geometry).
+  The "algorithm" column times the complete recipe.
+"""
+
+import time
+
+import numpy as np
+from mantid.simpleapi import mtd
+
+import snapred.backend.recipe.algorithm
+from snapred.backend.dao.ingredients import PixelGroupingIngredients
+from snapred.backend.dao.ingredients.GroceryListItem import GroceryListItem
+from snapred.backend.dao.request.FarmFreshIngredients import FarmFreshIngredients
+from snapred.backend.data.GroceryService import GroceryService
+from snapred.backend.recipe.algorithm.PixelGroupingParametersCalculationAlgorithm import (
+    PixelGroupingParametersCalculationAlgorithm as ThisAlgo,
+)
+from snapred.backend.recipe.PixelGroupingParametersCalculationRecipe import (
+    PixelGroupingParametersCalculationRecipe as pgpRecipe,
+)
+from snapred.backend.service.SousChef import SousChef
+from snapred.meta.Config import Config
+
+# USER INPUT ##########################
+runNumber = "58882"
+groupingSchemes = ["Column", "Bank", "All"]
+liteModes = [True, False]
+Config._config["cis_mode"] = False
+#######################################
+
+
+def legacyGroupMeans(groupingWSName):
+    # the per-detector loop previously used by `PixelGroupingParametersCalculationAlgorithm`
+    groupingWS = mtd[groupingWSName]
+    detectorInfo = groupingWS.detectorInfo()
+    means = []
+    for groupID in groupingWS.getGroupIDs():
+        meanL2, mean2Theta, meanPhi, normalizationFactor = 0.0, 0.0, 0.0, 0.0
+        for detID in groupingWS.getDetectorIDsOfGroup(int(groupID)):
+            detIndex = detectorInfo.indexOf(int(detID))
+            if detectorInfo.isMonitor(int(detIndex)) or detectorInfo.isMasked(int(detIndex)):
+                continue
+            twoTheta = detectorInfo.twoTheta(int(detIndex))
+            solidAngleFactor = np.sin(twoTheta / 2.0)
+            mean2Theta += twoTheta * solidAngleFactor
+            try:
+                meanPhi += detectorInfo.azimuthal(int(detIndex)) * solidAngleFactor
+            except RuntimeError as e:
+                if "Failed to create up axis orthogonal to the beam direction" not in str(e):
+                    raise
+            meanL2 += detectorInfo.l2(int(detIndex)) * solidAngleFactor
+            normalizationFactor += solidAngleFactor
+        means.append((meanL2 / normalizationFactor, mean2Theta / normalizationFactor, meanPhi / normalizationFactor))
+    return means
+
+
+print(f"{'mode':>6} {'grouping':>8} {'groups':>6} {'old [s]':>10} {'table [s]':>12} {'algorithm [s]':>13}")
+for isLite in liteModes:
+    farmFresh = FarmFreshIngredients(
+        runNumber=runNumber,
+        useLiteMode=isLite,
+        focusGroups=[{"name": groupingSchemes[0], "definition": ""}],
+    )
+    ingredients = PixelGroupingIngredients(
+        instrumentState=SousChef().prepInstrumentState(farmFresh),
+        nBinsAcrossPeakWidth=farmFresh.nBinsAcrossPeakWidth,
+    )
+    for groupingScheme in groupingSchemes:
+        clerk = GroceryListItem.builder()
+        clerk.name("groupingWorkspace").fromRun(runNumber).grouping(groupingScheme).useLiteMode(isLite).add()
+        groceries = GroceryService().fetchGroceryDict(groceryDict=clerk.buildDict())
+
+        start = time.perf_counter()
+        expected = legacyGroupMeans(groceries["groupingWorkspace"])
+        oldTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        algo = ThisAlgo()
+        algo.initialize()
+        algo.extractDetectorTable(groceries["groupingWorkspace"])
+        tableTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parameters = pgpRecipe().executeRecipe(ingredients, groceries)["parameters"]
+        algorithmTime = time.perf_counter() - start
+
+        actual = [(p.L2, p.twoTheta, p.azimuth) for p in parameters]
+        assert np.allclose(actual, expected, rtol=1.0e-9, atol=1.0e-12)
+        mode = "lite" if isLite else "native"
+        print(
+            f"{mode:>6} {groupingScheme:>8} {len(actual):>6} {oldTime:>10.3f}"
+            f" {tableTime:>12.3f} {algorithmTime:>13.3f}"
+        )
@@ -0,0 +1,109 @@
+"""
+  Benchmark script for: `LocalDataService.writeReductionData`.
+
+  Writes synthetic focused reduction outputs and a pixel mask, and compares the write time and file size of:
+    * the previous path: one `SaveNexus(Append=True)` per workspace, then the "/metadata" group;
+    * the single-pass writer, with and without compressed datasets;
+    * the single-pass writer on a background thread: the time until the write is queued, and until it is flushed.
+  The separate `SaveDiffCal` copy of the mask is the same in every case: it is neither timed nor included in the sizes.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import h5py
+from mantid.api import WorkspaceGroup
+from mantid.simpleapi import CreateSampleWorkspace, DeleteWorkspace, ExtractMask, SaveNexus, mtd
+
+from snapred.backend.dao.reduction.ReductionRecord import ReductionRecord
+from snapred.backend.data.LocalDataService import LocalDataService
+from snapred.backend.data.NexusHDF5Metadata import NexusHDF5Metadata as n5m
+from snapred.meta.Config import Resource
+from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceNameGenerator as wng
+from snapred.meta.redantic import parse_file_as
+
+# USER INPUT ##########################
+runNumber = "58882"
+# the focused groupings, and the number of spectra in each
+groupings = {"column": 6, "bank": 2, "all": 1}
+numberOfBins = 20000
+repeats = 3
+# any reduction record: it is only used as the "/metadata" group
+recordFilePath = Resource.getPath("inputs/reduction/ReductionRecord_20240614T130420.json")
+#######################################
+
+service = LocalDataService()
+timestamp = service.getUniqueTimestamp()
+record = parse_file_as(ReductionRecord, recordFilePath)
+
+# the synthetic reduction outputs, and the combined pixel mask
+workspaceNames = []
+for grouping, numberOfSpectra in groupings.items():
+    ws = wng.reductionOutput().unit("dsp").group(grouping).runNumber(runNumber).timestamp(timestamp).build()
+    CreateSampleWorkspace(
+        OutputWorkspace=ws,
+        Function="Powder Diffraction",
+        NumBanks=numberOfSpectra,
+        BankPixelWidth=1,
+        XUnit="dSpacing",
+        XMin=0.1,
+        XMax=5.0,
+        BinWidth=4.9 / numberOfBins,
+    )
+    workspaceNames.append(ws)
+sample = mtd.unique_hidden_name()
+CreateSampleWorkspace(OutputWorkspace=sample, NumBanks=4, BankPixelWidth=32)
+mask = wng.reductionPixelMask().runNumber(runNumber).timestamp(timestamp).build()
+ExtractMask(InputWorkspace=sample, OutputWorkspace=mask)
+DeleteWorkspace(sample)
+workspaceNames.append(mask)
+
+workspaces = WorkspaceGroup()
+for ws in workspaceNames:
+    workspaces.addWorkspace(mtd[ws])
+
+writer = ThreadPoolExecutor(max_workers=1)
+
+
+def writeAppended(filePath: Path):
+    for ws in workspaceNames:
+        SaveNexus(InputWorkspace=ws, Filename=str(filePath), Append=True)
+    with h5py.File(filePath, "a") as h5:
+        n5m.insertMetadataGroup(h5, record.dict(), "/metadata")
+
+
+def timeWriter(write, background: bool = False):
+    queued, written, size = 0.0, 0.0, 0
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            filePath = Path(tmpDir) / "reduced.nxs.h5"
+            start = time.perf_counter()
+            if background:
+                future = writer.submit(write, filePath)
+                queued += time.perf_counter() - start
+                future.result()
+            else:
+                write(filePath)
+                queued += time.perf_counter() - start
+            written += time.perf_counter() - start
+            size = os.path.getsize(filePath)
+    return queued / repeats, written / repeats, size
+
+
+def singlePass(compress: bool):
+    return lambda filePath: service._writeReductionDataFile(filePath, workspaces, record, compress)
+
+
+print(f"{'writer':>24} {'returns [s]':>12} {'written [s]':>12} {'size [MiB]':>11}")
+for label, write, background in (
+    ("SaveNexus, appended", writeAppended, False),
+    ("single pass", singlePass(False), False),
+    ("single pass, compressed", singlePass(True), False),
+    ("background, compressed", singlePass(True), True),
+):
+    queued, written, size = timeWriter(write, background)
+    print(f"{label:>24} {queued:>12.3f} {written:>12.3f} {size / 2**20:>11.2f}")
+writer.shutdown()
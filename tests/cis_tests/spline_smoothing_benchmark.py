@@ -0,0 +1,47 @@
+"""
+  Benchmark script for: `SplineSmoothing.smoothSpectra`.
+
+  Smooths a set of synthetic spectra, as `RemoveEventBackground` does for every pixel,
+  with a thread pool and with a process pool, across a range of worker counts.
+  The results are checked to be identical to the serial results, and the speedup is relative to the serial time.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from snapred.meta.mantid.SplineSmoothing import smoothSpectra
+
+# USER INPUT ##########################
+numberOfSpectra = 5000
+numberOfBins = 500
+smoothingParameter = 0.0001
+# the serial time is measured first: each worker count should exceed 1
+workerCounts = [2, 4, 8, os.cpu_count()]
+chunkSize = 512
+repeats = 3
+#######################################
+
+rng = np.random.default_rng(12345)
+x = np.linspace(0.5, 3.5, numberOfBins) * (1.0 + 0.01 * rng.random((numberOfSpectra, 1)))
+y = np.exp(-x) * (100.0 + 10.0 * np.sin(20.0 * x)) + rng.poisson(5.0, x.shape)
+
+
+def timeSmoothing(maxWorkers: int, executor: str):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = smoothSpectra(x, y, smoothingParameter, maxWorkers=maxWorkers, executor=executor, chunkSize=chunkSize)
+        times.append(time.perf_counter() - start)
+    return np.median(times), result
+
+
+serialTime, expected = timeSmoothing(1, "thread")
+print(f"{numberOfSpectra} spectra of {numberOfBins} bins: serial {serialTime:.3f} s")
+print(f"{'executor':>9} {'workers':>8} {'time [s]':>9} {'speedup':>8}")
+for executor in ("thread", "process"):
+    for maxWorkers in sorted(set(workerCounts) - {1}):
+        elapsed, result = timeSmoothing(maxWorkers, executor)
+        assert all(np.array_equal(r, e, equal_nan=True) for r, e in zip(result, expected))
+        print(f"{executor:>9} {maxWorkers:>8} {elapsed:>9.3f} {serialTime / elapsed:>8.1f}")
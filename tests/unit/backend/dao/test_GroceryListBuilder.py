@@ -156,6 +156,15 @@ class TestGroceryListBuilder(unittest.TestCase):
         assert item.workspaceType == "neutron"
         assert item.keepItClean is False
 
+    def test_nexus_readOnly(self):
+        item = GroceryListBuilder().neutron(self.runNumber).native().build()
+        assert item.readOnly is False
+
+        item = GroceryListBuilder().neutron(self.runNumber).native().readOnly().build()
+        assert item.workspaceType == "neutron"
+        assert item.keepItClean is True
+        assert item.readOnly is True
+
     def test_build_list(self):
         builder = GroceryListBuilder()
         builder.neutron(self.runNumber).native().add()
@@ -97,6 +97,10 @@ class TestDataExportService(unittest.TestCase):
         self.instance.exportNormalizationWorkspaces(mock.Mock())
         assert self.instance.dataService.writeNormalizationWorkspaces.called
 
+    def test_exportFocussedNormalization(self):
+        self.instance.exportFocussedNormalization("123", True, 2, "key", "ws")
+        self.instance.dataService.writeFocussedNormalization.assert_called_once_with("123", True, 2, "key", "ws")
+
     ##### TEST REDUCTION METHODS #####
 
     def test_exportReductionRecord(self):
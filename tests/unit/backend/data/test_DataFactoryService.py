@@ -108,6 +108,11 @@ class TestDataFactoryService(unittest.TestCase):
         actual = self.instance.constructStateId(arg)
         assert actual == self.expected(arg)
 
+    def test_constructStateIds(self):
+        arg = ["12345", "67890"]
+        actual = self.instance.constructStateIds(arg)
+        assert actual == self.expected(arg)
+
     def test_stateExists(self):
         self.instance.lookupService.stateExists = mock.Mock(return_value=True)
         actual = self.instance.stateExists("123")
@@ -253,6 +258,11 @@ class TestDataFactoryService(unittest.TestCase):
             actual = self.instance.getThisOrLatestNormalizationVersion("123", useLiteMode, self.version)
             assert actual == self.expected("Normalization", "123", self.version)
 
+    def test_getFocussedNormalization(self):
+        for useLiteMode in [True, False]:
+            actual = self.instance.getFocussedNormalization("123", useLiteMode, self.version, "key", "ws")
+            assert actual == self.expected("123", useLiteMode, self.version, "key", "ws")
+
     ## TEST REDUCTION METHODS
 
     def test_getReductionState(self):
@@ -287,6 +297,11 @@ class TestDataFactoryService(unittest.TestCase):
             actual = self.instance.getReductionData("12345", useLiteMode, self.version)
             assert actual == self.expected("12345", useLiteMode, self.version)
 
+    def test_getReducedSpectra(self):
+        arg = ("12345", True, 1718909801.91552, ["column"], [0, 2], (1.0, 2.0))
+        actual = self.instance.getReducedSpectra(*arg)
+        assert actual == self.expected(*arg)
+
     ##### TEST WORKSPACE METHODS ####
 
     def test_workspaceDoesExist(self):
@@ -0,0 +1,182 @@
+import os
+import tempfile
+from pathlib import Path
+
+import h5py
+import pytest
+
+from snapred.backend.dao.state.DetectorState import DetectorState
+from snapred.backend.data.DetectorStateCache import DetectorStateCache, PVFileHandlePool, fileSignature
+
+
+def _writeFile(path: Path, value: float = 1.0):
+    with h5py.File(path, "w") as f:
+        f["entry/DASlogs/det_arc1/value"] = [value]
+
+
+def _detectorState(wav: float = 1.1) -> DetectorState:
+    return DetectorState(arc=(1.0, 2.0), wav=wav, freq=1.2, guideStat=1, lin=(1.0, 2.0))
+
+
+def test_fileSignature():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        assert fileSignature(path) is None
+        _writeFile(path)
+        stat_ = os.stat(path)
+        assert fileSignature(path) == (stat_.st_mtime_ns, stat_.st_size)
+
+
+def test_pool_bad_size():
+    with pytest.raises(ValueError, match="at least one"):
+        PVFileHandlePool(0)
+
+
+def test_pool_reuses_handle():
+    pool = PVFileHandlePool(2)
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        handle = pool.get(path)
+        assert pool.get(path) is handle
+        assert handle["entry/DASlogs/det_arc1/value"][0] == 1.0
+        pool.close()
+        assert len(pool) == 0
+        assert not handle.id.valid
+
+
+def test_pool_missing_file():
+    pool = PVFileHandlePool(2)
+    with pytest.raises(FileNotFoundError, match="does not exist"):
+        pool.get(Path("/does/not/exist/SNAP_1.nxs.h5"))
+
+
+def test_pool_evicts_least_recently_used():
+    pool = PVFileHandlePool(2)
+    with tempfile.TemporaryDirectory() as tmpDir:
+        paths = [Path(tmpDir) / f"SNAP_{n}.nxs.h5" for n in range(3)]
+        for path in paths:
+            _writeFile(path)
+        handle0 = pool.get(paths[0])
+        pool.get(paths[1])
+        # touch the first file, so that the second is the least-recently used
+        pool.get(paths[0])
+        pool.get(paths[2])
+        assert len(pool) == 2
+        assert paths[0] in pool
+        assert paths[1] not in pool
+        assert paths[2] in pool
+        assert handle0.id.valid
+        pool.close()
+
+
+def test_pool_reopens_modified_file():
+    pool = PVFileHandlePool(2)
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        stale = pool.get(path)
+        # the file's modification time changes
+        os.utime(path, ns=(0, 0))
+        fresh = pool.get(path)
+        assert fresh is not stale
+        assert not stale.id.valid
+        assert fresh["entry/DASlogs/det_arc1/value"][0] == 1.0
+        pool.close()
+
+
+def test_cache_store_and_lookup():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        cacheFile = Path(tmpDir) / "cache" / "detectorStates.jsonl"
+        cache = DetectorStateCache(cacheFile)
+        assert cache.lookup(path) is None
+
+        detectorState = _detectorState()
+        cache.store(path, detectorState)
+        assert cacheFile.exists()
+        assert cache.lookup(path) == detectorState
+
+        # the entry persists
+        assert DetectorStateCache(cacheFile).lookup(path) == detectorState
+
+
+def test_cache_lookup_modified_file():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        cache = DetectorStateCache(Path(tmpDir) / "detectorStates.jsonl")
+        cache.store(path, _detectorState())
+        os.utime(path, ns=(0, 0))
+        assert cache.lookup(path) is None
+
+
+def test_cache_lookup_missing_file():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        cache = DetectorStateCache(Path(tmpDir) / "detectorStates.jsonl")
+        cache.store(path, _detectorState())
+        assert len(cache) == 0
+        assert cache.lookup(path) is None
+
+
+def test_cache_last_entry_wins():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        cacheFile = Path(tmpDir) / "detectorStates.jsonl"
+        cache = DetectorStateCache(cacheFile)
+        cache.store(path, _detectorState(1.1))
+        cache.store(path, _detectorState(2.2))
+        assert len(cacheFile.read_text().splitlines()) == 2
+        assert DetectorStateCache(cacheFile).lookup(path).wav == 2.2
+        # the superseded entry is removed when the file is loaded
+        assert len(cacheFile.read_text().splitlines()) == 1
+        assert DetectorStateCache(cacheFile).lookup(path).wav == 2.2
+
+
+def test_cache_skips_invalid_lines():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        cacheFile = Path(tmpDir) / "detectorStates.jsonl"
+        cache = DetectorStateCache(cacheFile)
+        cache.store(path, _detectorState())
+        with open(cacheFile, "a") as f:
+            f.write('{"path": "truncated')
+        cache.clear()
+        assert len(cache) == 1
+        assert cache.lookup(path) == _detectorState()
+        # the invalid line is removed when the file is loaded
+        assert len(cacheFile.read_text().splitlines()) == 1
+
+
+def test_cache_compaction_bounds_file():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        paths = [Path(tmpDir) / f"SNAP_{n}.nxs.h5" for n in range(3)]
+        cacheFile = Path(tmpDir) / "detectorStates.jsonl"
+        for n in range(5):
+            cache = DetectorStateCache(cacheFile)
+            for path in paths:
+                _writeFile(path, float(n))
+                cache.store(path, _detectorState(float(n)))
+        # at most one line per run file is carried over from each load
+        assert len(cacheFile.read_text().splitlines()) == 2 * len(paths)
+        cache = DetectorStateCache(cacheFile)
+        assert len(cache) == len(paths)
+        assert len(cacheFile.read_text().splitlines()) == len(paths)
+        assert all(cache.lookup(path).wav == 4.0 for path in paths)
+        assert [p.name for p in Path(tmpDir).iterdir() if p.name.startswith(".")] == []
+
+
+def test_cache_unwritable_file():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        path = Path(tmpDir) / "SNAP_1.nxs.h5"
+        _writeFile(path)
+        # the cache file's parent is a file: the entry cannot be written to disk
+        blocker = Path(tmpDir) / "blocker"
+        blocker.write_text("")
+        cache = DetectorStateCache(blocker / "detectorStates.jsonl")
+        cache.store(path, _detectorState())
+        assert cache.lookup(path) == _detectorState()
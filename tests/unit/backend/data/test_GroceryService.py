@@ -25,6 +25,7 @@ from mantid.simpleapi import (
     mtd,
 )
 from mantid.testing import assert_almost_equal as assert_wksp_almost_equal
+from util.Config_helpers import Config_override
 from util.helpers import createCompatibleDiffCalTable, createCompatibleMask
 from util.instrument_helpers import mapFromSampleLogs
 from util.kernel_helpers import tupleFromQuat, tupleFromV3D
@@ -917,6 +918,57 @@ class TestGroceryService(unittest.TestCase):
             rtol=self.rtolValue,
         )
 
+    def test_lease_neutron_data(self):
+        self.instance._createNeutronFilename = mock.Mock(return_value=self.sampleWSFilePath)
+        testItem = (self.runNumber, False)
+        testKey = self.instance._key(*testItem)
+        workspaceNameRaw = self.instance._createRawNeutronWorkspaceName(*testItem)
+        workspaceNameCopy1 = self.instance._createCopyNeutronWorkspaceName(*testItem, 1)
+        self.clearoutWorkspaces()
+
+        # the first lease loads the data, and no copy is made
+        res = self.instance.leaseNeutronData(*testItem)
+        assert res["result"]
+        assert res["loader"] == "LoadNexusProcessed"
+        assert res["workspace"] == workspaceNameRaw
+        assert not mtd.doesExist(workspaceNameCopy1)
+        assert self.instance._loadedRuns == {testKey: 0}
+        assert self.instance._neutronLeases == {workspaceNameRaw: 1}
+
+        # further leases share the cached workspace
+        res = self.instance.leaseNeutronData(*testItem)
+        assert res["loader"] == "cached"
+        assert res["workspace"] == workspaceNameRaw
+        assert self.instance._neutronLeases == {workspaceNameRaw: 2}
+
+        # a leased workspace is live: it cannot be evicted
+        assert self.instance._hasLiveCopies(*testItem)
+
+        # a copy is made only when a consumer needs to modify the data
+        mutable = self.instance.mutableNeutronData(workspaceNameRaw)
+        assert mutable == workspaceNameCopy1
+        assert mtd.doesExist(workspaceNameCopy1)
+        assert self.instance._loadedRuns == {testKey: 1}
+        assert self.instance._neutronLeases == {workspaceNameRaw: 1}
+        assert_wksp_almost_equal(
+            Workspace1=self.sampleWS,
+            Workspace2=workspaceNameCopy1,
+            rtol=self.rtolValue,
+        )
+        # the copy is already owned by the consumer
+        assert self.instance.mutableNeutronData(workspaceNameCopy1) == workspaceNameCopy1
+
+        self.instance.releaseNeutronData(workspaceNameRaw)
+        assert self.instance._neutronLeases == {}
+        # releasing an unleased workspace is ignored
+        self.instance.releaseNeutronData(workspaceNameRaw)
+        assert self.instance._neutronLeases == {}
+
+    def test_rebuildNeutronCache_drops_leases(self):
+        self.instance._neutronLeases = {"not_a_workspace": 1}
+        self.instance.rebuildNeutronCache()
+        assert self.instance._neutronLeases == {}
+
     def test_fetch_cached_lite(self):
         """
         Test the correct behavior when fetching nexus data in Lite mode.
@@ -962,7 +1014,11 @@ class TestGroceryService(unittest.TestCase):
 
         # there is no lite file and nothing cached
         # load native resolution from file, then clone/reduce the native data
+        self.instance.resetCacheStatistics()
         res = self.instance.fetchNeutronDataCached(*testItem)
+        # a single fetch is a single miss, although both the native and the lite data are newly cached
+        assert self.instance._cacheStats["misses"] == 1
+        assert self.instance._cacheStats["hits"] == 0
         assert res["result"]
         assert res["loader"] == "LoadNexusProcessed"
         assert res["workspace"] == workspaceNameLiteCopy1
@@ -985,7 +1041,10 @@ class TestGroceryService(unittest.TestCase):
         # then clone/reduce the native workspace
         assert mtd.doesExist(workspaceNameNativeRaw)
         assert self.instance._loadedRuns == {nativeKey: 0}
+        self.instance.resetCacheStatistics()
         res = self.instance.fetchNeutronDataCached(*testItem)
+        assert self.instance._cacheStats["misses"] == 1
+        assert self.instance._cacheStats["hits"] == 0
         assert res["result"]
         assert res["loader"] == "cached"
         assert res["workspace"] == workspaceNameLiteCopy1
@@ -1082,6 +1141,35 @@ class TestGroceryService(unittest.TestCase):
             )
         self.instance.fetchGroupingDefinition.assert_called_once_with(groceryList[2])
 
+    def test_fetch_grocery_list_readOnly(self):
+        self.instance.leaseNeutronData = mock.Mock(return_value={"result": True, "workspace": "leased"})
+        self.instance.fetchNeutronDataCached = mock.Mock()
+        groceryList = GroceryListItem.builder().native().neutron(self.runNumber).readOnly().buildList()
+
+        res = self.instance.fetchGroceryList(groceryList)
+
+        assert res == ["leased"]
+        self.instance.leaseNeutronData.assert_called_once_with(self.runNumber, False, "")
+        self.instance.fetchNeutronDataCached.assert_not_called()
+
+    def test_fetch_grocery_list_leases_fetched_workspaces(self):
+        # the workspaces already fetched are not evicted by the rest of the fetch
+        leases = []
+
+        def fetchGroupingDefinition(item):
+            leases.append(dict(self.instance._workspaceLeases))
+            return {"result": True, "workspace": item.groupingScheme}
+
+        self.instance.fetchGroupingDefinition = mock.Mock(side_effect=fetchGroupingDefinition)
+        clerk = GroceryListItem.builder()
+        for groupingScheme in ("column", "bank"):
+            clerk.native().fromRun(self.runNumber).grouping(groupingScheme).add()
+
+        assert self.instance.fetchGroceryList(clerk.buildList()) == ["column", "bank"]
+        assert leases == [{}, {"column": 1}]
+        # the leases are released once the fetch is complete
+        assert self.instance._workspaceLeases == {}
+
     def test_fetch_grocery_list_fails(self):
         self.instance.fetchNeutronDataSingleUse = mock.Mock(return_value={"result": False, "workspace": "unimportant"})
         groceryList = GroceryListItem.builder().native().neutron(self.runNumber).dirty().buildList()
@@ -1724,6 +1812,115 @@ class TestGroceryService(unittest.TestCase):
 
         assert self.instance.getCachedWorkspaces() == []
 
+    def test_enforceCacheBudget_disabled(self):
+        self.instance._loadedGroupings = {("column", "556854", True): "g1"}
+        self.instance._touchCache("grouping", ("column", "556854", True), "g1", hit=False)
+        self.create_dumb_workspace("g1")
+        with Config_override("groceryservice.cache.memoryBudget", 0):
+            self.instance._enforceCacheBudget()
+        assert mtd.doesExist("g1")
+        assert self.instance._loadedGroupings == {("column", "556854", True): "g1"}
+        assert self.instance._cacheStats["evictions"] == 0
+
+    def test_enforceCacheBudget_evicts_least_recently_used(self):
+        runKey = ("556854", False)
+        rawWsName = self.instance._createRawNeutronWorkspaceName(*runKey)
+        copyWsName = self.instance._createCopyNeutronWorkspaceName(*runKey, 1)
+        self.instance._loadedRuns = {runKey: 1}
+        self.instance._loadedGroupings = {("column", "556854", False): "g1", ("bank", "556854", False): "g2"}
+        for ws in [rawWsName, copyWsName, "g1", "g2"]:
+            self.create_dumb_workspace(ws)
+
+        # the raw data is least-recently used, but it has a live copy
+        self.instance._touchCache("run", runKey, rawWsName, hit=False)
+        self.instance._touchCache("grouping", ("column", "556854", False), "g1", hit=False)
+        self.instance._touchCache("grouping", ("bank", "556854", False), "g2", hit=False)
+        self.instance._touchCache("grouping", ("column", "556854", False), "g1", hit=True)
+
+        GiB = 1024**3
+        sizes = {rawWsName: GiB, "g1": GiB, "g2": GiB}
+        self.instance._workspaceMemorySize = mock.Mock(side_effect=lambda ws: sizes.get(ws, 0))
+        with Config_override("groceryservice.cache.memoryBudget", 2.5):
+            self.instance._enforceCacheBudget()
+
+        assert mtd.doesExist(rawWsName)
+        assert mtd.doesExist("g1")
+        assert not mtd.doesExist("g2")
+        assert self.instance._loadedRuns == {runKey: 1}
+        assert self.instance._loadedGroupings == {("column", "556854", False): "g1"}
+        assert self.instance._cacheStats == {"hits": 1, "misses": 3, "evictions": 1, "evictedBytes": GiB}
+
+        # once its copy is gone, the raw data may also be evicted
+        DeleteWorkspace(copyWsName)
+        with Config_override("groceryservice.cache.memoryBudget", 1.5):
+            self.instance._enforceCacheBudget(exclude=["g1"])
+        assert not mtd.doesExist(rawWsName)
+        assert mtd.doesExist("g1")
+        assert self.instance._loadedRuns == {}
+        assert self.instance._cacheStats["evictions"] == 2
+
+    def test_enforceCacheBudget_leased(self):
+        self.instance._loadedGroupings = {("column", "556854", False): "g1", ("bank", "556854", False): "g2"}
+        for ws in ["g1", "g2"]:
+            self.create_dumb_workspace(ws)
+            self.instance._touchCache("grouping", ("column" if ws == "g1" else "bank", "556854", False), ws, hit=False)
+        self.instance._workspaceMemorySize = mock.Mock(return_value=1024**3)
+
+        # a leased workspace is not evicted, although it is the least-recently used
+        self.instance.leaseWorkspaces(["g1"])
+        self.instance.leaseWorkspaces(["g1"])
+        with Config_override("groceryservice.cache.memoryBudget", 0.5):
+            self.instance._enforceCacheBudget()
+        assert mtd.doesExist("g1")
+        assert not mtd.doesExist("g2")
+
+        # each lease must be released
+        self.instance.releaseWorkspaces(["g1"])
+        with Config_override("groceryservice.cache.memoryBudget", 0.5):
+            self.instance._enforceCacheBudget()
+        assert mtd.doesExist("g1")
+        self.instance.releaseWorkspaces(["g1"])
+        assert self.instance._workspaceLeases == {}
+        with Config_override("groceryservice.cache.memoryBudget", 0.5):
+            self.instance._enforceCacheBudget()
+        assert not mtd.doesExist("g1")
+
+    def test_enforceCacheBudget_shared_instrument_donor(self):
+        # an instrument donor which is also the cached raw data is only deleted along with the raw data
+        runKey = ("556854", True)
+        rawWsName = self.instance._createRawNeutronWorkspaceName(*runKey)
+        self.instance._loadedRuns = {runKey: 0}
+        self.instance._loadedInstruments = {runKey: rawWsName}
+        self.create_dumb_workspace(rawWsName)
+        self.instance._touchCache("instrument", runKey, rawWsName, hit=False)
+        self.instance._touchCache("run", runKey, rawWsName, hit=True)
+
+        self.instance._workspaceMemorySize = mock.Mock(return_value=1024**3)
+        with Config_override("groceryservice.cache.memoryBudget", 0.5):
+            self.instance._enforceCacheBudget()
+        assert not mtd.doesExist(rawWsName)
+        assert self.instance._loadedInstruments == {}
+        assert self.instance._loadedRuns == {}
+        assert self.instance._cacheStats["evictions"] == 2
+        assert self.instance._cacheStats["evictedBytes"] == 1024**3
+
+    def test_getCacheStatistics(self):
+        self.instance._loadedGroupings = {("column", "556854", True): "g1"}
+        self.create_dumb_workspace("g1")
+        self.instance._touchCache("grouping", ("column", "556854", True), "g1", hit=False)
+        self.instance._touchCache("grouping", ("column", "556854", True), "g1", hit=True)
+        with Config_override("groceryservice.cache.memoryBudget", 1):
+            stats = self.instance.getCacheStatistics()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 0
+        assert stats["cachedWorkspaces"] == 1
+        assert stats["cachedBytes"] == mtd["g1"].getMemorySize()
+        assert stats["budgetBytes"] == 1024**3
+
+        self.instance.resetCacheStatistics()
+        assert self.instance._cacheStats == {"hits": 0, "misses": 0, "evictions": 0, "evictedBytes": 0}
+
     def test_renameWorkspace(self):
         oldName = "old"
         newName = "new"
@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from snapred.backend.data.IPTSIndex import IPTSIndex
+
+
+def _createRuns(home: Path, ipts: str, runs):
+    nexusPath = home / ipts / "nexus"
+    nexusPath.mkdir(parents=True, exist_ok=True)
+    for run in runs:
+        (nexusPath / f"SNAP_{run}.nxs.h5").write_text("")
+    return nexusPath
+
+
+def _index(home: Path, indexPath: Path = None, missTTL: float = 0.0) -> IPTSIndex:
+    indexPath = indexPath if indexPath is not None else home / "shared" / "iptsIndex.json"
+    return IPTSIndex(home, "nexus/", "SNAP_", ".nxs.h5", indexPath, missTTL=missTTL)
+
+
+def test_lookup():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100, 101, 105])
+        _createRuns(home, "IPTS-2", [200, 201])
+        index = _index(home)
+        assert index.lookup("101") == str(home / "IPTS-1") + os.sep
+        assert index.lookup("200") == str(home / "IPTS-2") + os.sep
+        assert len(index) == 2
+
+
+def test_lookup_miss():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100, 105])
+        index = _index(home)
+        # inside the range, but there is no such file
+        assert index.lookup("103") is None
+        assert index.lookup("999") is None
+        assert index.lookup("not-a-run") is None
+
+
+def test_lookup_overlapping_ranges():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100, 110])
+        _createRuns(home, "IPTS-2", [103, 104])
+        _createRuns(home, "IPTS-3", [105, 120])
+        index = _index(home)
+        assert index.lookup("110") == str(home / "IPTS-1") + os.sep
+        assert index.lookup("104") == str(home / "IPTS-2") + os.sep
+        assert index.lookup("120") == str(home / "IPTS-3") + os.sep
+
+
+def test_lookup_refreshes_on_miss():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        nexusPath = _createRuns(home, "IPTS-1", [100])
+        index = _index(home)
+        assert index.lookup("100") is not None
+
+        # a new run is added to an existing IPTS directory
+        (nexusPath / "SNAP_101.nxs.h5").write_text("")
+        os.utime(nexusPath, ns=(0, 0))
+        assert index.lookup("101") == str(home / "IPTS-1") + os.sep
+
+        # a new IPTS directory is created
+        _createRuns(home, "IPTS-2", [200])
+        assert index.lookup("200") == str(home / "IPTS-2") + os.sep
+
+
+def test_lookup_miss_is_remembered():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100])
+        index = _index(home, missTTL=10.0)
+        with mock.patch("snapred.backend.data.IPTSIndex.time.monotonic", return_value=1000.0):
+            assert index.lookup("101") is None
+            with mock.patch.object(index, "refresh", wraps=index.refresh) as refresh:
+                # a repeated miss does not rescan the IPTS directories
+                assert index.lookup("101") is None
+                refresh.assert_not_called()
+                # but a different run does
+                assert index.lookup("102") is None
+                refresh.assert_called_once()
+                # a run which is already indexed is still found
+                assert index.lookup("100") is not None
+
+        # once the miss has expired, the index is refreshed again
+        with mock.patch("snapred.backend.data.IPTSIndex.time.monotonic", return_value=1011.0):
+            with mock.patch.object(index, "refresh", wraps=index.refresh) as refresh:
+                assert index.lookup("101") is None
+                refresh.assert_called_once()
+            # the expired misses are forgotten
+            assert list(index._misses) == [101]
+
+
+def test_refresh_is_incremental():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100])
+        _createRuns(home, "IPTS-2", [200])
+        index = _index(home)
+        assert index.refresh()
+        assert not index.refresh()
+
+        scanned = []
+        _scan = index._scan
+        index._scan = lambda nexusPath: scanned.append(nexusPath) or _scan(nexusPath)
+        nexusPath = _createRuns(home, "IPTS-2", [201])
+        os.utime(nexusPath, ns=(0, 0))
+        assert index.refresh()
+        assert scanned == [home / "IPTS-2" / "nexus/"]
+
+
+def test_refresh_removed_directory():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        nexusPath = _createRuns(home, "IPTS-1", [100])
+        index = _index(home)
+        assert len(index) == 0
+        assert index.refresh()
+        assert len(index) == 1
+        (nexusPath / "SNAP_100.nxs.h5").unlink()
+        nexusPath.rmdir()
+        (home / "IPTS-1").rmdir()
+        assert index.refresh()
+        assert len(index) == 0
+
+
+def test_index_persists():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100, 101])
+        indexPath = home / "shared" / "iptsIndex.json"
+        _index(home, indexPath).refresh()
+        assert indexPath.exists()
+
+        index = _index(home, indexPath)
+        index._scan = lambda nexusPath: (_ for _ in ()).throw(AssertionError(f"unexpected scan of '{nexusPath}'"))
+        assert index.lookup("101") == str(home / "IPTS-1") + os.sep
+
+
+def test_index_invalid_file():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir)
+        _createRuns(home, "IPTS-1", [100])
+        indexPath = home / "iptsIndex.json"
+        indexPath.write_text("{ not JSON")
+        index = _index(home, indexPath)
+        assert index.lookup("100") == str(home / "IPTS-1") + os.sep
+        assert json.loads(indexPath.read_text())["entries"]["IPTS-1"][1:] == [100, 100]
+
+
+def test_index_other_instrument_home():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        home = Path(tmpDir) / "SNAP"
+        _createRuns(home, "IPTS-1", [100])
+        indexPath = Path(tmpDir) / "iptsIndex.json"
+        _index(home, indexPath).refresh()
+
+        otherHome = Path(tmpDir) / "OTHER"
+        otherHome.mkdir()
+        index = _index(otherHome, indexPath)
+        assert index.lookup("100") is None
+        assert len(index) == 0
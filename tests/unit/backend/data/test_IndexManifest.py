@@ -0,0 +1,96 @@
+from random import randint, shuffle
+
+import pytest
+
+from snapred.backend.dao.indexing.IndexEntry import IndexEntry
+from snapred.backend.dao.indexing.Versioning import VERSION_DEFAULT
+from snapred.backend.data.IndexManifest import IndexManifest
+
+
+def _entry(version: int, appliesTo: str, timestamp: float) -> IndexEntry:
+    return IndexEntry(
+        runNumber="1", useLiteMode=True, version=version, appliesTo=appliesTo, timestamp=timestamp
+    )
+
+
+def _latestApplicableVersion(entries, runNumber: str):
+    # the linear search used by the `Indexer` without a manifest
+    def applies(entry):
+        first, last = IndexManifest.appliesToRange(entry.appliesTo)
+        run = int(runNumber)
+        return (first is None or first <= run) and (last is None or run <= last)
+
+    relevant = [entry for entry in sorted(entries, key=lambda x: x.timestamp) if applies(entry)]
+    if len(relevant) > 1:
+        relevant = [entry for entry in relevant if entry.version != VERSION_DEFAULT]
+    return relevant[-1].version if relevant else None
+
+
+@pytest.mark.parametrize(
+    ("appliesTo", "expected"),
+    [
+        (None, (None, None)),
+        (">=10", (10, None)),
+        (">10", (11, None)),
+        ("<=10", (None, 10)),
+        ("<10", (None, 9)),
+        ("10", (10, 10)),
+    ],
+)
+def test_appliesToRange(appliesTo, expected):
+    assert IndexManifest.appliesToRange(appliesTo) == expected
+
+
+def test_versions():
+    manifest = IndexManifest.fromIndex([_entry(3, ">=1", 1.0), _entry(1, ">=1", 2.0)])
+    assert manifest.versions() == [3, 1]
+
+
+def test_isApplicable():
+    manifest = IndexManifest.fromIndex([_entry(1, ">=10", 1.0), _entry(2, "<10", 2.0), _entry(3, "10", 3.0)])
+    assert manifest.isApplicable(1, "10")
+    assert not manifest.isApplicable(1, "9")
+    assert manifest.isApplicable(2, "9")
+    assert not manifest.isApplicable(2, "10")
+    assert manifest.isApplicable(3, "10")
+    assert not manifest.isApplicable(3, "11")
+
+
+def test_latestApplicableVersion_none():
+    assert IndexManifest([]).latestApplicableVersion("10") is None
+    manifest = IndexManifest.fromIndex([_entry(1, ">=10", 1.0)])
+    assert manifest.latestApplicableVersion("9") is None
+
+
+def test_latestApplicableVersion_sorts_in_time():
+    manifest = IndexManifest.fromIndex([_entry(1, ">=10", 3.0), _entry(2, ">=5", 2.0), _entry(3, "<=20", 1.0)])
+    assert manifest.latestApplicableVersion("12") == 1
+    assert manifest.latestApplicableVersion("7") == 2
+    assert manifest.latestApplicableVersion("2") == 3
+    assert manifest.latestApplicableVersion("21") == 1
+
+
+def test_latestApplicableVersion_equal_timestamps():
+    # as for a stable sort by timestamp: the later entry in the index wins
+    manifest = IndexManifest.fromIndex([_entry(1, ">=10", 1.0), _entry(2, ">=10", 1.0)])
+    assert manifest.latestApplicableVersion("10") == 2
+
+
+def test_latestApplicableVersion_default():
+    manifest = IndexManifest.fromIndex([_entry(VERSION_DEFAULT, ">=1", 5.0), _entry(1, ">=10", 1.0)])
+    assert manifest.latestApplicableVersion("5") == VERSION_DEFAULT
+    assert manifest.latestApplicableVersion("10") == 1
+
+
+def test_latestApplicableVersion_matches_linear_search():
+    symbols = [">=", ">", "<=", "<", ""]
+    versions = list(range(1, 201))
+    shuffle(versions)
+    entries = [
+        _entry(version, f"{symbols[randint(0, 4)]}{randint(100, 200)}", float(randint(0, 50)))
+        for version in versions
+    ]
+    entries.append(_entry(VERSION_DEFAULT, ">=1", 0.0))
+    manifest = IndexManifest.fromIndex(entries)
+    for run in range(90, 211):
+        assert manifest.latestApplicableVersion(str(run)) == _latestApplicableVersion(entries, str(run))
@@ -1,7 +1,9 @@
 # ruff: noqa: E402, ARG005
 
+import functools
 import importlib
 import logging
+import os
 import tempfile
 import unittest
 from pathlib import Path
@@ -21,7 +23,7 @@ from snapred.backend.dao.indexing.Record import Record
 from snapred.backend.dao.indexing.Versioning import VERSION_DEFAULT, VERSION_START
 from snapred.backend.dao.normalization.Normalization import Normalization
 from snapred.backend.dao.normalization.NormalizationRecord import NormalizationRecord
-from snapred.backend.data.Indexer import DEFAULT_RECORD_TYPE, Indexer, IndexerType
+from snapred.backend.data.Indexer import DEFAULT_RECORD_TYPE, Indexer, IndexerCache, IndexerType
 from snapred.meta.Config import Resource
 from snapred.meta.mantid.WorkspaceNameGenerator import ValueFormatter as wnvf
 from snapred.meta.redantic import parse_file_as, write_model_list_pretty, write_model_pretty
@@ -1013,3 +1015,191 @@ class TestIndexer(unittest.TestCase):
     def test__determineRecordType(self):
         indexer = self.initIndexer(IndexerType.CALIBRATION)
         assert indexer._determineRecordType(VERSION_DEFAULT) == DEFAULT_RECORD_TYPE.get(IndexerType.CALIBRATION)
+
+    def test_refresh(self):
+        versionList = [3, 4]
+        self.prepareVersions(versionList)
+        indexer = self.initIndexer()
+
+        # another indexer adds a version
+        other = self.initIndexer()
+        other.writeRecord(self.record(5))
+        other.addIndexEntry(self.indexEntry(5))
+        assert indexer.currentVersion() == 4
+        indexer.refresh()
+        assert indexer.currentVersion() == 5
+        assert 5 in indexer.index
+
+    ## TESTS OF MANIFEST MODE ##
+
+    def initManifestIndexer(self, indexerType=IndexerType.DEFAULT):
+        return Indexer(indexerType=indexerType, directory=self.path, useManifest=True)
+
+    def test_manifest_written(self):
+        versionList = [3, 4, 5]
+        self.prepareVersions(versionList)
+        indexer = self.initManifestIndexer()
+        assert indexer.manifestPath().exists()
+        assert indexer.allVersions() == versionList
+        assert indexer.currentVersion() == max(versionList)
+        assert indexer.nextVersion() == max(versionList) + 1
+
+    def test_manifest_lazy_index(self):
+        versionList = [3, 4, 5]
+        self.prepareVersions(versionList)
+        self.initManifestIndexer()
+
+        # the second indexer answers version queries from the manifest
+        indexer = self.initManifestIndexer()
+        with mock.patch.object(indexer, "readIndex") as mockReadIndex:
+            assert indexer.allVersions() == versionList
+            assert indexer.currentVersion() == max(versionList)
+            assert indexer.nextVersion() == max(versionList) + 1
+            indexer.latestApplicableVersion("1")
+            mockReadIndex.assert_not_called()
+
+        # ... and reads the index entries when they are required
+        assert list(indexer.index.keys()) == versionList
+
+    def test_manifest_stale(self):
+        versionList = [3, 4]
+        self.prepareVersions(versionList)
+        self.initManifestIndexer()
+
+        # the index is changed without using the indexer
+        self.prepareVersions([3, 4, 5])
+        indexer = self.initManifestIndexer()
+        assert indexer.readManifest() is not None
+        assert indexer.allVersions() == [3, 4, 5]
+
+    def test_manifest_invalid(self):
+        versionList = [3, 4]
+        self.prepareVersions(versionList)
+        indexer = self.initManifestIndexer()
+        indexer.manifestPath().write_text("{ not JSON")
+        assert indexer.readManifest() is None
+        assert self.initManifestIndexer().allVersions() == versionList
+
+    def test_manifest_latestApplicableVersion(self):
+        runNumber = "123"
+        versionList = [3, 4, 5, 6]
+        self.prepareVersions(versionList)
+        index = {version: self.indexEntry(version) for version in versionList}
+        for i, version in enumerate([6, 4]):
+            index[version].appliesTo = f">={runNumber}"
+            index[version].timestamp = i + 1
+        for version in [3, 5]:
+            index[version].appliesTo = f">{runNumber}"
+        self.writeIndex(list(index.values()))
+
+        indexer = self.initManifestIndexer()
+        assert indexer.latestApplicableVersion(runNumber) == 4
+        assert indexer.thisOrLatestApplicableVersion(runNumber, 6) == 6
+        assert indexer.thisOrLatestApplicableVersion(runNumber, 5) == 4
+        assert indexer.thisOrLatestApplicableVersion(runNumber, None) == 4
+
+    def test_manifest_addEntry(self):
+        versionList = [3, 4]
+        self.prepareVersions(versionList)
+        indexer = self.initManifestIndexer()
+        entry = self.indexEntry(5)
+        self.writeRecordVersion(5)
+        indexer.addIndexEntry(entry)
+        assert indexer.allVersions() == [3, 4, 5]
+        assert indexer.latestApplicableVersion(entry.runNumber) == 5
+
+        # the manifest was updated with the index
+        indexer = self.initManifestIndexer()
+        assert indexer.readManifest().versions() == [3, 4, 5]
+
+    def test_manifest_del_writes_only_if_dirty(self):
+        versionList = [3, 4]
+        self.prepareVersions(versionList)
+        indexer = self.initManifestIndexer()
+        with mock.patch.object(indexer, "writeIndex") as mockWriteIndex:
+            indexer.__del__()
+            mockWriteIndex.assert_not_called()
+            indexer.index = {3: indexer.index[3]}
+            indexer.__del__()
+            mockWriteIndex.assert_called_once()
+
+    def test_manifest_reconcile(self):
+        # an index entry without a record is removed
+        self.prepareIndex([3, 4])
+        self.prepareRecords([3])
+        indexer = self.initManifestIndexer()
+        assert indexer.allVersions() == [3]
+        assert indexer._dirty
+
+
+class TestIndexerCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory(dir=Resource.getPath("outputs"), suffix="/")
+        self.path = Path(self.tmpDir.name)
+        self.factory = mock.Mock(side_effect=self.createIndexer)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def createIndexer(self, stateId: str, useLiteMode: bool, indexerType: IndexerType):
+        directory = self.path / stateId / ("lite" if useLiteMode else "native")
+        directory.mkdir(parents=True, exist_ok=True)
+        return mock.Mock(spec=Indexer, rootDirectory=directory), directory
+
+    def test_cached(self):
+        cache = IndexerCache(self.factory, 4)
+        indexer = cache("abc", True, IndexerType.CALIBRATION)
+        assert cache("abc", True, IndexerType.CALIBRATION) is indexer
+        assert cache("abc", False, IndexerType.CALIBRATION) is not indexer
+        assert self.factory.call_count == 2
+        indexer.refresh.assert_not_called()
+        assert cache.cache_info() == functools._CacheInfo(hits=1, misses=2, maxsize=4, currsize=2)
+
+    def test_bounded(self):
+        cache = IndexerCache(self.factory, 2)
+        indexer = cache("a", True, IndexerType.CALIBRATION)
+        cache("b", True, IndexerType.CALIBRATION)
+        # touch the first indexer, so that the second is the least-recently used
+        cache("a", True, IndexerType.CALIBRATION)
+        cache("c", True, IndexerType.CALIBRATION)
+        assert cache.cache_info().currsize == 2
+        assert cache("a", True, IndexerType.CALIBRATION) is indexer
+        assert self.factory.call_count == 3
+        cache("b", True, IndexerType.CALIBRATION)
+        assert self.factory.call_count == 4
+
+    def test_refresh_on_index_change(self):
+        cache = IndexerCache(self.factory, 4)
+        indexer = cache("abc", True, IndexerType.CALIBRATION)
+
+        # another process writes the index
+        indexPath = IndexerModule.indexPath(indexer.rootDirectory, IndexerType.CALIBRATION)
+        indexPath.write_text("[]")
+        assert cache("abc", True, IndexerType.CALIBRATION) is indexer
+        indexer.refresh.assert_called_once()
+
+        # ... and modifies it again
+        indexPath.write_text("[ ]")
+        os.utime(indexPath, ns=(0, 0))
+        cache("abc", True, IndexerType.CALIBRATION)
+        assert indexer.refresh.call_count == 2
+
+        # no change
+        cache("abc", True, IndexerType.CALIBRATION)
+        assert indexer.refresh.call_count == 2
+
+    def test_refresh_on_directory_change(self):
+        cache = IndexerCache(self.factory, 4)
+        indexer = cache("abc", True, IndexerType.CALIBRATION)
+        (indexer.rootDirectory / wnvf.pathVersion(1)).mkdir()
+        os.utime(indexer.rootDirectory, ns=(0, 0))
+        cache("abc", True, IndexerType.CALIBRATION)
+        indexer.refresh.assert_called_once()
+
+    def test_cache_clear(self):
+        cache = IndexerCache(self.factory, 4)
+        cache("abc", True, IndexerType.CALIBRATION)
+        cache.cache_clear()
+        assert cache.cache_info() == functools._CacheInfo(hits=0, misses=0, maxsize=4, currsize=0)
+        cache("abc", True, IndexerType.CALIBRATION)
+        assert self.factory.call_count == 2
@@ -9,12 +9,14 @@ import tempfile
 import time
 import typing
 import unittest.mock as mock
+from concurrent.futures import Future
 from contextlib import ExitStack
 from pathlib import Path
 from random import randint, shuffle
 from typing import List, Literal, Set
 
 import h5py
+import numpy as np
 import pydantic
 import pytest
 from mantid.api import ITableWorkspace, MatrixWorkspace
@@ -30,6 +32,7 @@ from mantid.simpleapi import (
     GroupWorkspaces,
     LoadEmptyInstrument,
     LoadInstrument,
+    RebinRagged,
     RenameWorkspaces,
     SaveDiffCal,
     mtd,
@@ -60,6 +63,7 @@ from snapred.backend.data.Indexer import IndexerType
 from snapred.backend.data.LocalDataService import LocalDataService
 from snapred.backend.data.NexusHDF5Metadata import NexusHDF5Metadata as n5m
 from snapred.backend.error.RecoverableException import RecoverableException
+from snapred.backend.error.StateValidationException import StateValidationException
 from snapred.meta.Config import Config, Resource
 from snapred.meta.mantid.WorkspaceNameGenerator import (
     ValueFormatter as wnvf,
@@ -597,6 +601,34 @@ def test_getIPTS(mockGetIPTS):
     )
 
 
+@mock.patch(ThisService + "GetIPTS")
+def test_getIPTS_index(mockGetIPTS):
+    mockGetIPTS.return_value = "nowhere/"
+    localDataService = LocalDataService()
+    localDataService.getIPTS.cache_clear()
+    with tempfile.TemporaryDirectory() as tmpDir:
+        instrumentHome = Path(tmpDir) / "SNAP"
+        nexusPath = instrumentHome / "IPTS-456" / localDataService.instrumentConfig.nexusDirectory
+        nexusPath.mkdir(parents=True)
+        (nexusPath / f"SNAP_123{localDataService.instrumentConfig.nexusFileExtension}").write_text("")
+        with (
+            Config_override("instrument.home", str(instrumentHome)),
+            Config_override("localdataservice.iptsIndex.enabled", True),
+            Config_override("localdataservice.iptsIndex.file", str(Path(tmpDir) / "iptsIndex.json")),
+        ):
+            # the run is in the index
+            assert localDataService.getIPTS("123") == str(instrumentHome / "IPTS-456") + os.sep
+            mockGetIPTS.assert_not_called()
+
+            # the run is not in the index
+            assert localDataService.getIPTS("124") == mockGetIPTS.return_value
+            mockGetIPTS.assert_called_once_with(RunNumber="124", Instrument=Config["instrument.name"])
+
+            # the index only applies to the configured instrument
+            assert localDataService.getIPTS("123", "CRACKLE") == mockGetIPTS.return_value
+    localDataService.getIPTS.cache_clear()
+
+
 # NOTE this test calls `GetIPTS` (via `getIPTS`) with no mocks
 # this is intentional, to ensure it is being called correctly
 def test_getIPTS_cache():
@@ -809,6 +841,40 @@ def test_generateStateId_cache():
     )
 
 
+def test_generateStateIds():
+    localDataService = LocalDataService()
+    localDataService.generateStateId.cache_clear()
+    localDataService.readDetectorState = mock.Mock(side_effect=mockDetectorState)
+    stateIds, errors = localDataService.generateStateIds(["12345", "67890", "12345"])
+    assert errors == {}
+    assert list(stateIds.keys()) == ["12345", "67890"]
+    assert stateIds["12345"] == localDataService.generateStateId("12345")
+    assert stateIds["67890"] == localDataService.generateStateId("67890")
+    # each distinct run is resolved only once
+    assert localDataService.readDetectorState.call_count == 2
+
+
+def test_generateStateIds_partial():
+    localDataService = LocalDataService()
+    localDataService.generateStateId.cache_clear()
+
+    def readDetectorState(runId: str):
+        if runId == "67890":
+            raise RuntimeError("no such run")
+        return mockDetectorState(runId)
+
+    localDataService.readDetectorState = mock.Mock(side_effect=readDetectorState)
+    stateIds, errors = localDataService.generateStateIds(["12345", "67890"])
+    assert list(stateIds.keys()) == ["12345"]
+    assert list(errors.keys()) == ["67890"]
+    assert isinstance(errors["67890"], StateValidationException)
+
+
+def test_generateStateIds_empty():
+    localDataService = LocalDataService()
+    assert localDataService.generateStateIds([]) == ({}, {})
+
+
 def test__findMatchingFileList():
     localDataService = LocalDataService()
     localDataService.instrumentConfig = getMockInstrumentConfig()
@@ -1692,6 +1758,117 @@ def test_writeReductionData_metadata(readSyntheticReductionRecord, createReducti
             assert actualRecord == testRecord
 
 
+def test_writeReductionData_background(readSyntheticReductionRecord, createReductionWorkspaces):
+    # In order to facilitate parallel testing: any workspace name used by this test should be unique.
+    inputRecordFilePath = Path(Resource.getPath("inputs/reduction/ReductionRecord_20240614T130420.json"))
+    _uniqueTimestamp = 1718909756.518823
+    testRecord = readSyntheticReductionRecord(inputRecordFilePath, _uniqueTimestamp)
+
+    runNumber, useLiteMode, timestamp = testRecord.runNumber, testRecord.useLiteMode, testRecord.timestamp
+    stateId = ENDURING_STATE_ID
+    fileName = wng.reductionOutputGroup().runNumber(runNumber).timestamp(timestamp).build()
+    fileName += Config["nexus.file.extension"]
+
+    wss = createReductionWorkspaces(testRecord.workspaceNames)  # noqa: F841
+    localDataService = LocalDataService()
+    with (
+        reduction_root_redirect(localDataService, stateId=stateId),
+        Config_override("localdataservice.reductionData.backgroundWrite", True),
+    ):
+        localDataService.instrumentConfig = mock.Mock()
+        localDataService.getIPTS = mock.Mock(return_value="IPTS-12345")
+
+        reductionRecordFilePath = localDataService._constructReductionRecordFilePath(runNumber, useLiteMode, timestamp)
+        localDataService.writeReductionRecord(testRecord)
+        localDataService.writeReductionData(testRecord)
+
+        # the workspaces are held by the queued write: they may be removed from the ADS
+        DeleteWorkspaces(WorkspaceList=list(testRecord.workspaceNames))
+
+        localDataService.flushReductionData()
+        assert not localDataService._pendingReductionWrites
+        filePath = reductionRecordFilePath.parent / fileName
+        assert filePath.exists()
+        with h5py.File(filePath, "r") as h5:
+            actualRecord = ReductionRecord.model_validate(n5m.extractMetadataGroup(h5, "/metadata"))
+            assert actualRecord == testRecord
+
+
+def test_readReducedSpectra(readSyntheticReductionRecord, createReductionWorkspaces):
+    # In order to facilitate parallel testing: any workspace name used by this test should be unique.
+    inputRecordFilePath = Path(Resource.getPath("inputs/reduction/ReductionRecord_20240614T130420.json"))
+    _uniqueTimestamp = 1718909852.330828
+    testRecord = readSyntheticReductionRecord(inputRecordFilePath, _uniqueTimestamp)
+
+    runNumber, useLiteMode, timestamp = testRecord.runNumber, testRecord.useLiteMode, testRecord.timestamp
+    stateId = ENDURING_STATE_ID
+
+    wss = createReductionWorkspaces(testRecord.workspaceNames)  # noqa: F841
+    outputs = [ws for ws in testRecord.workspaceNames if ws.tokens("workspaceType") == wngt.REDUCTION_OUTPUT]
+    for ws in outputs:
+        # as for the reduction outputs: a different x-range for each spectrum
+        numberOfSpectra = mtd[ws].getNumberHistograms()
+        RebinRagged(
+            InputWorkspace=ws,
+            XMin=[100.0 * n for n in range(numberOfSpectra)],
+            XMax=[8000.0 - 100.0 * n for n in range(numberOfSpectra)],
+            Delta=[100.0],
+            OutputWorkspace=ws,
+            PreserveEvents=False,
+        )
+    localDataService = LocalDataService()
+    with reduction_root_redirect(localDataService, stateId=stateId):
+        localDataService.instrumentConfig = mock.Mock()
+        localDataService.getIPTS = mock.Mock(return_value="IPTS-12345")
+        localDataService.writeReductionRecord(testRecord)
+        localDataService.writeReductionData(testRecord)
+
+        output = outputs[0]
+        unit, grouping = output.tokens("unit", "group")
+
+        # a single grouping and spectrum
+        result = localDataService.readReducedSpectra(
+            runNumber, useLiteMode, timestamp, groupings=[grouping], spectra=[0], unit=unit
+        )
+        assert list(result) == [output]
+        spectra = result[output]
+        np.testing.assert_array_equal(spectra.x[0], mtd[output].readX(0))
+        np.testing.assert_array_equal(spectra.y[0], mtd[output].readY(0))
+        np.testing.assert_array_equal(spectra.e[0], mtd[output].readE(0))
+
+        # by default: all of the outputs, but not the pixel mask
+        result = localDataService.readReducedSpectra(runNumber, useLiteMode, timestamp)
+        assert sorted(result) == sorted(outputs)
+
+        # the ragged spectra are read without the padding of the saved x-values
+        for ws in outputs:
+            spectra = result[ws]
+            assert len(spectra.y) == mtd[ws].getNumberHistograms()
+            for n in range(mtd[ws].getNumberHistograms()):
+                np.testing.assert_array_equal(spectra.x[n], mtd[ws].readX(n))
+                np.testing.assert_array_equal(spectra.y[n], mtd[ws].readY(n))
+                np.testing.assert_array_equal(spectra.e[n], mtd[ws].readE(n))
+
+        with pytest.raises(RuntimeError, match="no 'unknown' output"):
+            localDataService.readReducedSpectra(runNumber, useLiteMode, timestamp, groupings=["unknown"], unit=unit)
+
+
+def test_flushReductionData_error():
+    localDataService = LocalDataService()
+    filePath = Path("/does/not/exist/reduced.nxs.h5")
+    future = Future()
+    future.set_exception(RuntimeError("SaveNexusProcessed failed"))
+    localDataService._pendingReductionWrites[str(filePath)] = future
+    localDataService._reductionDataWritten(filePath, future)
+    # a failed write is retained until it is flushed
+    assert str(filePath) in localDataService._pendingReductionWrites
+
+    with pytest.raises(RuntimeError, match="SaveNexusProcessed failed"):
+        localDataService.flushReductionData(filePath)
+    assert str(filePath) not in localDataService._pendingReductionWrites
+    localDataService.flushReductionData()
+
+
 def test_readWriteReductionData(readSyntheticReductionRecord, createReductionWorkspaces, cleanup_workspace_at_exit):
     # In order to facilitate parallel testing: any workspace name used by this test should be unique.
     _uniquePrefix = "_test_RWRD_"
@@ -1777,6 +1954,10 @@ def test_readWriteReductionData_pixel_mask(
         # 1) Verify that a pixel mask was separately written in `SaveDiffCal` format
         maskName = wng.reductionPixelMask().runNumber(runNumber).timestamp(timestamp).build()
         assert (reductionRecordFilePath.parent / (maskName + ".h5")).exists()
+        assert maskName in [
+            wng.reductionPixelMask().runNumber(run).timestamp(ts).build()
+            for run, ts in localDataService.readReductionMaskCatalog(runNumber, useLiteMode)
+        ]
 
         # move the existing test workspaces out of the way:
         #   * this just adds the `_uniquePrefix`.
@@ -1949,6 +2130,66 @@ def test_readDetectorState():
     assert actualDetectorState == testDetectorState
 
 
+def test_readDetectorState_cached():
+    localDataService = LocalDataService()
+    testDetectorState = mockDetectorState("123")
+    localDataService._readPVFile = mock.Mock(return_value=mockPVFile(testDetectorState))
+    with tempfile.TemporaryDirectory() as tmpDir:
+        pvFilePath = Path(tmpDir) / "SNAP_123.nxs.h5"
+        pvFilePath.write_text("")
+        localDataService._constructPVFilePath = mock.Mock(return_value=pvFilePath)
+        cacheFilePath = Path(tmpDir) / "detectorStates.jsonl"
+        with (
+            Config_override("localdataservice.detectorStateCache.enabled", True),
+            Config_override("localdataservice.detectorStateCache.file", str(cacheFilePath)),
+        ):
+            assert localDataService.readDetectorState("123") == testDetectorState
+            assert localDataService._readPVFile.call_count == 1
+            assert cacheFilePath.exists()
+
+            # the second read is a table lookup
+            assert localDataService.readDetectorState("123") == testDetectorState
+            assert localDataService._readPVFile.call_count == 1
+
+            # a modified file is read again
+            os.utime(pvFilePath, ns=(0, 0))
+            assert localDataService.readDetectorState("123") == testDetectorState
+            assert localDataService._readPVFile.call_count == 2
+
+
+def test_readDetectorState_cache_disabled():
+    localDataService = LocalDataService()
+    testDetectorState = mockDetectorState("123")
+    localDataService._readPVFile = mock.Mock(return_value=mockPVFile(testDetectorState))
+    localDataService._constructPVFilePath = mock.Mock(return_value=Path("/mock/path"))
+    with Config_override("localdataservice.detectorStateCache.enabled", False):
+        assert localDataService._detectorStateCache() is None
+        localDataService.readDetectorState("123")
+        localDataService.readDetectorState("123")
+    assert localDataService._readPVFile.call_count == 2
+
+
+def test_readPVFile_pooled():
+    localDataService = LocalDataService()
+    with tempfile.TemporaryDirectory() as tmpDir:
+        pvFilePath = Path(tmpDir) / "SNAP_123.nxs.h5"
+        with h5py.File(pvFilePath, "w") as f:
+            f["entry/DASlogs/det_arc1/value"] = [1.0]
+        localDataService._constructPVFilePath = mock.Mock(return_value=pvFilePath)
+        pvFile = localDataService._readPVFile("123")
+        assert localDataService._readPVFile("123") is pvFile
+        assert pvFilePath in localDataService._pvFiles
+        localDataService._pvFiles.close()
+        assert not pvFile.id.valid
+
+
+def test_readPVFile_does_not_exist():
+    localDataService = LocalDataService()
+    localDataService._constructPVFilePath = mock.Mock(return_value=Path("/does/not/exist/SNAP_123.nxs.h5"))
+    with pytest.raises(FileNotFoundError, match="does not exist"):
+        localDataService._readPVFile("123")
+
+
 def test_readDetectorStateWithDiffWavKey():
     localDataService = LocalDataService()
     pvFile = {
@@ -2293,6 +2534,107 @@ def test_readGroupingMap_initialized_state():
 # end interlude #
 
 
+##### TESTS OF PIXEL-GROUP CACHE METHODS #####
+
+
+def test_writePixelGroup_readPixelGroup():
+    service = LocalDataService()
+    stateId = ENDURING_STATE_ID
+    pixelGroup = DAOFactory.synthetic_pixel_group.copy()
+    with state_root_redirect(service, stateId=stateId) as tmpRoot:
+        tmpRoot.path().mkdir(parents=True)
+        assert service.readPixelGroup(stateId, True, "0123456789abcdef") is None
+        service.writePixelGroup(stateId, True, "0123456789abcdef", pixelGroup)
+        assert service._pixelGroupCachePath(stateId, True, "0123456789abcdef").exists()
+        assert service.readPixelGroup(stateId, True, "0123456789abcdef") == pixelGroup
+        # entries are separated by lite mode
+        assert service.readPixelGroup(stateId, False, "0123456789abcdef") is None
+
+
+def test_writePixelGroup_uninitialized_state():
+    service = LocalDataService()
+    stateId = ENDURING_STATE_ID
+    pixelGroup = DAOFactory.synthetic_pixel_group.copy()
+    with state_root_redirect(service, stateId=stateId) as tmpRoot:
+        service.writePixelGroup(stateId, True, "0123456789abcdef", pixelGroup)
+        assert not tmpRoot.path().exists()
+
+
+def test_readPixelGroup_corrupt_entry():
+    service = LocalDataService()
+    stateId = ENDURING_STATE_ID
+    with state_root_redirect(service, stateId=stateId):
+        path = service._pixelGroupCachePath(stateId, True, "0123456789abcdef")
+        path.parent.mkdir(parents=True)
+        path.write_text("{ not JSON")
+        assert service.readPixelGroup(stateId, True, "0123456789abcdef") is None
+
+
+##### TESTS OF FOCUSSED-NORMALIZATION CACHE METHODS #####
+
+
+def _mockNormalizationIndexer(service: LocalDataService, versionPath: Path):
+    service.normalizationIndexer = mock.Mock(return_value=mock.Mock(versionPath=mock.Mock(return_value=versionPath)))
+
+
+def test_writeFocussedNormalization_readFocussedNormalization():
+    service = LocalDataService()
+    key = "0123456789abcdef"
+    workspace = mtd.unique_name(prefix="_test_focussed_normalization_")
+    CreateSampleWorkspace(OutputWorkspace=workspace, NumBanks=1, BankPixelWidth=2, XUnit="dSpacing")
+    with tempfile.TemporaryDirectory() as tmpDir:
+        versionPath = Path(tmpDir) / "v_0002"
+        versionPath.mkdir()
+        _mockNormalizationIndexer(service, versionPath)
+
+        assert not service.readFocussedNormalization("12345", True, 2, key, "loaded")
+        service.writeFocussedNormalization("12345", True, 2, key, workspace)
+        path = service._focussedNormalizationCachePath("12345", True, 2, key)
+        assert path == versionPath / "focussedNormalizations" / f"{key}.nxs.h5"
+        # only the completed entry remains
+        assert list(path.parent.iterdir()) == [path]
+
+        assert service.readFocussedNormalization("12345", True, 2, key, "loaded")
+        assert CompareWorkspaces(Workspace1=workspace, Workspace2="loaded", CheckAllData=True).Result
+    DeleteWorkspaces([workspace, "loaded"])
+
+
+def test_writeFocussedNormalization_no_version():
+    service = LocalDataService()
+    service.writeWorkspace = mock.Mock()
+    with tempfile.TemporaryDirectory() as tmpDir:
+        versionPath = Path(tmpDir) / "v_0002"
+        _mockNormalizationIndexer(service, versionPath)
+        service.writeFocussedNormalization("12345", True, 2, "0123456789abcdef", "workspace")
+        service.writeWorkspace.assert_not_called()
+        assert not versionPath.exists()
+
+
+def test_writeFocussedNormalization_failure():
+    service = LocalDataService()
+    service.writeWorkspace = mock.Mock(side_effect=RuntimeError("unable to save"))
+    with tempfile.TemporaryDirectory() as tmpDir:
+        versionPath = Path(tmpDir) / "v_0002"
+        versionPath.mkdir()
+        _mockNormalizationIndexer(service, versionPath)
+        with mock.patch.object(LocalDataServiceModule, "logger") as mockLogger:
+            service.writeFocussedNormalization("12345", True, 2, "0123456789abcdef", "workspace")
+        assert "unable to write cached focussed normalization" in mockLogger.warning.call_args.args[0]
+        assert not service._focussedNormalizationCachePath("12345", True, 2, "0123456789abcdef").exists()
+
+
+def test_readFocussedNormalization_corrupt_entry():
+    service = LocalDataService()
+    key = "0123456789abcdef"
+    with tempfile.TemporaryDirectory() as tmpDir:
+        versionPath = Path(tmpDir) / "v_0002"
+        _mockNormalizationIndexer(service, versionPath)
+        path = service._focussedNormalizationCachePath("12345", True, 2, key)
+        path.parent.mkdir(parents=True)
+        path.write_text("not HDF5")
+        assert not service.readFocussedNormalization("12345", True, 2, key, "loaded")
+
+
 @mock.patch("os.path.exists", return_value=True)
 def test_writeCalibrantSample_failure(mock1):  # noqa: ARG001
     localDataService = LocalDataService()
@@ -2839,3 +3181,77 @@ class TestReductionPixelMasks:
             if name in duplicates:
                 pytest.fail("masks list contains duplicate entries")
             duplicates.add(name)
+
+    def test_readReductionMaskCatalog_scan(self):
+        # The catalog is built from the directory tree, if it doesn't exist
+        catalogPath = self.service._constructReductionMaskCatalogPath(self.runNumber1, self.useLiteMode)
+        assert not catalogPath.exists()
+        entries = self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode)
+        assert catalogPath.exists()
+        assert sorted(entries) == sorted(
+            (runNumber, ts)
+            for runNumber in (self.runNumber1, self.runNumber2)
+            for ts in self.service._reducedTimestamps(runNumber, self.useLiteMode)
+        )
+
+        # Once the catalog exists, the directory tree is not scanned again
+        with mock.patch.object(self.service, "_scanReductionMasks") as mockScan:
+            assert self.service.readReductionMaskCatalog(self.runNumber2, self.useLiteMode) == entries
+            mockScan.assert_not_called()
+
+    def test_readReductionMaskCatalog_invalid_line(self):
+        entries = self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode)
+        catalogPath = self.service._constructReductionMaskCatalogPath(self.runNumber1, self.useLiteMode)
+        with open(catalogPath, "a") as f:
+            f.write('{"runNumber": "trunc')
+        assert self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode) == entries
+        # the invalid line is removed
+        assert len(catalogPath.read_text().splitlines()) == len(entries)
+
+    def test_readReductionMaskCatalog_stale_entry(self):
+        # An entry for a reduction which has since been deleted is dropped, and the catalog is rewritten
+        entries = self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode)
+        catalogPath = self.service._constructReductionMaskCatalogPath(self.runNumber1, self.useLiteMode)
+        runNumber, timestamp = entries[0]
+        maskPath = self.service._reductionMaskPath(catalogPath.parent, runNumber, timestamp)
+        assert maskPath.exists()
+        maskPath.unlink()
+
+        remaining = self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode)
+        assert remaining == entries[1:]
+        assert len(catalogPath.read_text().splitlines()) == len(remaining)
+        masks = self.service.getCompatibleReductionMasks(self.runNumber1, self.useLiteMode)
+        assert wng.reductionPixelMask().runNumber(runNumber).timestamp(timestamp).build() not in masks
+
+    def test_getCompatibleReductionMasks_catalog_entry(self):
+        # A mask written after the catalog was built is included via its catalog entry
+        self.service.readReductionMaskCatalog(self.runNumber1, self.useLiteMode)
+        timestamp = self.service.getUniqueTimestamp()
+        dataPath = self.service._constructReductionDataPath(self.runNumber2, self.useLiteMode, timestamp)
+        dataPath.mkdir(parents=True)
+        maskName = wng.reductionPixelMask().runNumber(self.runNumber2).timestamp(timestamp).build()
+        SaveDiffCal(MaskWorkspace=self.maskWS1, Filename=str(dataPath / (maskName + ".h5")))
+        self.service._addReductionMaskCatalogEntry(self.runNumber2, self.useLiteMode, timestamp)
+
+        masks = self.service.getCompatibleReductionMasks(self.runNumber1, self.useLiteMode)
+        assert maskName in masks
+        masks = self.service.getCompatibleReductionMasks(self.runNumber3, self.useLiteMode)
+        assert maskName not in masks
+
+    def test_isCompatibleMask_cached_stateId(self):
+        residentMask = wng.reductionUserPixelMask().numberTag(3).build()
+        CloneWorkspace(InputWorkspace=self.maskWS1, OutputWorkspace=residentMask)
+        with mock.patch.object(
+            self.service, "stateIdFromWorkspace", wraps=self.service.stateIdFromWorkspace
+        ) as mockStateIdFromWorkspace:
+            assert self.service.isCompatibleMask(residentMask, self.runNumber1, self.useLiteMode)
+            assert self.service.isCompatibleMask(residentMask, self.runNumber1, self.useLiteMode)
+            assert not self.service.isCompatibleMask(residentMask, self.runNumber3, self.useLiteMode)
+            mockStateIdFromWorkspace.assert_called_once_with(residentMask)
+
+            # Replacing the workspace invalidates its cached state id
+            CloneWorkspace(InputWorkspace=self.maskWS2, OutputWorkspace=residentMask)
+            assert not self.service.isCompatibleMask(residentMask, self.runNumber1, self.useLiteMode)
+            assert self.service.isCompatibleMask(residentMask, self.runNumber3, self.useLiteMode)
+            assert mockStateIdFromWorkspace.call_count == 2
+        DeleteWorkspaces(WorkspaceList=[residentMask])
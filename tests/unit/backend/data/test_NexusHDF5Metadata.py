@@ -6,6 +6,7 @@ from pathlib import Path
 import h5py
 from util.script_as_test import not_a_test
 
+from snapred.backend.data.NexusHDF5Metadata import MetadataEncoding
 from snapred.backend.data.NexusHDF5Metadata import NexusHDF5Metadata as n5m
 from snapred.meta.Config import Resource
 
@@ -224,3 +225,68 @@ def test_insertExtractMetadataGroup():
         with h5py.File(filePath, "r") as h5:
             dict_ = n5m.extractMetadataGroup(h5)
             assert dict_ == dict_of_mixed
+
+
+def test_insertExtractMetadataGroup_encodings():
+    inputs = [
+        dict_of_mixed_inputs,
+        dict_of_list_inputs,
+        dict_of_list_of_list_inputs,
+        dict_of_dict_inputs,
+        dict_of_None_inputs,
+        dict_of_StringDerived_inputs,
+        dict_of_branch_enum_inputs,
+        dict_of_terminal_enum_inputs,
+        dict_of_all_primitives_inputs,
+    ]
+    with tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tmpDir:
+        for encoding in MetadataEncoding:
+            filePath = Path(tmpDir) / f"test_{encoding}.hdf5"
+            with h5py.File(filePath, "w") as h5:
+                for n, (dict_, _) in enumerate(inputs):
+                    n5m.insertMetadataGroup(h5, dict_, f"/metadata_{n}", encoding=encoding)
+
+            # the encoding is detected when the group is extracted
+            with h5py.File(filePath, "r") as h5:
+                for n, (_, reconstruct) in enumerate(inputs):
+                    assert n5m.extractMetadataGroup(h5, f"/metadata_{n}") == reconstruct
+
+
+def test_insertMetadataGroup_arrays():
+    dict_ = {
+        "flags": [True, False, True],
+        "values": [1.0, 2.5, 3.0],
+        "names": ["one", None, "three"],
+        "empty": [],
+        "mixed": [1, "two", 3.0],
+        "records": [
+            {"groupID": n, "L2": 10.0 + n, "dResolution": {"minimum": 0.1 * n, "maximum": 0.2 * n}}
+            for n in range(1, 101)
+        ],
+    }
+    with tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tmpDir:
+        filePath = Path(tmpDir) / "test.hdf5"
+        with h5py.File(filePath, "w") as h5:
+            n5m.insertMetadataGroup(h5, dict_)
+
+        with h5py.File(filePath, "r") as h5:
+            metadata = h5["/metadata"]
+            assert metadata.attrs["NX_class"] == "NXcollection"
+            assert metadata.attrs["_encoding"] == MetadataEncoding.ARRAYS
+
+            # each homogeneous list is a single dataset
+            for key in ("flags", "values", "names", "empty"):
+                assert isinstance(metadata[key], h5py.Dataset)
+            assert metadata["values"].shape == (3,)
+
+            # a heterogeneous list is a group
+            assert metadata["mixed"].attrs["_sequence"] == "list"
+
+            # a list of records is one dataset for each leaf key
+            datasets = []
+            metadata["records"].visititems(
+                lambda name, node: datasets.append(name) if isinstance(node, h5py.Dataset) else None
+            )
+            assert sorted(datasets) == ["L2", "dResolution/maximum", "dResolution/minimum", "groupID"]
+
+            assert n5m.extractMetadataGroup(h5) == dict_
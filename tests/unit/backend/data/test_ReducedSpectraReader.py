@@ -0,0 +1,139 @@
+import tempfile
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from snapred.backend.data.ReducedSpectraReader import readReducedSpectra
+
+
+def _writeEntry(h5: h5py.File, entryNumber: int, x: np.ndarray, y: np.ndarray, compression=None):
+    group = h5.create_group(f"mantid_workspace_{entryNumber}/workspace")
+    group.create_dataset("values", data=y, compression=compression)
+    group.create_dataset("errors", data=np.sqrt(y), compression=compression)
+    group.create_dataset("axis1", data=x, compression=compression)
+    group.create_dataset("axis2", data=np.arange(1, y.shape[0] + 1) * 10)
+
+
+def _data(numberOfSpectra: int = 4, numberOfBins: int = 10) -> np.ndarray:
+    return np.arange(numberOfSpectra * numberOfBins, dtype=float).reshape(numberOfSpectra, numberOfBins)
+
+
+@pytest.fixture
+def filePath():
+    with tempfile.TemporaryDirectory() as tmpDir:
+        filePath = Path(tmpDir) / "reduced.nxs.h5"
+        with h5py.File(filePath, "w") as h5:
+            # histogram data, with shared bin edges
+            _writeEntry(h5, 1, np.arange(11, dtype=float), _data())
+            # point data, compressed
+            _writeEntry(h5, 2, np.arange(10, dtype=float), 2.0 * _data(), compression="gzip")
+            # histogram data, with different bin edges for each spectrum
+            _writeEntry(h5, 3, np.arange(11, dtype=float) + np.arange(4)[:, np.newaxis], 3.0 * _data())
+        yield filePath
+
+
+def test_read_all(filePath):
+    result = readReducedSpectra(filePath, {"ws1": 1, "ws2": 2})
+    assert list(result) == ["ws1", "ws2"]
+    spectra = result["ws1"]
+    assert spectra.workspaceName == "ws1"
+    np.testing.assert_array_equal(spectra.spectrumNumbers, [10, 20, 30, 40])
+    np.testing.assert_array_equal(np.array(spectra.y), _data())
+    np.testing.assert_array_equal(np.array(spectra.e), np.sqrt(_data()))
+    for x in spectra.x:
+        np.testing.assert_array_equal(x, np.arange(11))
+    np.testing.assert_array_equal(np.array(result["ws2"].y), 2.0 * _data())
+
+
+def test_read_memory_mapped(filePath):
+    # a contiguous, uncompressed dataset is memory-mapped: the arrays are views of the file
+    spectra = readReducedSpectra(filePath, {"ws1": 1})["ws1"]
+    assert isinstance(spectra.y[0].base, np.memmap)
+
+    # a compressed dataset is read by selection
+    spectra = readReducedSpectra(filePath, {"ws2": 2})["ws2"]
+    assert not isinstance(spectra.y[0].base, np.memmap)
+
+
+def test_read_spectra(filePath):
+    for entryNumber in (1, 2):
+        spectra = readReducedSpectra(filePath, {"ws": entryNumber}, spectra=[3, 1, 3])["ws"]
+        # in increasing order, without duplicates
+        np.testing.assert_array_equal(spectra.spectrumNumbers, [20, 40])
+        np.testing.assert_array_equal(np.array(spectra.y), entryNumber * _data()[[1, 3]])
+        assert len(spectra.x) == 2
+
+        spectra = readReducedSpectra(filePath, {"ws": entryNumber}, spectra=[])["ws"]
+        assert len(spectra.y) == 0
+
+
+def test_read_spectra_out_of_range(filePath):
+    with pytest.raises(ValueError, match="has 4 spectra"):
+        readReducedSpectra(filePath, {"ws1": 1}, spectra=[4])
+
+
+def test_read_xRange_histogram(filePath):
+    # only the bins lying entirely within the range
+    spectra = readReducedSpectra(filePath, {"ws1": 1}, spectra=[2], xRange=(2.5, 7.0))["ws1"]
+    np.testing.assert_array_equal(spectra.x[0], [3.0, 4.0, 5.0, 6.0, 7.0])
+    np.testing.assert_array_equal(spectra.y[0], _data()[2, 3:7])
+    np.testing.assert_array_equal(spectra.e[0], np.sqrt(_data()[2, 3:7]))
+
+
+def test_read_xRange_points(filePath):
+    spectra = readReducedSpectra(filePath, {"ws2": 2}, xRange=(2.5, 7.0))["ws2"]
+    np.testing.assert_array_equal(spectra.x[0], [3.0, 4.0, 5.0, 6.0, 7.0])
+    np.testing.assert_array_equal(np.array(spectra.y), 2.0 * _data()[:, 3:8])
+
+
+def test_read_xRange_outside(filePath):
+    spectra = readReducedSpectra(filePath, {"ws1": 1}, xRange=(20.0, 30.0))["ws1"]
+    assert all(len(y) == 0 for y in spectra.y)
+    assert all(len(x) == 0 for x in spectra.x)
+
+
+def test_read_xRange_invalid(filePath):
+    with pytest.raises(ValueError, match="must not exceed"):
+        readReducedSpectra(filePath, {"ws1": 1}, xRange=(7.0, 2.5))
+
+
+def test_read_ragged(filePath):
+    # the bin edges of spectrum `n` are offset by `n`
+    spectra = readReducedSpectra(filePath, {"ws3": 3}, xRange=(2.5, 7.0))["ws3"]
+    for n in range(4):
+        start = max(0, 3 - n)
+        stop = 7 - n
+        np.testing.assert_array_equal(spectra.x[n], np.arange(start, stop + 1) + n)
+        np.testing.assert_array_equal(spectra.y[n], 3.0 * _data()[n, start:stop])
+
+
+def test_read_ragged_padded():
+    # as saved by `SaveNexusProcessed`: each row is padded with NaN to the length of the longest spectrum
+    lengths = [11, 6, 9]
+    x = np.full((3, 11), np.nan)
+    y = np.full((3, 10), np.nan)
+    for n, length in enumerate(lengths):
+        x[n, :length] = np.arange(length, dtype=float)
+        y[n, : length - 1] = _data(3)[n, : length - 1]
+    with tempfile.TemporaryDirectory() as tmpDir:
+        filePath = Path(tmpDir) / "reduced.nxs.h5"
+        with h5py.File(filePath, "w") as h5:
+            _writeEntry(h5, 1, x, y)
+
+        spectra = readReducedSpectra(filePath, {"ws": 1})["ws"]
+        for n, length in enumerate(lengths):
+            np.testing.assert_array_equal(spectra.x[n], np.arange(length))
+            np.testing.assert_array_equal(spectra.y[n], _data(3)[n, : length - 1])
+            np.testing.assert_array_equal(spectra.e[n], np.sqrt(_data(3)[n, : length - 1]))
+
+        spectra = readReducedSpectra(filePath, {"ws": 1}, xRange=(2.5, 20.0))["ws"]
+        for n, length in enumerate(lengths):
+            np.testing.assert_array_equal(spectra.x[n], np.arange(3, length))
+            np.testing.assert_array_equal(spectra.y[n], _data(3)[n, 3 : length - 1])
+
+
+def test_read_missing_entry(filePath):
+    with pytest.raises(RuntimeError, match="no histogram data for 'ws4'"):
+        readReducedSpectra(filePath, {"ws4": 4})
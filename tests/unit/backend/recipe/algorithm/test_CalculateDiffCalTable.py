@@ -1,6 +1,8 @@
 import unittest
 
+import numpy as np
 from mantid.simpleapi import (
+    CalculateDIFC,
     CalculateDiffCalTable,
     DeleteWorkspace,
     mtd,
@@ -64,3 +66,31 @@ class TestCalculateDiffCalTable(unittest.TestCase):
             assert row == i
         for difc in difcTable.column("difc"):
             print(f"{difc},")
+
+    def test_difc_table_matches_CalculateDIFC(self):
+        difcTableWS = mtd.unique_name(prefix="_test_make_difc_table")
+        CalculateDiffCalTable(
+            InputWorkspace=self.fakeRawData,
+            CalibrationTable=difcTableWS,
+            OffsetMode="Signed",
+            BinWidth=abs(self.dBin),
+        )
+        difcWS = mtd.unique_name(prefix="_test_difc")
+        CalculateDIFC(
+            InputWorkspace=self.fakeRawData,
+            OutputWorkspace=difcWS,
+            OffsetMode="Signed",
+            BinWidth=abs(self.dBin),
+        )
+
+        difcTable = mtd[difcTableWS]
+        assert difcTable.getColumnNames() == ["detid", "difc", "difa", "tzero"]
+        assert difcTable.columnTypes() == ["int", "double", "double", "double"]
+        expected = {}
+        for wkspIndx in range(mtd[difcWS].getNumberHistograms()):
+            for detid in mtd[difcWS].getSpectrum(wkspIndx).getDetectorIDs():
+                expected[detid] = mtd[difcWS].readY(wkspIndx)[0]
+        assert difcTable.column("detid") == list(expected.keys())
+        np.testing.assert_allclose(difcTable.column("difc"), list(expected.values()))
+        assert difcTable.column("difa") == [0.0] * len(expected)
+        assert difcTable.column("tzero") == [0.0] * len(expected)
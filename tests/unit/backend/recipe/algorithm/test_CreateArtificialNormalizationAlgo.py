@@ -92,3 +92,43 @@ class TestCreateArtificialNormalizationAlgo(unittest.TestCase):
             dataY = output_ws.readY(i)
             self.assertFalse(np.isnan(dataY).any(), f"Histogram {i} contains NaN values")  # noqa: PT009
             self.assertFalse(np.isinf(dataY).any(), f"Histogram {i} contains infinite values")  # noqa: PT009
+
+    def test_peakClipSpectra_matches_per_spectrum(self):
+        # reference: the per-spectrum, per-bin clipping loop
+        def referencePeakClip(algo, data, winSize, decrese, LLS, smoothing):
+            startData = np.copy(data)
+            if smoothing > 0:
+                sm = np.zeros(len(data))
+                factor = smoothing / 2 + 1
+                for i in range(len(data)):
+                    temp = 0
+                    ave = 0
+                    for r in range(max(0, i - int(smoothing / 2)), min(i + int(smoothing / 2), len(data) - 1) + 1):
+                        temp += (factor - abs(r - i)) * data[r]
+                        ave += factor - abs(r - i)
+                    sm[i] = temp / ave
+                data = sm
+            if LLS:
+                data = algo.LLSTransformation(data)
+            temp = data.copy()
+            scan = list(range(winSize + 1, 0, -1)) if decrese else list(range(1, winSize + 1))
+            for w in scan:
+                for i in range(w, len(temp) - w):
+                    winArray = temp[i - w : i + w + 1].copy()
+                    average = (winArray + winArray[::-1]) / 2
+                    temp[i] = np.min(average[: int(len(average) / 2)])
+            if LLS:
+                temp = algo.InvLLSTransformation(temp)
+            index = np.where((startData - temp) == min(startData - temp))[0][0]
+            return temp * (startData[index] / temp[index])
+
+        algo = Algo()
+        rng = np.random.default_rng(seed=12345)
+        x = np.linspace(0.0, 1.0, 200)
+        spectra = rng.uniform(1.0, 10.0, size=(4, 200)) + 100.0 * np.exp(-(((x - 0.5) / 0.02) ** 2))
+        for decrese, LLS, smoothing in [(True, True, 0.5), (False, True, 0.0), (True, False, 5.0), (False, False, 3)]:
+            actual = algo.peakClipSpectra(spectra, 10, decrese, LLS, smoothing)
+            for n, y in enumerate(spectra):
+                expected = referencePeakClip(algo, y, 10, decrese, LLS, smoothing)
+                np.testing.assert_array_equal(actual[n], expected)
+                np.testing.assert_array_equal(algo.peakClip(y, 10, decrese, LLS, smoothing), expected)
@@ -17,6 +17,10 @@ class TestMantidSnapper(unittest.TestCase):
         self.fakeFunction.getProperties.return_value = [self.fakeOutput]
         self.fakeFunction.getProperty.return_value = self.fakeOutput
 
+        # the algorithm schemas are cached for the process: make sure no fake schema persists
+        MantidSnapper.clearSchemaCache()
+        self.addCleanup(MantidSnapper.clearSchemaCache)
+
     @mock.patch("snapred.backend.recipe.algorithm.MantidSnapper.AlgorithmManager")
     def test_snapper_fake_algo(self, mock_AlgorithmManager):
         mock_AlgorithmManager.create.return_value = self.fakeFunction
@@ -33,3 +37,35 @@ class TestMantidSnapper(unittest.TestCase):
         mantidSnapper.fakeFunction("test", fakeOutput=return_of_algo)
         mantidSnapper.executeQueue()
         assert self.fakeFunction.execute.called
+
+    @mock.patch("snapred.backend.recipe.algorithm.MantidSnapper.AlgorithmManager")
+    def test_snapper_schema_cache(self, mock_AlgorithmManager):
+        mock_AlgorithmManager.create.return_value = self.fakeFunction
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        mantidSnapper.fakeFunction("test", fakeOutput="one")
+        mantidSnapper.fakeFunction("test", fakeOutput="two")
+        # a second snapper shares the cache
+        MantidSnapper(parentAlgorithm=None, name="").fakeFunction("test", fakeOutput="three")
+        # the algorithm is only created once, to inspect its properties
+        mock_AlgorithmManager.create.assert_called_once_with("fakeFunction")
+        mock_AlgorithmManager.removeById.assert_called_once()
+        assert len(mantidSnapper._algorithmQueue) == 2
+
+    @mock.patch("snapred.backend.recipe.algorithm.MantidSnapper.AlgorithmManager")
+    def test_snapper_outputs_type_cache(self, mock_AlgorithmManager):
+        fakeOutput2 = mock.Mock()
+        fakeOutput2.name = "fakeOutput2"
+        fakeOutput2.direction = Direction.Output
+        self.fakeFunction.getProperties.return_value = [self.fakeOutput, fakeOutput2]
+        mock_AlgorithmManager.create.return_value = self.fakeFunction
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        first = mantidSnapper.fakeFunction("test")
+        second = mantidSnapper.fakeFunction("test")
+        assert first._fields == ("fakeOutput", "fakeOutput2")
+        assert type(first) is type(second)
+
+    def test_snapper_schema(self):
+        schema = MantidSnapper.algorithmSchema("CloneWorkspace")
+        assert schema["InputWorkspace"].direction == Direction.Input
+        assert schema["OutputWorkspace"].direction == Direction.Output
+        assert MantidSnapper.algorithmSchema("CloneWorkspace") is schema
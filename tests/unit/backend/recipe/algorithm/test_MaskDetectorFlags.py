@@ -112,6 +112,71 @@ class TestMaskDetectorFlags:
         assert testCount == maskedCount
         assert flag
 
+    def test_exec_resets_flags(self):
+        """Test that existing detector flags are replaced by the mask values, and monitor flags are retained"""
+        mask = mtd[self.testMaskWS]
+        detectors = mask.detectorInfo()
+        ids = detectors.detectorIDs()
+        # mask _odd_ detector ids in the mask, and _even_ detector ids in the output workspace
+        test = mtd[self.testInstrumentWS]
+        testDetectors = test.detectorInfo()
+        monitorFlags = {}
+        for id_ in ids:
+            index = detectors.indexOf(int(id_))
+            if detectors.isMonitor(index):
+                testDetectors.setMasked(index, True)
+                monitorFlags[index] = True
+            elif id_ % 2 != 0:
+                mask.setValue(int(id_), True)
+            else:
+                testDetectors.setMasked(index, True)
+
+        algo = MaskDetectorFlags()
+        algo.initialize()
+        algo.setProperty("MaskWorkspace", self.testMaskWS)
+        algo.setProperty("OutputWorkspace", self.testInstrumentWS)
+        assert algo.execute()
+
+        testDetectors = mtd[self.testInstrumentWS].detectorInfo()
+        for id_ in ids:
+            index = detectors.indexOf(int(id_))
+            if detectors.isMonitor(index):
+                assert testDetectors.isMasked(index) == monitorFlags[index]
+            else:
+                assert testDetectors.isMasked(index) == mask.isMasked(int(id_))
+
+    def test_exec_reordered_mask(self):
+        """Test that a mask workspace whose spectra are in a different order is not mapped as a previous mask"""
+        # apply a mask in the usual spectrum order: its detector-index map is cached
+        algo = MaskDetectorFlags()
+        algo.initialize()
+        algo.setProperty("MaskWorkspace", self.testMaskWS)
+        algo.setProperty("OutputWorkspace", self.testInstrumentWS)
+        assert algo.execute()
+
+        # swap the detectors of two spectra, retaining the detectors of the first and last spectra
+        reorderedMaskWS = mtd.unique_hidden_name()
+        CloneWorkspace(InputWorkspace=self.maskWS, OutputWorkspace=reorderedMaskWS)
+        mask = mtd[reorderedMaskWS]
+        id1 = mask.getSpectrum(1).getDetectorIDs()[0]
+        id2 = mask.getSpectrum(2).getDetectorIDs()[0]
+        mask.getSpectrum(1).setDetectorID(int(id2))
+        mask.getSpectrum(2).setDetectorID(int(id1))
+        # mask only the second spectrum: i.e. the detector `id2`
+        mask.setY(1, [1.0])
+
+        outputWS = mtd.unique_hidden_name()
+        CloneWorkspace(InputWorkspace=self.instrumentWS, OutputWorkspace=outputWS)
+        algo = MaskDetectorFlags()
+        algo.initialize()
+        algo.setProperty("MaskWorkspace", reorderedMaskWS)
+        algo.setProperty("OutputWorkspace", outputWS)
+        assert algo.execute()
+
+        testDetectors = mtd[outputWS].detectorInfo()
+        masked = [int(id_) for n, id_ in enumerate(testDetectors.detectorIDs()) if testDetectors.isMasked(n)]
+        assert masked == [int(id2)]
+
     def test_exec_no_clear(self):
         """Test that no workspace values are modified"""
         mask = mtd[self.testMaskWS]
@@ -6,7 +6,9 @@ import socket
 import unittest
 from pathlib import Path
 from typing import Dict, List
+from unittest import mock
 
+import numpy as np
 import pydantic
 import pytest
 from mantid.simpleapi import (
@@ -411,6 +413,82 @@ class PixelGroupCalculation(unittest.TestCase):
         )
         assert len(pgp) > 0
 
+    def referenceGroupingParameters(self, groupingWorkspace, maskWorkspace):
+        # Reference implementation: the per-detector loop using `DetectorInfo` accessors.
+        groupingWS = mtd[groupingWorkspace]
+        maskWS = mtd[maskWorkspace]
+        detectorInfo = groupingWS.detectorInfo()
+        reference = {}
+        for groupID in groupingWS.getGroupIDs():
+            meanL2, mean2Theta, meanPhi, normalizationFactor = 0.0, 0.0, 0.0, 0.0
+            min2Theta, max2Theta = 2.0 * np.pi, 0.0
+            for detID in groupingWS.getDetectorIDsOfGroup(int(groupID)):
+                detIndex = detectorInfo.indexOf(int(detID))
+                if detectorInfo.isMonitor(detIndex) or maskWS.isMasked(int(detID)):
+                    continue
+                twoTheta = detectorInfo.twoTheta(detIndex)
+                solidAngleFactor = np.sin(twoTheta / 2.0)
+                min2Theta, max2Theta = min(min2Theta, twoTheta), max(max2Theta, twoTheta)
+                mean2Theta += twoTheta * solidAngleFactor
+                try:
+                    meanPhi += detectorInfo.azimuthal(detIndex) * solidAngleFactor
+                except RuntimeError as e:
+                    if "Failed to create up axis orthogonal to the beam direction" not in str(e):
+                        raise
+                meanL2 += detectorInfo.l2(detIndex) * solidAngleFactor
+                normalizationFactor += solidAngleFactor
+            if normalizationFactor > np.finfo(float).eps:
+                reference[int(groupID)] = (
+                    meanL2 / normalizationFactor,
+                    mean2Theta / normalizationFactor,
+                    meanPhi / normalizationFactor,
+                )
+        return reference
+
+    def test_local_equivalence_to_detector_loop(self):
+        for groupingScheme in [self.column, self.natural]:
+            for maskType in [self.unmasked, self.westMasked]:
+                groupingWorkspace = self.localGroupingWorkspace[groupingScheme]
+                maskWorkspace = self.localMaskWorkspace[maskType]
+                pgp = self.createPixelGroupingParameters(
+                    instrumentState=self.localInstrumentState,
+                    groupingWorkspace=groupingWorkspace,
+                    maskWorkspace=maskWorkspace,
+                )
+                reference = self.referenceGroupingParameters(groupingWorkspace, maskWorkspace)
+                for param in pgp:
+                    if param.isMasked:
+                        assert int(param.groupID) not in reference
+                        continue
+                    L2, twoTheta, azimuth = reference[int(param.groupID)]
+                    assert pytest.approx(L2, rel=1.0e-9, abs=1.0e-12) == param.L2
+                    assert pytest.approx(twoTheta, rel=1.0e-9, abs=1.0e-12) == param.twoTheta
+                    assert pytest.approx(azimuth, rel=1.0e-9, abs=1.0e-12) == param.azimuth
+
+    def test_extractDetectorTable(self):
+        groupingWorkspace = self.localGroupingWorkspace[self.column]
+        detectorInfo = mtd[groupingWorkspace].detectorInfo()
+        algo = ThisAlgo()
+        algo.initialize()
+        # both the tabulated azimuth, and the per-pixel azimuth for a non-standard geometry
+        for azimuthIsPhi in (True, False):
+            with mock.patch.object(ThisAlgo, "azimuthIsPhi", return_value=azimuthIsPhi):
+                detectors = algo.extractDetectorTable(groupingWorkspace)
+            assert len(detectors["detectorID"]) == mtd[groupingWorkspace].getNumberHistograms()
+            assert not np.any(detectors["isMasked"])
+            for n, detID in enumerate(detectors["detectorID"].tolist()):
+                detIndex = detectorInfo.indexOf(detID)
+                assert not detectorInfo.isMonitor(detIndex)
+                assert pytest.approx(detectorInfo.l2(detIndex), rel=1.0e-12) == detectors["L2"][n]
+                twoTheta = detectors["twoTheta"][n]
+                assert pytest.approx(detectorInfo.twoTheta(detIndex), rel=1.0e-9, abs=1.0e-12) == twoTheta
+                try:
+                    expected = detectorInfo.azimuthal(detIndex)
+                except RuntimeError:
+                    # ambiguous azimuth: by convention, set to zero
+                    expected = 0.0
+                assert pytest.approx(expected, rel=1.0e-9, abs=1.0e-12) == detectors["azimuth"][n]
+
     # LOCAL TESTS ON SNAPLITE
 
     @pytest.mark.skipif(IS_ON_ANALYSIS_MACHINE, reason="use remote version instead")
@@ -1,8 +1,10 @@
 import time
 from unittest import TestCase, mock
 
+import numpy as np
 import pytest
 from mantid.simpleapi import CreateSingleValuedWorkspace, mtd
+from util.Config_helpers import Config_override
 from util.SculleryBoy import SculleryBoy
 
 from snapred.backend.dao.ingredients import ReductionIngredients
@@ -54,6 +56,17 @@ class ReductionRecipeTest(TestCase):
         with pytest.raises(KeyError):
             recipe.unbagGroceries(groceries)
 
+    def test_unbagGroceries_focussedNormalizations(self):
+        recipe = ReductionRecipe()
+        groceries = {
+            "inputWorkspace": "sample",
+            "normalizationWorkspace": "norm",
+            "groupingWorkspaces": ["group1", "group2"],
+            "focussedNormalizationWorkspaces": {0: "norm_focussed_0", 1: "norm_focussed_1"},
+        }
+        recipe.unbagGroceries(groceries)
+        assert recipe.sharedNormalizations == {0: "norm_focussed_0", 1: "norm_focussed_1"}
+
     def test_mandatory_inputs(self):
         inputs = ReductionRecipe().mandatoryInputWorkspaces()
         assert inputs == {"inputWorkspace", "groupingWorkspaces"}
@@ -165,9 +178,8 @@ class ReductionRecipeTest(TestCase):
         mockMaskWorkspace = mock.Mock()
         mockGroupWorkspace = mock.Mock()
 
-        mockGroupWorkspace.getNumberHistograms.return_value = 10
-        mockGroupWorkspace.readY.return_value = [0] * 10
-        mockMaskWorkspace.readY.return_value = [0] * 10
+        mockGroupWorkspace.extractY.return_value = np.ones((10, 1))
+        mockMaskWorkspace.extractY.return_value = np.zeros((10, 1))
 
         # Mock mtd to return mask and group workspaces
         mockMtd.__getitem__.side_effect = lambda ws_name: mockMaskWorkspace if ws_name == "mask" else mockGroupWorkspace
@@ -373,9 +385,8 @@ class ReductionRecipeTest(TestCase):
         mockMaskworkspace = mock.Mock()
         mockGroupWorkspace = mock.Mock()
 
-        mockGroupWorkspace.getNumberHistograms.return_value = 10
-        mockGroupWorkspace.readY.return_value = [0] * 10
-        mockMaskworkspace.readY.return_value = [0] * 10
+        mockGroupWorkspace.extractY.return_value = np.ones((10, 1))
+        mockMaskworkspace.extractY.return_value = np.zeros((10, 1))
 
         mockMtd.__getitem__.side_effect = lambda ws_name: mockMaskworkspace if ws_name == "mask" else mockGroupWorkspace
 
@@ -475,6 +486,59 @@ class ReductionRecipeTest(TestCase):
         assert recipe._deleteWorkspace.call_count == len(recipe._prepGroupingWorkspaces.return_value)
         assert result["outputs"][0] == "sample_grouped"
 
+    def test_execute_readOnly_sample(self):
+        recipe = ReductionRecipe()
+        recipe.mantidSnapper = mock.Mock()
+        recipe.groceries = {}
+        recipe.ingredients = mock.Mock()
+        recipe._applyRecipe = mock.Mock()
+        recipe._cloneIntermediateWorkspace = mock.Mock()
+        recipe._cloneWorkspace = mock.Mock(side_effect=lambda inputWs, outputWs: outputWs)  # noqa: ARG005
+        recipe._deleteWorkspace = mock.Mock()
+        recipe._getPreprocessedSampleWorkspaceName = mock.Mock(return_value="sample_preprocessed")
+        recipe._processGroupings = mock.Mock(return_value=["sample_grouped"])
+
+        recipe.sampleWs = "sample"
+        recipe.maskWs = ""
+        recipe.normalizationWs = ""
+        recipe.keepUnfocused = False
+        recipe.readOnlyWorkspaces = ["sample"]
+        recipe._writeWorkspaceMetadata = mock.Mock()
+
+        result = recipe.execute()
+
+        # the shared sample is copied before it is preprocessed, and the copy is deleted once it has been used
+        recipe._cloneWorkspace.assert_called_once_with("sample", "sample_preprocessed")
+        # only the copy is tagged
+        recipe._writeWorkspaceMetadata.assert_called_once_with("sample_preprocessed")
+        recipe._applyRecipe.assert_any_call(
+            PreprocessReductionRecipe,
+            recipe.ingredients.preprocess(),
+            inputWorkspace="sample_preprocessed",
+        )
+        recipe._deleteWorkspace.assert_called_once_with("sample_preprocessed")
+        assert result["outputs"] == ["sample_grouped"]
+
+    @mock.patch("snapred.backend.recipe.ReductionRecipe.WriteWorkspaceMetadata")
+    def test_writeWorkspaceMetadata(self, mockWriteWorkspaceMetadata):
+        recipe = ReductionRecipe()
+        # without metadata, nothing is written
+        recipe._writeWorkspaceMetadata("sample_copy")
+        mockWriteWorkspaceMetadata.assert_not_called()
+
+        recipe.unbagGroceries(
+            {
+                "inputWorkspace": "sample",
+                "groupingWorkspaces": [],
+                "readOnlyWorkspaces": ["sample"],
+                "workspaceMetadata": mock.sentinel.metadata,
+            }
+        )
+        recipe._writeWorkspaceMetadata("sample_copy")
+        mockWriteWorkspaceMetadata.return_value.cook.assert_called_once_with(
+            mock.sentinel.metadata, {"workspace": "sample_copy"}
+        )
+
     @mock.patch("mantid.simpleapi.mtd", create=True)
     def test_isGroupFullyMasked(self, mockMtd):
         mockMantidSnapper = mock.Mock()
@@ -484,9 +548,8 @@ class ReductionRecipeTest(TestCase):
         mockGroupWorkspace = mock.Mock()
 
         # Case 1: All pixels are masked
-        mockGroupWorkspace.getNumberHistograms.return_value = 10
-        mockGroupWorkspace.readY.side_effect = lambda i: [i]  # Assume each group has a single index per spectrum
-        mockMaskWorkspace.readY.side_effect = lambda i: [1]  # Assume every pixel is masked # noqa: ARG005
+        mockGroupWorkspace.extractY.return_value = np.array([[1], [1], [2], [2], [2], [3], [0], [3], [1], [2]])
+        mockMaskWorkspace.extractY.return_value = np.ones((10, 1))
 
         # Mock mtd to return the group and mask workspaces
         mockMtd.__getitem__.side_effect = lambda ws_name: mockMaskWorkspace if ws_name == "mask" else mockGroupWorkspace
@@ -502,12 +565,40 @@ class ReductionRecipeTest(TestCase):
         assert result is True, "Expected _isGroupFullyMasked to return True when all pixels are masked."
 
         # Case 2: Not all pixels are masked
-        mockMaskWorkspace.readY.side_effect = lambda i: [0] if i % 2 == 0 else [1]  # Only half the pixels are masked
+        mockMaskWorkspace.extractY.return_value = np.array([[0], [1], [0], [1], [0], [1], [0], [1], [0], [1]])
 
         # Test when not all pixels are masked
         result = recipe._isGroupFullyMasked("groupWorkspace")
         assert result is False, "Expected _isGroupFullyMasked to return False when not all pixels are masked."
 
+        # Case 3: Only the unassigned pixels are masked
+        mockMaskWorkspace.extractY.return_value = np.array([[0], [0], [0], [0], [0], [0], [1], [0], [0], [0]])
+        result = recipe._isGroupFullyMasked("groupWorkspace")
+        assert result is False, "Expected _isGroupFullyMasked to ignore pixels not assigned to any group."
+
+    @mock.patch("mantid.simpleapi.mtd", create=True)
+    def test_getGroupMaskCoverage(self, mockMtd):
+        mockMaskWorkspace = mock.Mock()
+        mockGroupWorkspace = mock.Mock()
+        mockGroupWorkspace.extractY.return_value = np.array([[1], [1], [2], [2], [2], [3], [0], [3], [1], [2]])
+        mockMaskWorkspace.extractY.return_value = np.array([[0], [1], [1], [1], [1], [0], [1], [0], [1], [1]])
+        mockMtd.__getitem__.side_effect = lambda ws_name: mockMaskWorkspace if ws_name == "mask" else mockGroupWorkspace
+
+        recipe = ReductionRecipe()
+        recipe.mantidSnapper = mock.Mock()
+        recipe.mantidSnapper.mtd = mockMtd
+        recipe.maskWs = "mask"
+
+        groupIDs, maskedPixels, totalPixels = recipe._getGroupMaskCoverage("groupWorkspace")
+        assert list(groupIDs) == [1, 2, 3]
+        assert list(maskedPixels) == [2, 4, 0]
+        assert list(totalPixels) == [3, 4, 2]
+
+        # Incompatible mask and grouping workspaces
+        mockMaskWorkspace.extractY.return_value = np.zeros((4, 1))
+        with pytest.raises(RuntimeError, match="not compatible"):
+            recipe._getGroupMaskCoverage("groupWorkspace")
+
     @mock.patch("mantid.simpleapi.mtd", create=True)
     def test_execute_with_fully_masked_group(self, mockMtd):
         mock_mantid_snapper = mock.Mock()
@@ -517,9 +608,8 @@ class ReductionRecipeTest(TestCase):
         mockGroupWorkspace = mock.Mock()
 
         # Mock groupWorkspace to have all pixels masked
-        mockGroupWorkspace.getNumberHistograms.return_value = 10
-        mockGroupWorkspace.readY.side_effect = lambda i: [i]  # Spectrum index per spectrum
-        mockMaskWorkspace.readY.side_effect = lambda i: [1]  # All pixels are masked # noqa: ARG005
+        mockGroupWorkspace.extractY.return_value = np.arange(1, 11).reshape((10, 1))  # One group per pixel
+        mockMaskWorkspace.extractY.return_value = np.ones((10, 1))  # All pixels are masked
 
         # Mock mtd to return the group and mask workspaces
         mockMtd.__getitem__.side_effect = lambda ws_name: mockMaskWorkspace if ws_name == "mask" else mockGroupWorkspace
@@ -612,3 +702,141 @@ class ReductionRecipeTest(TestCase):
         output = recipe.cater(shipment)
         recipe.cook.assert_called_once_with(mockIngredients, mockGroceries)
         assert output[0] == recipe.cook.return_value
+
+    def test_cater_shared_normalization(self):
+        recipe = ReductionRecipe()
+        recipe.prep = mock.Mock()
+        recipe._prepareSharedNormalizations = mock.Mock(return_value={0: "norm_focussed_0", 1: "norm_focussed_1"})
+        recipe._deleteWorkspace = mock.Mock()
+        sharedNormalizations = []
+
+        def execute():
+            sharedNormalizations.append(recipe.sharedNormalizations)
+            return {"result": True}
+
+        recipe.execute = mock.Mock(side_effect=execute)
+        ingredients = mock.Mock(artificialNormalizationIngredients=None)
+        groceries = {"inputWorkspace": "sample", "normalizationWorkspace": "norm"}
+        shipment = ((ingredients, {**groceries, "inputWorkspace": f"sample_{n}"}) for n in range(3))
+
+        output = recipe.cater(shipment)
+
+        # the normalization is prepared once, and is shared by every run
+        recipe._prepareSharedNormalizations.assert_called_once()
+        assert recipe.execute.call_count == 3
+        assert sharedNormalizations == [{0: "norm_focussed_0", 1: "norm_focussed_1"}] * 3
+        assert output == [{"result": True}] * 3
+        recipe._deleteWorkspace.assert_has_calls([mock.call("norm_focussed_0"), mock.call("norm_focussed_1")])
+        assert recipe.sharedNormalizations == {}
+
+    def test_cater_focussed_normalizations(self):
+        # normalizations which have already been focussed are not prepared again
+        recipe = ReductionRecipe()
+        recipe.cook = mock.Mock()
+        recipe._prepareSharedNormalizations = mock.Mock()
+        ingredients = mock.Mock(artificialNormalizationIngredients=None)
+        groceries = {
+            "inputWorkspace": "sample",
+            "normalizationWorkspace": "norm",
+            "focussedNormalizationWorkspaces": {0: "norm_focussed_0"},
+        }
+        output = recipe.cater([(ingredients, groceries)] * 2)
+        recipe._prepareSharedNormalizations.assert_not_called()
+        assert recipe.cook.call_count == 2
+        assert output == [recipe.cook.return_value] * 2
+
+    def test_focusNormalizations(self):
+        recipe = ReductionRecipe()
+        recipe.prep = mock.Mock()
+        recipe._prepareSharedNormalizations = mock.Mock(return_value={1: "norm_focussed_1"})
+        ingredients = mock.Mock()
+        groceries = {"inputWorkspace": "sample", "normalizationWorkspace": "norm"}
+
+        assert recipe.focusNormalizations(ingredients, groceries, [1]) == {1: "norm_focussed_1"}
+        recipe.prep.assert_called_once_with(ingredients, groceries)
+        recipe._prepareSharedNormalizations.assert_called_once_with([1])
+
+    def test_prepareSharedNormalizations_groupingIndices(self):
+        recipe = ReductionRecipe()
+        recipe.groceries = {}
+        recipe.normalizationWs = "norm"
+        recipe.maskWs = ""
+        recipe.groupingWorkspaces = ["group0", "group1", "group2"]
+        recipe._getNormalizationWorkspaceName = lambda groupingIndex: f"norm_{groupingIndex}"
+        recipe._preprocessNormalization = mock.Mock()
+        recipe._cloneWorkspace = mock.Mock(side_effect=lambda _input, output: output)
+        recipe._focusNormalization = mock.Mock()
+
+        assert recipe._prepareSharedNormalizations([0, 2]) == {0: "norm_0", 2: "norm_2"}
+        recipe._preprocessNormalization.assert_called_once()
+        recipe._focusNormalization.assert_has_calls([mock.call("norm_0", 0), mock.call("norm_2", 2)])
+        assert recipe._focusNormalization.call_count == 2
+
+    def test_prepGroupingWorkspaces_shared_normalization(self):
+        recipe = ReductionRecipe()
+        recipe.normalizationWs = "norm"
+        recipe.sharedNormalizations = {0: "norm_focussed_0"}
+        recipe.groceries = {}
+        recipe.ingredients = mock.Mock(
+            spec=ReductionIngredients,
+            runNumber="12345",
+            timestamp=time.time(),
+            pixelGroups=[mock.Mock()],
+        )
+        recipe.sampleWs = "sample"
+        recipe._cloneWorkspace = mock.Mock(return_value="cloned")
+
+        sampleClone, normClone = recipe._prepGroupingWorkspaces(0)
+
+        # only the sample is cloned
+        recipe._cloneWorkspace.assert_called_once()
+        assert sampleClone == "cloned"
+        assert normClone == "norm_focussed_0"
+        assert recipe.groceries["normalizationWorkspace"] == "norm_focussed_0"
+
+    def test_processGroupings_parallel(self):
+        recipe = ReductionRecipe()
+        recipe.groceries = {}
+        recipe.groupingWorkspaces = [f"group{n}" for n in range(5)]
+
+        def processGrouping(groupingIndex, groupingWs):
+            # finish the groupings out of order
+            time.sleep(0.01 * (5 - groupingIndex))
+            return None if groupingIndex == 2 else f"output_{groupingWs}"
+
+        recipe._processGrouping = mock.Mock(side_effect=processGrouping)
+        with Config_override("reduction.groupings.parallel", True), Config_override(
+            "reduction.groupings.maxConcurrent", 2
+        ):
+            outputs = recipe._processGroupings()
+
+        # the outputs are in the order of the grouping workspaces
+        assert outputs == ["output_group0", "output_group1", None, "output_group3", "output_group4"]
+        assert recipe._processGrouping.call_count == 5
+
+    def test_processGroupings_sequential(self):
+        recipe = ReductionRecipe()
+        recipe.groupingWorkspaces = ["group0", "group1"]
+        recipe._processGrouping = mock.Mock(side_effect=lambda groupingIndex, groupingWs: f"output_{groupingWs}")
+        recipe._groupingWorker = mock.Mock()
+
+        with Config_override("reduction.groupings.parallel", False):
+            outputs = recipe._processGroupings()
+
+        assert outputs == ["output_group0", "output_group1"]
+        recipe._groupingWorker.assert_not_called()
+
+    def test_groupingWorker(self):
+        recipe = ReductionRecipe()
+        recipe.groceries = {"inputWorkspace": "sample"}
+        recipe.ingredients = mock.Mock()
+        recipe.sampleWs = "sample"
+
+        worker = recipe._groupingWorker()
+
+        # the worker shares the recipe state, but not its groceries or its algorithm queue
+        assert worker.ingredients is recipe.ingredients
+        assert worker.sampleWs == recipe.sampleWs
+        assert worker.groceries == recipe.groceries
+        assert worker.groceries is not recipe.groceries
+        assert worker.mantidSnapper is not recipe.mantidSnapper
@@ -7,6 +7,7 @@ import numpy as np
 import pydantic
 import pytest
 from mantid.simpleapi import (
+    CreateWorkspace,
     DeleteWorkspace,
     mtd,
 )
@@ -16,6 +17,7 @@ from util.helpers import (
 )
 from util.InstaEats import InstaEats
 from util.SculleryBoy import SculleryBoy
+from util.Config_helpers import Config_override
 from util.state_helpers import reduction_root_redirect
 
 from snapred.backend.api.RequestScheduler import RequestScheduler
@@ -35,6 +37,7 @@ from snapred.backend.error.ContinueWarning import ContinueWarning
 from snapred.backend.error.RecoverableException import RecoverableException
 from snapred.backend.error.StateValidationException import StateValidationException
 from snapred.backend.service.ReductionService import ReductionService
+from snapred.backend.service.WorkspaceMetadataService import WorkspaceMetadataService
 from snapred.meta.Config import Resource
 from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceNameGenerator as wng
 
@@ -116,6 +119,22 @@ class TestReductionService(unittest.TestCase):
         assert "inputWorkspace" in res
         assert "diffcalWorkspace" in res
         assert "normalizationWorkspace" in res
+        assert "readOnlyWorkspaces" not in res
+
+    def test_fetchReductionGroceries_readOnly(self):
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=1)
+        self.instance._markWorkspaceMetadata = mock.Mock()
+        self.request.continueFlags = ContinueWarning.Type.UNSET
+        with mock.patch.object(self.instance.groceryService, "fetchGroceryDict") as mockFetchGroceryDict:
+            mockFetchGroceryDict.return_value = {"inputWorkspace": "raw"}
+            res = self.instance.fetchReductionGroceries(self.request, readOnly=True)
+        groceryDict = mockFetchGroceryDict.call_args.kwargs["groceryDict"]
+        assert groceryDict["inputWorkspace"].readOnly is True
+        assert res["readOnlyWorkspaces"] == ["raw"]
+        # the leased workspace is not tagged: its metadata is written to the recipe's copies
+        self.instance._markWorkspaceMetadata.assert_not_called()
+        assert res["workspaceMetadata"] == WorkspaceMetadata(diffcalState="exists", normalizationState="exists")
 
     @mock.patch(thisService + "ReductionRecipe")
     def test_reduction(self, mockReductionRecipe):
@@ -132,15 +151,228 @@ class TestReductionService(unittest.TestCase):
         self.instance.dataFactoryService.normalizationExists = mock.Mock(return_value=True)
         self.instance._markWorkspaceMetadata = mock.Mock()
 
-        result = self.instance.reduction(self.request)
+        with mock.patch.object(self.instance.groceryService, "releaseNeutronData") as mockRelease:
+            result = self.instance.reduction(self.request)
         groupings = self.instance.fetchReductionGroupings(self.request)
         ingredients = self.instance.prepReductionIngredients(self.request)
-        groceries = self.instance.fetchReductionGroceries(self.request)
+        groceries = self.instance.fetchReductionGroceries(self.request, readOnly=True)
         groceries["groupingWorkspaces"] = groupings["groupingWorkspaces"]
         mockReductionRecipe.assert_called()
         mockReductionRecipe.return_value.cook.assert_called_once_with(ingredients, groceries)
+        # the input run data is leased for the duration of the reduction
+        mockRelease.assert_called_once_with(groceries["inputWorkspace"])
         assert result.record.workspaceNames == mockReductionRecipe.return_value.cook.return_value["outputs"]
 
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_reduction_groupings_not_evicted(self, mockReductionRecipe):
+        # With a cache budget smaller than the run data and the groupings together,
+        #   loading the run data must not evict the grouping workspaces which it will be reduced with.
+        groceryService = self.instance.groceryService
+        fetchGroupings = self.instance.fetchReductionGroupings
+        fetchGroceries = self.instance.fetchReductionGroceries
+
+        def fetchReductionGroupings(request):
+            results = fetchGroupings(request)
+            for n, workspace in enumerate(results["groupingWorkspaces"]):
+                key = (f"grouping{n}", request.runNumber, request.useLiteMode)
+                groceryService._loadedGroupings[key] = workspace
+                groceryService._touchCache("grouping", key, workspace, hit=False)
+            return results
+
+        def fetchReductionGroceries(request, readOnly=False):
+            groceries = fetchGroceries(request, readOnly=readOnly)
+            # as when newly-loaded run data is added to the cache
+            groceryService._enforceCacheBudget(exclude=[groceries["inputWorkspace"]])
+            return groceries
+
+        def cook(ingredients, groceries):  # noqa: ARG001
+            assert groceries["groupingWorkspaces"]
+            for workspace in groceries["groupingWorkspaces"]:
+                assert mtd.doesExist(workspace)
+            return {"result": True, "outputs": []}
+
+        mockReductionRecipe.return_value.cook = mock.Mock(side_effect=cook)
+        self.instance.fetchReductionGroupings = mock.Mock(side_effect=fetchReductionGroupings)
+        self.instance.fetchReductionGroceries = mock.Mock(side_effect=fetchReductionGroceries)
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=1)
+        self.instance._markWorkspaceMetadata = mock.Mock()
+
+        with (
+            Config_override("groceryservice.cache.memoryBudget", 1.0e-9),
+            mock.patch.object(groceryService, "_workspaceMemorySize", return_value=1024**3),
+            # the grocery service is shared with the other tests
+            mock.patch.dict(groceryService._loadedGroupings),
+            mock.patch.dict(groceryService._cacheAccessOrder),
+        ):
+            self.instance.reduction(self.request)
+
+        mockReductionRecipe.return_value.cook.assert_called_once()
+        # once the reduction is complete, the groupings may be evicted
+        assert groceryService._workspaceLeases == {}
+
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_reductionBatch(self, mockReductionRecipe):
+        mockResult = {
+            "result": True,
+            "outputs": ["one", "two", "three"],
+        }
+
+        def cater(shipment):
+            return [mockResult for _ in shipment]
+
+        mockReductionRecipe.return_value.cater = mock.Mock(side_effect=cater)
+        self.instance.dataFactoryService.constructStateId = mock.Mock(return_value=("state1", None))
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=1)
+        self.instance._markWorkspaceMetadata = mock.Mock()
+        self.instance.fetchReductionGroupings = mock.Mock(wraps=self.instance.fetchReductionGroupings)
+        self.instance.prepReductionIngredients = mock.Mock(wraps=self.instance.prepReductionIngredients)
+
+        requests = [self.request.model_copy(update={"runNumber": runNumber}) for runNumber in ("123", "456")]
+        with mock.patch.object(self.instance.groceryService, "releaseNeutronData") as mockRelease:
+            results = self.instance.reductionBatch(requests)
+
+        # runs in the same state share their groupings, ingredients and normalization
+        self.instance.fetchReductionGroupings.assert_called_once()
+        self.instance.prepReductionIngredients.assert_called_once()
+        mockReductionRecipe.return_value.cater.assert_called_once()
+        assert [result.record.runNumber for result in results] == ["123", "456"]
+        assert all(result.record.workspaceNames == mockResult["outputs"] for result in results)
+        # each input run is released once it has been reduced
+        assert mockRelease.call_count == len(requests)
+
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_reductionBatch_leased_workspace_not_tagged(self, mockReductionRecipe):
+        # the leased raw data is shared with later requests: the reduction must not change its tags
+        leased = []
+
+        def cater(shipment):
+            outputs = []
+            for _, groceries in shipment:
+                leased.append(groceries["inputWorkspace"])
+                outputs.append({"result": True, "outputs": []})
+            return outputs
+
+        mockReductionRecipe.return_value.cater = mock.Mock(side_effect=cater)
+        self.instance.dataFactoryService.constructStateId = mock.Mock(return_value=("state1", None))
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=1)
+
+        requests = [self.request.model_copy(update={"runNumber": runNumber}) for runNumber in ("123", "456")]
+        with mock.patch.object(self.instance.groceryService, "releaseNeutronData"):
+            self.instance.reductionBatch(requests)
+
+        assert len(leased) == len(requests)
+        for workspace in leased:
+            assert self.instance.groceryService.workspaceDoesExist(workspace)
+            assert WorkspaceMetadataService().readWorkspaceMetadata(workspace) == WorkspaceMetadata()
+
+    def _focussedNormalizationIngredients(self):
+        ingredients = mock.Mock(spec=ReductionIngredients, useLiteMode=False, artificialNormalizationIngredients=None)
+        ingredients.preprocess.return_value.model_dump.return_value = {}
+        ingredients.generateFocussedVanadium.side_effect = lambda groupingIndex: mock.Mock(
+            model_dump=mock.Mock(return_value={"groupingIndex": groupingIndex})
+        )
+        return ingredients
+
+    def test_fetchFocussedNormalizations_disabled(self):
+        self.request.versions = Versions(1, 2)
+        groceries = {"normalizationWorkspace": "norm", "groupingWorkspaces": ["group0"]}
+        with Config_override("reduction.normalizationCache.enabled", False):
+            assert (
+                self.instance.fetchFocussedNormalizations(
+                    self.request, self._focussedNormalizationIngredients(), groceries
+                )
+                is None
+            )
+        # there is no normalization version
+        self.request.versions = Versions(1, None)
+        with Config_override("reduction.normalizationCache.enabled", True):
+            assert (
+                self.instance.fetchFocussedNormalizations(
+                    self.request, self._focussedNormalizationIngredients(), groceries
+                )
+                is None
+            )
+
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_fetchFocussedNormalizations(self, mockReductionRecipe):
+        self.request.versions = Versions(1, 2)
+        ingredients = self._focussedNormalizationIngredients()
+        groceries = {"normalizationWorkspace": "norm", "groupingWorkspaces": ["group0", "group1", "group2"]}
+        keys = [self.instance._focussedNormalizationKey(ingredients, n, 1, None) for n in range(3)]
+
+        # grouping 0 is cached, grouping 1 is not, and grouping 2 is fully masked
+        self.instance.dataFactoryService.getFocussedNormalization = mock.Mock(
+            side_effect=lambda _runNumber, _useLiteMode, _version, key, _name: key == keys[0]
+        )
+        mockReductionRecipe.return_value.focusNormalizations.return_value = {1: "norm_focussed_1"}
+        self.instance.dataExportService.exportFocussedNormalization = mock.Mock()
+
+        with Config_override("reduction.normalizationCache.enabled", True):
+            result = self.instance.fetchFocussedNormalizations(self.request, ingredients, groceries)
+
+        assert result == {0: f"focussed_normalization_{keys[0]}", 1: "norm_focussed_1"}
+        mockReductionRecipe.return_value.focusNormalizations.assert_called_once_with(ingredients, groceries, [1, 2])
+        self.instance.dataExportService.exportFocussedNormalization.assert_called_once_with(
+            self.request.runNumber, self.request.useLiteMode, 2, keys[1], "norm_focussed_1"
+        )
+
+    def test_focussedNormalizationKey(self):
+        ingredients = self._focussedNormalizationIngredients()
+        key = self.instance._focussedNormalizationKey(ingredients, 0, 1, None)
+        assert len(key) == 16
+        assert key == self.instance._focussedNormalizationKey(ingredients, 0, 1, None)
+        # the key depends on the grouping, the calibration version, and the pixel mask
+        assert key != self.instance._focussedNormalizationKey(ingredients, 1, 1, None)
+        assert key != self.instance._focussedNormalizationKey(ingredients, 0, 2, None)
+        assert key != self.instance._focussedNormalizationKey(ingredients, 0, 1, "0123456789abcdef")
+
+    def test_maskDigest(self):
+        assert self.instance._maskDigest(None) is None
+        mask = mtd.unique_name(prefix="_test_mask_digest_")
+        CreateWorkspace(OutputWorkspace=mask, DataX=[0.0] * 4, DataY=[0.0] * 4, NSpec=4)
+        digest = self.instance._maskDigest(mask)
+        assert digest == self.instance._maskDigest(mask)
+        mtd[mask].setY(0, np.array([1.0]))
+        assert digest != self.instance._maskDigest(mask)
+
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_reduction_focussedNormalizations(self, mockReductionRecipe):
+        mockReductionRecipe.return_value.cook = mock.Mock(return_value={"result": True, "outputs": ["one"]})
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=1)
+        self.instance._markWorkspaceMetadata = mock.Mock()
+        self.instance.fetchFocussedNormalizations = mock.Mock(return_value={0: "norm_focussed_0"})
+
+        with (
+            mock.patch.object(self.instance.groceryService, "releaseNeutronData"),
+            mock.patch.object(self.instance.groceryService, "deleteWorkspaceUnconditional") as mockDelete,
+        ):
+            self.instance.reduction(self.request)
+
+        # the focussed normalizations are passed to the recipe, and deleted after the reduction
+        groceries = mockReductionRecipe.return_value.cook.call_args.args[1]
+        assert groceries["focussedNormalizationWorkspaces"] == {0: "norm_focussed_0"}
+        mockDelete.assert_called_once_with("norm_focussed_0")
+
+    def test_groupBatchRequests(self):
+        stateIds = {"123": "state1", "456": "state1", "789": "state2"}
+        self.instance.dataFactoryService.constructStateId = mock.Mock(
+            side_effect=lambda runNumber: (stateIds[runNumber], None)
+        )
+        self.instance.dataFactoryService.getThisOrLatestCalibrationVersion = mock.Mock(return_value=1)
+        self.instance.dataFactoryService.getThisOrLatestNormalizationVersion = mock.Mock(return_value=2)
+
+        requests = [self.request.model_copy(update={"runNumber": runNumber}) for runNumber in stateIds]
+        # a run with an artificial normalization is always reduced separately
+        requests.append(self.request.model_copy(update={"artificialNormalizationIngredients": mock.Mock()}))
+        batches = self.instance._groupBatchRequests(requests)
+
+        assert sorted(batches.values()) == [[0, 1], [2], [3]]
+        assert requests[0].versions == Versions(1, 2)
+
     def test_reduction_noState_withWritePerms(self):
         mockRequest = mock.Mock()
         self.instance.dataFactoryService.stateExists = mock.Mock(return_value=False)
@@ -243,15 +475,35 @@ class TestReductionService(unittest.TestCase):
 
     def test_getStateIds(self):
         expectedStateIds = ["0" * 16, "1" * 16, "2" * 16, "3" * 16]
-        with mock.patch.object(self.instance.dataFactoryService, "constructStateId") as mockConstructStateId:
-            runNumbers = ["4" * 6, "5" * 6, "6" * 6, "7" * 6]
-            mockConstructStateId.side_effect = lambda runNumber: (
-                dict(zip(runNumbers, expectedStateIds))[runNumber],
-                None,
+        runNumbers = ["4" * 6, "5" * 6, "6" * 6, "7" * 6]
+        with mock.patch.object(self.instance.dataFactoryService, "constructStateIds") as mockConstructStateIds:
+            mockConstructStateIds.return_value = (
+                {runNumber: (stateId, None) for runNumber, stateId in zip(runNumbers, expectedStateIds)},
+                {},
             )
-            actualStateIds = self.instance.getStateIds(runNumbers)
-            assert actualStateIds == expectedStateIds
-            mockConstructStateId.call_count == len(runNumbers)
+            response = self.instance.getStateIds(runNumbers)
+            mockConstructStateIds.assert_called_once_with(runNumbers)
+            assert list(response.stateIds.keys()) == runNumbers
+            assert list(response.stateIds.values()) == expectedStateIds
+            assert response.errors == {}
+            assert response.duration >= 0.0
+
+    def test_getStateIds_partial(self):
+        runNumbers = ["4" * 6, "5" * 6]
+        error = StateValidationException(RuntimeError("no such run"))
+        with mock.patch.object(self.instance.dataFactoryService, "constructStateIds") as mockConstructStateIds:
+            mockConstructStateIds.return_value = ({runNumbers[0]: ("0" * 16, None)}, {runNumbers[1]: error})
+            response = self.instance.getStateIds(runNumbers)
+            assert response.stateIds == {runNumbers[0]: "0" * 16}
+            assert response.errors == {runNumbers[1]: str(error)}
+
+    def test_groupByStateId_error(self):
+        request = SNAPRequest(path="test", payload=self.request.json())
+        mockDataFactory = mock.Mock()
+        mockDataFactory.constructStateIds.return_value = ({}, {"12345": RuntimeError("no such run")})
+        self.instance.dataFactoryService = mockDataFactory
+        with pytest.raises(RuntimeError, match="no such run"):
+            self.instance._groupByStateId([request])
 
     def test_groupRequests(self):
         payload = self.request.json()
@@ -266,7 +518,10 @@ class TestReductionService(unittest.TestCase):
         # Verify the request is sorted by state id then normalization version
         mockDataFactory = mock.Mock()
         mockDataFactory.getThisOrCurrentNormalizationVersion.side_effect = [0, 1]
-        mockDataFactory.constructStateId.return_value = ("state1", "_")
+        mockDataFactory.constructStateIds.side_effect = lambda runNumbers: (
+            {runNumber: ("state1", "_") for runNumber in runNumbers},
+            {},
+        )
         self.instance.dataFactoryService = mockDataFactory
 
         # now sort
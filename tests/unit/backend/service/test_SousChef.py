@@ -4,6 +4,8 @@ import unittest
 from unittest import mock
 
 from mantid.simpleapi import DeleteWorkspace, mtd
+from util.Config_helpers import Config_override
+from util.dao import DAOFactory
 
 from snapred.backend.dao.CrystallographicInfo import CrystallographicInfo
 from snapred.backend.dao.GroupPeakList import GroupPeakList
@@ -172,17 +174,16 @@ class TestSousChef(unittest.TestCase):
     ):
         self.instance = SousChef()
         self.instance.dataFactoryService.calibrationExists = mock.Mock(return_value=True)
-        # ensure there is no cached value
-        key = (
-            self.ingredients.runNumber,
-            self.ingredients.useLiteMode,
-            self.ingredients.focusGroup.name,
-            self.ingredients.calibrantSamplePath,
-        )
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion = mock.Mock(return_value=1)
+        # ensure there is no cached value, either in memory or on disk
+        key = "0123456789abcdef"
+        self.instance._pixelGroupKey = mock.Mock(return_value=key)
         assert self.instance._pixelGroupCache == {}
+        self.instance.dataFactoryService.getCachedPixelGroup = mock.Mock(return_value=None)
+        self.instance.dataExportService.exportPixelGroup = mock.Mock()
 
         # mock the calibration, which will give the instrument state
-        mockCalibration = mock.Mock(instrumentState=mock.Mock())
+        mockCalibration = mock.Mock(instrumentState=mock.Mock(id="abcdef0123456789"))
         self.instance.prepCalibration = mock.Mock(return_value=mockCalibration)
         self.instance.groceryService.fetchGroceryDict = mock.Mock(
             return_value={"groupingWorkspace", self.ingredients.focusGroup.name},
@@ -203,33 +204,57 @@ class TestSousChef(unittest.TestCase):
             PixelGroupingIngredients.return_value,
             self.instance.groceryService.fetchGroceryDict.return_value,
         )
+        self.instance.dataFactoryService.getCachedPixelGroup.assert_called_once_with(
+            "abcdef0123456789", self.ingredients.useLiteMode, key
+        )
+        self.instance.dataExportService.exportPixelGroup.assert_called_once_with(
+            "abcdef0123456789", self.ingredients.useLiteMode, key, PixelGroup.return_value
+        )
         assert self.instance._pixelGroupCache == {key: PixelGroup.return_value}
         assert result == self.instance._pixelGroupCache[key]
 
+    @mock.patch(thisService + "PixelGroupingParametersCalculationRecipe")
+    def test_prepPixelGroup_diskcache(self, PixelGroupingParametersCalculationRecipe):
+        key = "0123456789abcdef"
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion = mock.Mock(return_value=1)
+        self.instance._pixelGroupKey = mock.Mock(return_value=key)
+        self.instance.prepFocusGroup = mock.Mock(return_value=self.ingredients.focusGroup)
+        self.instance.prepInstrumentState = mock.Mock(return_value=mock.Mock(id="abcdef0123456789"))
+        cached = PixelGroup.construct(timeOfFlight={"minimum": 0})
+        self.instance.dataFactoryService.getCachedPixelGroup = mock.Mock(return_value=cached)
+        self.instance.dataExportService.exportPixelGroup = mock.Mock()
+
+        res = self.instance.prepPixelGroup(self.ingredients)
+
+        assert not PixelGroupingParametersCalculationRecipe.called
+        assert not self.instance.dataExportService.exportPixelGroup.called
+        assert res == cached
+        assert self.instance._pixelGroupCache == {key: cached}
+
     @mock.patch(thisService + "PixelGroupingParametersCalculationRecipe")
     def test_prepPixelGroup_cache(self, PixelGroupingParametersCalculationRecipe):
         # ensure the cache is prepared
-        key = (
-            self.ingredients.runNumber,
-            self.ingredients.useLiteMode,
-            self.ingredients.focusGroup.name,
-            self.ingredients.calibrantSamplePath,
-        )
+        key = "0123456789abcdef"
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion = mock.Mock(return_value=1)
+        self.instance._pixelGroupKey = mock.Mock(return_value=key)
+        self.instance.prepFocusGroup = mock.Mock(return_value=self.ingredients.focusGroup)
+        self.instance.prepInstrumentState = mock.Mock()
+        self.instance.dataFactoryService.getCachedPixelGroup = mock.Mock()
         self.instance._pixelGroupCache[key] = mock.sentinel.pixel
 
         res = self.instance.prepPixelGroup(self.ingredients)
 
         assert not PixelGroupingParametersCalculationRecipe.called
+        assert not self.instance.dataFactoryService.getCachedPixelGroup.called
         assert res == self.instance._pixelGroupCache[key]
 
     def test_prepPixelGroup_cache_not_altered(self):
         # ensure the cache is prepared
-        key = (
-            self.ingredients.runNumber,
-            self.ingredients.useLiteMode,
-            self.ingredients.focusGroup.name,
-            self.ingredients.calibrantSamplePath,
-        )
+        key = "0123456789abcdef"
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion = mock.Mock(return_value=1)
+        self.instance._pixelGroupKey = mock.Mock(return_value=key)
+        self.instance.prepFocusGroup = mock.Mock(return_value=self.ingredients.focusGroup)
+        self.instance.prepInstrumentState = mock.Mock()
         self.instance._pixelGroupCache[key] = PixelGroup.construct(timeOfFlight={"minimum": 0})
 
         res = self.instance.prepPixelGroup(self.ingredients)
@@ -239,6 +264,52 @@ class TestSousChef(unittest.TestCase):
         assert another != res
         assert another == self.instance._pixelGroupCache[key]
 
+    def test_prepPixelGroup_lookup(self):
+        # a repeated request is served without building either the focus group or the instrument state
+        key = "0123456789abcdef"
+        self.instance._pixelGroupKey = mock.Mock(return_value=key)
+        self.instance.prepFocusGroup = mock.Mock(return_value=self.ingredients.focusGroup)
+        self.instance.prepInstrumentState = mock.Mock()
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion = mock.Mock(return_value=1)
+        self.instance._pixelGroupCache[key] = PixelGroup.construct(timeOfFlight={"minimum": 0})
+
+        first = self.instance.prepPixelGroup(self.ingredients)
+        second = self.instance.prepPixelGroup(self.ingredients)
+        assert first == second
+        self.instance.prepFocusGroup.assert_called_once()
+        self.instance.prepInstrumentState.assert_called_once()
+
+        # a new calibration version is a miss
+        self.instance.dataFactoryService.getThisOrCurrentCalibrationVersion.return_value = 2
+        self.instance.prepPixelGroup(self.ingredients)
+        assert self.instance.prepInstrumentState.call_count == 2
+
+    def test_cachePixelGroup_evicts_least_recently_used(self):
+        with Config_override("grouping.pixelGroupCache.maxSize", 2):
+            self.instance._cachePixelGroup("a", mock.sentinel.a)
+            self.instance._cachePixelGroup("b", mock.sentinel.b)
+            # touch "a", so that "b" becomes the least-recently used entry
+            self.instance._pixelGroupCache.move_to_end("a")
+            self.instance._pixelGroupLookup = {("a",): "a", ("b",): "b"}
+            self.instance._cachePixelGroup("c", mock.sentinel.c)
+        assert list(self.instance._pixelGroupCache.keys()) == ["a", "c"]
+        # the lookup keys of an evicted entry are also removed
+        assert self.instance._pixelGroupLookup == {("a",): "a"}
+
+    def test_pixelGroupKey(self):
+        instrumentState = DAOFactory.default_instrument_state.copy()
+        focusGroup = self.ingredients.focusGroup
+        key = SousChef._pixelGroupKey(focusGroup, instrumentState, self.ingredients)
+        assert len(key) == 16
+        # the key does not depend on the run number
+        ingredients = self.ingredients.model_copy(update={"runNumber": "456"})
+        assert key == SousChef._pixelGroupKey(focusGroup, instrumentState, ingredients)
+        # the key does depend on the lite-mode flag and on the resolution parameters
+        ingredients = self.ingredients.model_copy(update={"useLiteMode": False})
+        assert key != SousChef._pixelGroupKey(focusGroup, instrumentState, ingredients)
+        ingredients = self.ingredients.model_copy(update={"nBinsAcrossPeakWidth": 3})
+        assert key != SousChef._pixelGroupKey(focusGroup, instrumentState, ingredients)
+
     def test_getInstrumentDefinitionFilename(self):
         assert Config["instrument.lite.definition.file"] == self.instance._getInstrumentDefinitionFilename(True)
         assert Config["instrument.native.definition.file"] == self.instance._getInstrumentDefinitionFilename(False)
@@ -82,3 +82,11 @@ class TestWorkspaceService:
         request = ListWorkspacesRequest(excludeCache=True)
         service.getResidentWorkspaces(request)
         mockGroceryService.getResidentWorkspaces.assert_called_once_with(excludeCache=True)
+
+    def test_getCacheStatistics(self):
+        mockGroceryService = mock.Mock()
+        mockGroceryService.getCacheStatistics.return_value = {"hits": 1}
+        service = WorkspaceService()
+        service.groceryService = mockGroceryService
+        assert service.getCacheStatistics() == {"hits": 1}
+        mockGroceryService.getCacheStatistics.assert_called_once()
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from snapred.meta.mantid.DetectorIndices import detectorInfoIndices
+
+
+def test_detectorInfoIndices():
+    # detector IDs are not necessarily sorted
+    detectorIDs = np.array([-2, -1, 10, 12, 11, 13], dtype=np.int32)
+    indices = detectorInfoIndices(detectorIDs, [11, 10, -1, 13])
+    np.testing.assert_array_equal(indices, [4, 2, 1, 5])
+    assert len(detectorInfoIndices(detectorIDs, [])) == 0
+
+
+def test_detectorInfoIndices_missing():
+    detectorIDs = np.array([10, 11, 12], dtype=np.int32)
+    with pytest.raises(RuntimeError, match=r"not found in the instrument: \[9, 13\]"):
+        detectorInfoIndices(detectorIDs, [9, 10, 13])
+    with pytest.raises(RuntimeError, match="not found in the instrument"):
+        detectorInfoIndices(np.empty(0, dtype=np.int32), [1])
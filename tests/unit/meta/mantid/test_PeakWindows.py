@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from snapred.meta.mantid.PeakWindows import (
+    bracketingIndices,
+    interpolatePeakRegions,
+    peakWindowMask,
+    peakWindowMasks,
+    windowRanges,
+)
+
+
+def _legacyMask(x, minima, maxima, length):
+    # one pass over the whole spectrum for each peak, as previously implemented by `DiffractionSpectrumWeightCalculator`
+    weights = np.ones(length)
+    for minimum, maximum in zip(minima, maxima):
+        mask_indices = np.where(np.logical_and(x > minimum, x < maximum))[0]
+        mask_indices = mask_indices[mask_indices < len(weights)]
+        weights[mask_indices] = 0.0
+    return weights == 0.0
+
+
+def _windows(rng, numSpec):
+    windows = []
+    for n in range(numSpec):
+        # overlapping windows, windows outside of the x-range, and windows containing no x-values
+        centers = rng.uniform(-0.5, 11.5, n + 3)
+        widths = rng.uniform(0.0, 1.5, n + 3)
+        windows.append((centers - widths, centers + widths))
+    return windows
+
+
+def test_windowRanges():
+    x = np.arange(10, dtype=float)
+    start, stop = windowRanges(x, np.array([1.0, 2.5, 5.5, 20.0]), np.array([4.0, 2.7, 9.0, 30.0]))
+    np.testing.assert_array_equal(start, [2, 3, 6, 10])
+    # an empty range does not stop before it starts
+    np.testing.assert_array_equal(stop, [4, 3, 9, 10])
+
+
+@pytest.mark.parametrize("isHistogram", [True, False])
+def test_peakWindowMasks_commonX(isHistogram):
+    rng = np.random.default_rng(7)
+    numSpec, length = 6, 11
+    x = np.arange(length + 1 if isHistogram else length, dtype=float)
+    windows = _windows(rng, numSpec)
+    masks = peakWindowMasks(x, windows, length)
+    assert masks.shape == (numSpec, length)
+    for n in range(numSpec):
+        np.testing.assert_array_equal(masks[n], _legacyMask(x, *windows[n], length))
+
+
+def test_peakWindowMasks_perSpectrumX():
+    rng = np.random.default_rng(11)
+    numSpec, length = 5, 12
+    x = np.sort(rng.uniform(0.0, 11.0, (numSpec, length + 1)), axis=1)
+    windows = _windows(rng, numSpec)
+    masks = peakWindowMasks(x, windows, length)
+    for n in range(numSpec):
+        np.testing.assert_array_equal(masks[n], _legacyMask(x[n], *windows[n], length))
+        np.testing.assert_array_equal(peakWindowMask(x[n], windows[n], length), masks[n])
+
+
+def test_peakWindowMasks_edges():
+    x = np.arange(5, dtype=float)
+    # the window edges are excluded
+    np.testing.assert_array_equal(peakWindowMask(x, ([1.0], [3.0]), 5), [False, False, True, False, False])
+    # no peaks
+    np.testing.assert_array_equal(peakWindowMasks(x, [([], []), ([], [])], 5), np.zeros((2, 5), dtype=bool))
+
+
+def test_peakWindowMasks_invalid():
+    x = np.arange(5, dtype=float)
+    with pytest.raises(ValueError, match="same number of window minima and maxima"):
+        peakWindowMask(x, ([1.0, 2.0], [3.0]), 5)
+    with pytest.raises(ValueError, match="for each of 2 spectra"):
+        peakWindowMasks(np.tile(x, (3, 1)), [([1.0], [3.0])] * 2, 5)
+
+
+def _legacyInterpolate(x_data, y_data, regions):
+    # one pass over the whole spectrum for each region, as previously implemented by `RemoveEventBackground`
+    y_data = y_data.copy()
+    for mask in zip(*regions):
+        mask_indices = (x_data >= mask[0]) & (x_data <= mask[1])
+        before_mask = np.where(x_data < mask[0])[0][-1]
+        after_mask = np.where(x_data > mask[1])[0][0]
+        interp_values = np.linspace(y_data[before_mask], y_data[after_mask], mask_indices.sum())
+        y_data[mask_indices[:-1]] = interp_values
+    return y_data
+
+
+def _regions():
+    # overlapping and adjacent regions, and regions containing one bin edge or none
+    minima = [1.2, 2.05, 2.5, 4.0, 4.7, 6.3, 6.9, 7.6, 3.0]
+    maxima = [2.6, 2.45, 3.3, 4.0, 5.9, 6.9, 7.2, 8.8, 2.0]
+    return minima, maxima
+
+
+def test_bracketingIndices():
+    x = np.arange(10, dtype=float)
+    before, after = bracketingIndices(x, np.array([1.0, 2.5]), np.array([4.0, 2.7]))
+    np.testing.assert_array_equal(before, [0, 2])
+    np.testing.assert_array_equal(after, [5, 3])
+
+
+def test_interpolatePeakRegions_commonX():
+    rng = np.random.default_rng(3)
+    x = np.linspace(0.0, 10.0, 41)
+    y = rng.uniform(0.0, 100.0, (5, 40))
+    expected = [_legacyInterpolate(x, yn, _regions()) for yn in y]
+    interpolatePeakRegions(x, y, _regions())
+    # identical, and not only close
+    np.testing.assert_array_equal(y, expected)
+
+
+def test_interpolatePeakRegions_perHistogramX():
+    rng = np.random.default_rng(5)
+    x = np.linspace(0.0, 10.0, 61) * rng.uniform(0.95, 1.05, (8, 1))
+    y = rng.uniform(0.0, 100.0, (8, 60))
+    expected = [_legacyInterpolate(xn, yn, _regions()) for xn, yn in zip(x, y)]
+    interpolatePeakRegions(x, y, _regions())
+    np.testing.assert_array_equal(y, expected)
+
+
+def test_interpolatePeakRegions_constant():
+    # a fill between equal values, for which `np.linspace` takes its zero-step path
+    x = np.arange(11, dtype=float)
+    y = np.full((2, 10), 3.0)
+    y[1, 5] = -1.0
+    expected = [_legacyInterpolate(x, yn, ([2.5], [6.5])) for yn in y]
+    interpolatePeakRegions(x, y, ([2.5], [6.5]))
+    np.testing.assert_array_equal(y, expected)
+
+
+def test_interpolatePeakRegions_unbracketed():
+    x = np.arange(11, dtype=float)
+    y = np.ones((2, 10))
+    with pytest.raises(ValueError, match=r"peak region \(-1.0, 2.0\) is not bracketed"):
+        interpolatePeakRegions(x, y, ([3.0, -1.0], [4.0, 2.0]))
+    # the value above the region must be a bin value, and not only a bin edge
+    with pytest.raises(ValueError, match="is not bracketed"):
+        interpolatePeakRegions(x, y, ([8.5], [9.5]))
+    with pytest.raises(ValueError, match="same number of region minima and maxima"):
+        interpolatePeakRegions(x, y, ([3.0, 5.0], [4.0]))
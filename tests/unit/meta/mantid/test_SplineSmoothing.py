@@ -0,0 +1,116 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+from scipy.interpolate import make_smoothing_spline
+from util.Config_helpers import Config_override
+
+from snapred.meta.mantid.SplineSmoothing import readSpectra, smoothSpectra, writeSpectra
+
+lam = 0.01
+
+
+def _spectra(numSpec: int = 7, numBins: int = 40):
+    rng = np.random.default_rng(42)
+    x = np.linspace(0.5, 3.0, numBins) + 0.01 * np.arange(numSpec)[:, np.newaxis]
+    y = np.sin(3.0 * x) + 1.0 + 0.1 * rng.standard_normal((numSpec, numBins))
+    return x, y
+
+
+def _serial(x, y, xFit=None, mask=None, nonNegative=False):
+    # the per-spectrum loop, as previously implemented by the algorithms
+    result = []
+    for n in range(len(y)):
+        xf, yf = (xFit[n] if xFit is not None else x[n]), y[n]
+        if mask is not None:
+            xf, yf = xf[mask[n]], yf[mask[n]]
+        ySmooth = make_smoothing_spline(xf, yf, lam=lam)(x[n], extrapolate=False)
+        if nonNegative:
+            ySmooth[ySmooth < 0] = 0
+        result.append(ySmooth)
+    return result
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize(("maxWorkers", "chunkSize"), [(1, 512), (2, 1), (3, 2), (8, 3)])
+def test_smoothSpectra_identical(executor, maxWorkers, chunkSize):
+    x, y = _spectra()
+    mask = np.ones(y.shape, dtype=bool)
+    mask[:, 10:15] = False
+    expected = _serial(x, y, xFit=x + 0.001, mask=mask, nonNegative=True)
+    actual = smoothSpectra(
+        x,
+        y,
+        lam,
+        xFit=x + 0.001,
+        mask=mask,
+        nonNegative=True,
+        maxWorkers=maxWorkers,
+        executor=executor,
+        chunkSize=chunkSize,
+    )
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        np.testing.assert_array_equal(a, e)
+
+
+def test_smoothSpectra_ragged():
+    x, y = _spectra()
+    xs = [x[n, : 20 + n] for n in range(len(x))]
+    ys = [y[n, : 20 + n] for n in range(len(y))]
+    actual = smoothSpectra(xs, ys, lam, maxWorkers=2, chunkSize=2)
+    for a, e in zip(actual, _serial(xs, ys)):
+        np.testing.assert_array_equal(a, e)
+
+
+def test_smoothSpectra_nonNegative():
+    x, y = _spectra()
+    y -= 1.5
+    assert (np.concatenate(smoothSpectra(x, y, lam)) < 0).any()
+    assert (np.concatenate(smoothSpectra(x, y, lam, nonNegative=True)) >= 0).all()
+
+
+def test_smoothSpectra_config():
+    x, y = _spectra()
+    with (
+        Config_override("smoothing.spline.maxWorkers", 3),
+        Config_override("smoothing.spline.executor", "thread"),
+        Config_override("smoothing.spline.chunkSize", 2),
+        mock.patch("snapred.meta.mantid.SplineSmoothing.ThreadPoolExecutor") as mockExecutor,
+    ):
+        mockExecutor.return_value.__enter__.return_value.map.return_value = [[yn] for yn in y]
+        smoothSpectra(x, y, lam)
+        mockExecutor.assert_called_once_with(max_workers=3)
+        # 7 spectra, in chunks of 2
+        assert len(list(mockExecutor.return_value.__enter__.return_value.map.call_args.args[1])) == 4
+
+
+def test_smoothSpectra_invalid():
+    x, y = _spectra()
+    with pytest.raises(ValueError, match="same number of spectra"):
+        smoothSpectra(x[:-1], y, lam)
+    with pytest.raises(ValueError, match="unknown executor"):
+        smoothSpectra(x, y, lam, executor="cluster")
+
+
+def test_readSpectra():
+    workspace = mock.Mock()
+    workspace.isRaggedWorkspace.return_value = False
+    assert readSpectra(workspace) == (workspace.extractX.return_value, workspace.extractY.return_value)
+
+    workspace = mock.Mock()
+    workspace.isRaggedWorkspace.return_value = True
+    workspace.getNumberHistograms.return_value = 2
+    workspace.readX.side_effect = lambda n: np.arange(n + 3)
+    workspace.readY.side_effect = lambda n: np.arange(n + 2)
+    xs, ys = readSpectra(workspace)
+    workspace.extractX.assert_not_called()
+    assert [len(xn) for xn in xs] == [3, 4]
+    assert [len(yn) for yn in ys] == [2, 3]
+
+
+def test_writeSpectra():
+    workspace = mock.Mock()
+    ys = [np.zeros(3), np.ones(3)]
+    writeSpectra(workspace, ys)
+    assert workspace.setY.call_args_list == [mock.call(0, ys[0]), mock.call(1, ys[1])]
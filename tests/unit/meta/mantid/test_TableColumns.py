@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from mantid.simpleapi import CreateEmptyTableWorkspace, DeleteWorkspace, mtd
+
+from snapred.meta.mantid.TableColumns import appendTableColumns, columnType
+
+
+@pytest.fixture
+def table():
+    ws = mtd.unique_name(prefix="_test_table_columns_")
+    yield CreateEmptyTableWorkspace(OutputWorkspace=ws)
+    DeleteWorkspace(ws)
+
+
+def test_columnType():
+    assert columnType(np.arange(3, dtype=np.int32)) == "int"
+    assert columnType(np.arange(3, dtype=np.uint64)) == "int"
+    assert columnType(np.zeros(3)) == "double"
+    assert columnType([True, False]) == "bool"
+    assert columnType(["one", "two"]) == "str"
+    with pytest.raises(ValueError, match="cannot convert"):
+        columnType(np.zeros(3, dtype=complex))
+
+
+def test_appendTableColumns(table):
+    appendTableColumns(
+        table,
+        {"detid": np.arange(4, dtype=np.int32), "difc": np.linspace(1.0, 2.0, 4), "name": ["a", "b", "c", "d"]},
+        plotType=6,
+    )
+    assert table.getColumnNames() == ["detid", "difc", "name"]
+    assert table.columnTypes() == ["int", "double", "str"]
+    assert table.getPlotType("difc") == 6
+    assert table.column("detid") == [0, 1, 2, 3]
+    assert table.column("difc") == pytest.approx([1.0, 4.0 / 3.0, 5.0 / 3.0, 2.0])
+    assert table.row(2) == {"detid": 2, "difc": pytest.approx(5.0 / 3.0), "name": "c"}
+
+
+def test_appendTableColumns_columnTypes(table):
+    appendTableColumns(table, {"count": [1, 2], "value": [3, 4]}, {"value": "double"})
+    assert table.columnTypes() == ["int", "double"]
+    assert table.column("value") == [3.0, 4.0]
+
+
+def test_appendTableColumns_length_mismatch(table):
+    with pytest.raises(RuntimeError, match="Column mismatch: length 3 vs 2"):
+        appendTableColumns(table, {"one": [1, 2], "two": [1, 2, 3]})
+    # no columns were added
+    assert table.columnCount() == 0
+
+
+def test_appendTableColumns_has_columns(table):
+    table.addColumn(type="int", name="one")
+    with pytest.raises(RuntimeError, match="already has columns"):
+        appendTableColumns(table, {"two": [1, 2]})
@@ -7,6 +7,7 @@ from tempfile import TemporaryDirectory
 from unittest import mock
 
 import pytest
+from util.Config_helpers import Config_override
 
 import snapred.meta.Config as Config_module
 from snapred.meta.Config import Config, Resource, _find_root_dir, fromMantidLoggingLevel
@@ -211,6 +212,49 @@ def test_key_substitution():
     assert Config["test.substitution"] == "This is a test string with a value in it"
 
 
+def test_lookup_is_memoized():
+    Config._config["test"]["key"] = "value"
+    Config._config["test"]["substitution"] = "a ${test.key}"
+    with mock.patch.object(Config, "_lookup", wraps=Config._lookup) as mockLookup:
+        assert Config["test.substitution"] == "a value"
+        assert Config["test.substitution"] == "a value"
+        # the substitution is resolved only once
+        assert mockLookup.call_count == 2
+        mockLookup.assert_any_call("test.substitution")
+        mockLookup.assert_any_call("test.key")
+
+
+def test_lookup_invalidated_on_modification():
+    Config._config["test"]["key"] = "value"
+    Config._config["test"]["substitution"] = "a ${test.key}"
+    assert Config["test.substitution"] == "a value"
+    # modifying a referenced value invalidates the resolved substitution
+    Config._config["test"]["key"] = "different value"
+    assert Config["test.substitution"] == "a different value"
+    # as does modifying a newly-inserted nested dictionary
+    Config._config["test"]["nested"] = {"key": 1}
+    assert Config["test.nested.key"] == 1
+    Config._config["test"]["nested"]["key"] = 2
+    assert Config["test.nested.key"] == 2
+    del Config._config["test"]["nested"]
+    with pytest.raises(KeyError):
+        Config["test.nested.key"]
+
+
+def test_lookup_invalidated_on_refresh():
+    assert Config["environment"] == "test"
+    Config._resolved["environment"] = "stale"
+    Config.refresh("test")
+    assert Config["environment"] == "test"
+
+
+def test_lookup_with_Config_override():
+    original = Config["instrument.name"]
+    with Config_override("instrument.name", "CRACKLE"):
+        assert Config["instrument.name"] == "CRACKLE"
+    assert Config["instrument.name"] == original
+
+
 def test_multi_level_substitution():
     assert Config["test.data.home.write"] == f'~/{Config["test.config.home"]}/data/{Config["test.config.name"]}'
     assert Config["test.data.home.read"] == f'{Config["test.config.home"]}/data/{Config["test.config.name"]}'